@@ -0,0 +1,221 @@
+"""
+Adaptive Batch Sizing for Neo4j Writes
+Sends batches in managed write transactions (retried on transient errors)
+and sizes them to hit a target transaction latency, backing off when the
+server reports memory pressure
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from neo4j.exceptions import Neo4jError
+
+
+# Target wall time of one write transaction (seconds)
+TARGET_SECONDS = 1.0
+
+# Batch size limits (records)
+MIN_BATCH_SIZE = 10
+MAX_BATCH_SIZE = 50_000
+
+# Largest change of the batch size from one batch to the next (factor)
+MAX_STEP = 2.0
+
+# Weight of the newest per-record latency in the running estimate
+SMOOTHING = 0.3
+
+# Fragments of Neo4j status codes raised when a transaction exceeds a memory limit
+# (e.g. Neo.TransientError.General.MemoryPoolOutOfMemoryError,
+# Neo.ClientError.General.TransactionOutOfMemoryError)
+MEMORY_ERROR_MARKERS = ('OutOfMemory', 'MemoryLimit', 'MemoryPool')
+
+
+class MemoryPressureError(Exception):
+    """A batch was rejected for exceeding a server memory limit."""
+
+
+def is_memory_error(error: Exception) -> bool:
+    """Whether a Neo4j error reports transaction or heap memory exhaustion."""
+    code = getattr(error, 'code', None) or ''
+    return isinstance(error, Neo4jError) and any(marker in code for marker in MEMORY_ERROR_MARKERS)
+
+
+class AdaptiveBatchSizer:
+    """
+    Batch size controller for one stream of writes (e.g. one entity type).
+
+    Keeps a running estimate of seconds per record and proposes the batch
+    size that would take TARGET_SECONDS, moving at most MAX_STEP per batch.
+    A memory-pressure failure halves the size and caps it below the failed
+    batch for the rest of the run. Safe to share between worker threads.
+    """
+
+    def __init__(self, initial: int = 1000, target_seconds: float = TARGET_SECONDS,
+                 min_size: int = MIN_BATCH_SIZE, max_size: int = MAX_BATCH_SIZE, adaptive: bool = True):
+        """
+        Args:
+            initial: First batch size (e.g. BATCH_SIZE from .env)
+            target_seconds: Transaction latency to aim for
+            min_size: Smallest batch proposed by latency (memory pressure can go lower)
+            max_size: Largest batch proposed
+            adaptive: False keeps the initial size except for memory back-off
+        """
+        self.target_seconds = target_seconds
+        self.min_size = min_size
+        self.ceiling = max(1, max_size)
+        self.adaptive = adaptive
+        self.size = max(1, min(initial, self.ceiling))
+        self.seconds_per_record: Optional[float] = None
+        self.batches = 0
+        self.memory_backoffs = 0
+        self._lock = threading.Lock()
+
+    def record(self, rows: int, seconds: float):
+        """Update the estimate with one committed batch and propose the next size."""
+        if rows <= 0:
+            return
+        with self._lock:
+            self.batches += 1
+            if not self.adaptive:
+                return
+            latest = max(seconds, 1e-6) / rows
+            if self.seconds_per_record is None:
+                self.seconds_per_record = latest
+            else:
+                self.seconds_per_record += SMOOTHING * (latest - self.seconds_per_record)
+            # Partial batches (the tail of a list) carry little information about the size limit
+            if rows < self.size // 2:
+                return
+            proposed = self.target_seconds / self.seconds_per_record
+            proposed = min(max(proposed, self.size / MAX_STEP), self.size * MAX_STEP)
+            self.size = int(min(max(proposed, self.min_size), self.ceiling))
+
+    def memory_pressure(self, rows: int):
+        """Back off after a batch of `rows` records ran out of memory."""
+        with self._lock:
+            self.memory_backoffs += 1
+            self.ceiling = max(1, min(self.ceiling, rows // 2))
+            self.size = min(self.size, self.ceiling)
+
+    def summary(self) -> str:
+        """One-line description of where the controller settled."""
+        rate = f", {1.0 / self.seconds_per_record:,.0f} rows/s" if self.seconds_per_record else ""
+        backoffs = f", {self.memory_backoffs} memory back-offs" if self.memory_backoffs else ""
+        return f"batch size {self.size:,}{rate}{backoffs}"
+
+
+def _write_transaction(tx, query: str, batch: List[Any], attempts: List[float]):
+    """Transaction function: run one batch, turning memory errors into MemoryPressureError."""
+    attempts.append(time.time())
+    try:
+        tx.run(query, batch=batch).consume()
+    except Neo4jError as e:
+        # Retrying the same batch cannot succeed; leave the driver's retry loop
+        if is_memory_error(e):
+            raise MemoryPressureError(str(e)) from e
+        raise
+
+
+def execute_batch(session, query: str, batch: List[Any]):
+    """
+    Write one batch in a managed write transaction.
+
+    Transient failures are retried by the driver; a batch rejected for
+    memory is split in halves and each half written on its own.
+    """
+    try:
+        session.execute_write(_write_transaction, query, batch, [])
+    except MemoryPressureError:
+        if len(batch) <= 1:
+            raise
+        half = len(batch) // 2
+        execute_batch(session, query, batch[:half])
+        execute_batch(session, query, batch[half:])
+
+
+def write_batches(session, query: str, data: Sequence[Any], sizer: AdaptiveBatchSizer,
+                  rows: Optional[Sequence[int]] = None,
+                  prepare: Optional[Callable[[List[Any]], List[Any]]] = None,
+                  on_batch: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Write records in managed write transactions sized by `sizer`.
+
+    Transient failures (deadlocks, leader switches, lost connections) are
+    retried by the driver with exponential backoff. A batch rejected for
+    memory is retried from the same record at the reduced size.
+
+    Args:
+        session: Open Neo4j session
+        query: Cypher query with $batch parameter
+        data: Records to write (or plain values, e.g. IDs to delete)
+        sizer: Batch size controller
+        rows: Indices into data to write, in order (default: all of data)
+        prepare: Transform applied to each batch before it is sent (optional)
+        on_batch: Called with the record count of each committed batch (e.g. progress)
+
+    Returns:
+        Transactions attempted beyond one per committed batch (driver retries)
+    """
+    total = len(rows) if rows is not None else len(data)
+    retries = 0
+    start = 0
+    while start < total:
+        size = sizer.size
+        if rows is not None:
+            batch = [data[row] for row in rows[start:start + size]]
+        else:
+            batch = list(data[start:start + size])
+        count = len(batch)
+        if prepare:
+            batch = prepare(batch)
+
+        attempts: List[float] = []
+        try:
+            session.execute_write(_write_transaction, query, batch, attempts)
+        except MemoryPressureError:
+            if count <= 1:
+                raise
+            sizer.memory_pressure(count)
+            print(f"⚠️  Batch of {count:,} exceeded server memory, retrying at {sizer.size:,}")
+            continue
+
+        sizer.record(count, time.time() - attempts[-1])
+        retries += len(attempts) - 1
+        start += count
+        if on_batch:
+            on_batch(count)
+    return retries
+
+
+def print_sizer_report(sizers: Dict[str, AdaptiveBatchSizer]):
+    """Print the batch size each write stream settled on."""
+    if not sizers:
+        return
+    print("\n📏 Adaptive batch sizes:")
+    width = max(len(name) for name in sizers)
+    for name, sizer in sizers.items():
+        print(f"  {name:<{width}}  {sizer.summary()}")
+
+
+if __name__ == "__main__":
+    import random
+
+    # Simulate a server whose latency grows linearly with batch size and
+    # which rejects batches above a memory limit
+    def simulate(seconds_per_record: float, memory_limit: int, records: int = 500_000):
+        sizer = AdaptiveBatchSizer(initial=1000)
+        written = 0
+        while written < records:
+            size = min(sizer.size, records - written)
+            if size > memory_limit:
+                sizer.memory_pressure(size)
+                continue
+            sizer.record(size, 0.02 + size * seconds_per_record * random.uniform(0.8, 1.2))
+            written += size
+        return sizer
+
+    for per_record, limit in [(2e-5, 100_000), (1e-4, 100_000), (1e-3, 100_000), (2e-5, 8_000)]:
+        sizer = simulate(per_record, limit)
+        print(f"  {per_record * 1e6:>6.0f} µs/record, memory limit {limit:>7,}: "
+              f"{sizer.summary()} after {sizer.batches} batches")
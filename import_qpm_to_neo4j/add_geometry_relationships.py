@@ -3,9 +3,14 @@
 Create missing geometry relationships
 """
 import os
+import argparse
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
 from ttl_parser import QPMParser
+from geometry_dedup import GeometryDeduplicator
+from parse_cache import cache_from_env, extract_files
+from neo4j_importer import ENDPOINT_MATCHES
+from uri_codec import endpoint_kinds
 
 load_dotenv()
 
@@ -13,68 +18,74 @@ NEO4J_URI = os.getenv("NEO4J_URI", "bolt://localhost:7687")
 NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "neo4j")
 
-def add_geometry_relationships():
+def merge_geometry_relationships(session, rels, rel_type, batch_size=1000):
+    """MERGE geometry relationships in batches, with one label-and-key MATCH per source kind"""
+    by_kind = {}
+    for rel in rels:
+        kind = rel.get('from_kind') or endpoint_kinds(rel['type'], rel['from_uri'], rel['to_uri'])[0]
+        by_kind.setdefault(kind, []).append(rel)
+
+    for kind, kind_rels in by_kind.items():
+        if kind not in ENDPOINT_MATCHES:
+            print(f"  ⚠️  Skipping {len(kind_rels)} relationships from unknown nodes")
+            continue
+        query = f"""
+        UNWIND $batch AS rel
+        {ENDPOINT_MATCHES[kind].format(end='from')}
+        {ENDPOINT_MATCHES['geometry'].format(end='to')}
+        MERGE (from)-[:{rel_type}]->(to)
+        """
+        for i in range(0, len(kind_rels), batch_size):
+            batch = kind_rels[i:i+batch_size]
+            session.run(query, batch=batch)
+            print(f"  Processed {min(i+batch_size, len(kind_rels))}/{len(kind_rels)} ({kind})")
+
+def add_geometry_relationships(use_cache: bool = True):
     """Add the missing HAS_MAIN_GEOMETRY and HAS_EXTRA_GEOMETRY relationships"""
     
     print("\n🔧 Adding geometry relationships...")
+    cache = cache_from_env(enabled=use_cache)
     
     # Parse the files to get the relationships
-    parser = QPMParser()
-    parser.parse_file('../Hierarchy_Full_with_names_and_places/Admin_Hierarchy.ttl')
-    rels = parser.extract_relationships()
+    data = extract_files(QPMParser(), ['../Hierarchy_Full_with_names_and_places/Admin_Hierarchy.ttl'], cache)[0]
+    rels = data['relationships'] if data else []
+    geometries = list(data['geometries']) if data else []
     geom_rels = [r for r in rels if 'GEOMETRY' in r['type']]
     
     print(f"Found {len(geom_rels)} geometry relationships from hierarchy file")
     
     # Also parse places file
-    parser2 = QPMParser()
-    parser2.parse_file('../Hierarchy_Full_with_names_and_places/Admin_Full_places52.ttl')
-    place_rels = parser2.extract_relationships()
+    data = extract_files(QPMParser(), ['../Hierarchy_Full_with_names_and_places/Admin_Full_places52.ttl'], cache)[0]
+    place_rels = data['relationships'] if data else []
+    geometries += list(data['geometries']) if data else []
     place_geom_rels = [r for r in place_rels if 'GEOMETRY' in r['type']]
     
     print(f"Found {len(place_geom_rels)} geometry relationships from places file")
     
     all_geom_rels = geom_rels + place_geom_rels
-    print(f"Total: {len(all_geom_rels)} geometry relationships to create")
     
     # Connect to Neo4j
     driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
     
     try:
+        # After a --dedup-geometries import, point at the stored copy of each shape
+        dedup = GeometryDeduplicator()
+        if dedup.load_existing(driver):
+            dedup.dedup_geometries(geometries)
+            all_geom_rels = dedup.rewrite_relationships(all_geom_rels)
+            print(f"🧬 Database is deduplicated: {len(dedup.redirects):,} geometries redirected to stored shapes")
+        print(f"Total: {len(all_geom_rels)} geometry relationships to create")
+        
         with driver.session() as session:
             # Create HAS_MAIN_GEOMETRY relationships
             main_geom_rels = [r for r in all_geom_rels if r['type'] == 'HAS_MAIN_GEOMETRY']
             print(f"\n📍 Creating {len(main_geom_rels)} HAS_MAIN_GEOMETRY relationships...")
-            
-            query = """
-            UNWIND $batch AS rel
-            MATCH (entity) WHERE entity.spatial_unit_id = rel.from_id OR entity.place_id = rel.from_id
-            MATCH (g:Geometry) WHERE g.geometry_id = split(rel.to_uri, '/')[-1]
-            MERGE (entity)-[:HAS_MAIN_GEOMETRY]->(g)
-            """
-            
-            # Process in batches
-            batch_size = 1000
-            for i in range(0, len(main_geom_rels), batch_size):
-                batch = main_geom_rels[i:i+batch_size]
-                session.run(query, batch=batch)
-                print(f"  Processed {min(i+batch_size, len(main_geom_rels))}/{len(main_geom_rels)}")
+            merge_geometry_relationships(session, main_geom_rels, 'HAS_MAIN_GEOMETRY')
             
             # Create HAS_EXTRA_GEOMETRY relationships
             extra_geom_rels = [r for r in all_geom_rels if r['type'] == 'HAS_EXTRA_GEOMETRY']
             print(f"\n📍 Creating {len(extra_geom_rels)} HAS_EXTRA_GEOMETRY relationships...")
-            
-            query = """
-            UNWIND $batch AS rel
-            MATCH (entity) WHERE entity.spatial_unit_id = rel.from_id OR entity.place_id = rel.from_id
-            MATCH (g:Geometry) WHERE g.geometry_id = split(rel.to_uri, '/')[-1]
-            MERGE (entity)-[:HAS_EXTRA_GEOMETRY]->(g)
-            """
-            
-            for i in range(0, len(extra_geom_rels), batch_size):
-                batch = extra_geom_rels[i:i+batch_size]
-                session.run(query, batch=batch)
-                print(f"  Processed {min(i+batch_size, len(extra_geom_rels))}/{len(extra_geom_rels)}")
+            merge_geometry_relationships(session, extra_geom_rels, 'HAS_EXTRA_GEOMETRY')
             
             # Verify
             print("\n✅ Verifying...")
@@ -97,4 +108,9 @@ def add_geometry_relationships():
         driver.close()
 
 if __name__ == "__main__":
-    add_geometry_relationships()
+    arg_parser = argparse.ArgumentParser(description='Create missing geometry relationships')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='Always re-parse the TTL files instead of using the parse cache')
+    args = arg_parser.parse_args()
+
+    add_geometry_relationships(use_cache=not args.no_cache)
@@ -5,12 +5,27 @@ Only imports HAS_MAIN_GEOMETRY and HAS_EXTRA_GEOMETRY relationships
 """
 
 import os
+import argparse
 from dotenv import load_dotenv
 from ttl_parser import QPMParser
+from geometry_codec import GEOMETRY_ENCODINGS
+from geometry_dedup import GeometryDeduplicator
 from neo4j_importer import Neo4jImporter
+from parse_cache import cache_from_env, extract_files
 
 
 def main():
+    arg_parser = argparse.ArgumentParser(description='Add place geometries to Neo4j')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='Always re-parse the TTL file instead of using the parse cache')
+    arg_parser.add_argument('--geometry-encoding', choices=GEOMETRY_ENCODINGS, default='wkt',
+                            help='Also store each geometry as binary geometry_bin (default: wkt only)')
+    arg_parser.add_argument('--drop-wkt', action='store_true',
+                            help='With a binary --geometry-encoding: store only geometry_bin, not the WKT text')
+    arg_parser.add_argument('--spatial-cells', choices=['h3', 'h3+s2'], default=None,
+                            help='Derive H3 (and S2) cells and update the H3Cell lookup table')
+    args = arg_parser.parse_args()
+
     load_dotenv()
     
     print("="*60)
@@ -23,6 +38,9 @@ def main():
         os.getenv('NEO4J_USER', 'neo4j'),
         os.getenv('NEO4J_PASSWORD', 'password')
     )
+    importer.geometry_encoding = args.geometry_encoding
+    importer.keep_wkt = not args.drop_wkt
+    importer.spatial_cells = args.spatial_cells
     
     try:
         # Parse place geometry file
@@ -30,12 +48,20 @@ def main():
                                      '../QPM_Place_Graph_populated_Wales.ttl')
         
         print(f"\n📖 Parsing {place_geom_file}...")
-        parser = QPMParser()
-        parser.parse_file(place_geom_file)
+        data = extract_files(QPMParser(), [place_geom_file], cache_from_env(enabled=not args.no_cache))[0]
+        if data is None:
+            print(f"❌ File not found: {place_geom_file}")
+            return
         
         # Extract geometries
-        geometries = parser.extract_geometries()
+        geometries = data['geometries']
         print(f"✅ Found {len(geometries)} geometries")
+
+        # After a --dedup-geometries import, keep to the stored copy of each shape
+        dedup = GeometryDeduplicator()
+        if dedup.load_existing(importer.driver):
+            geometries = dedup.dedup_geometries(geometries, 'Places')
+            print(f"🧬 Database is deduplicated: {len(dedup.redirects):,} geometries redirected to stored shapes")
         
         # Import geometries
         if geometries:
@@ -43,7 +69,7 @@ def main():
             importer.import_geometries(geometries)
         
         # Extract ALL relationships
-        all_relationships = parser.extract_relationships()
+        all_relationships = data['relationships']
         print(f"✅ Found {len(all_relationships)} total relationships")
         
         # Filter to ONLY geometry relationships
@@ -51,12 +77,16 @@ def main():
             rel for rel in all_relationships 
             if rel['type'] in ('HAS_MAIN_GEOMETRY', 'HAS_EXTRA_GEOMETRY')
         ]
+        geom_relationships = dedup.rewrite_relationships(geom_relationships)
         print(f"✅ Filtered to {len(geom_relationships)} geometry relationships")
         
         # Import ONLY the geometry relationships
         if geom_relationships:
             print(f"\n🔗 Importing {len(geom_relationships)} geometry relationships...")
             importer.import_relationships(geom_relationships)
+            importer.create_place_locations()
+            if args.spatial_cells:
+                importer.create_cell_index()
         
         print("\n✅ Place geometries added successfully!")
         
@@ -0,0 +1,363 @@
+"""
+Offline Bulk Export for neo4j-admin
+Writes extracted QPM records as `neo4j-admin database import` node and
+relationship CSVs (typed headers, one ID space per node kind), for a first
+load into an empty database without going through Cypher
+"""
+
+import csv
+import gzip
+import os
+import shlex
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from geometry_codec import encode_geometry_records
+from neo4j_importer import INVERSE_RELATIONSHIPS
+from spatial_cells import H3_PROPERTIES, S2_PROPERTIES, add_cells
+from uri_codec import endpoint_kinds, geometry_id
+
+
+# Records converted per chunk (geometry encoding and cells run per chunk)
+CHUNK_SIZE = 10_000
+
+# Separator of array values (byte[] and string[] columns)
+ARRAY_DELIMITER = ';'
+
+# ID space and key property per node kind
+ID_SPACES = {
+    'hierarchy': ('Hierarchy', 'hierarchy_id'),
+    'unit': ('Unit', 'spatial_unit_id'),
+    'place': ('Place', 'place_id'),
+    'geometry': ('Geometry', 'geometry_id'),
+}
+
+# Stored properties and their neo4j-admin types per node kind, as written by Neo4jImporter._node_query()
+NODE_COLUMNS = {
+    'hierarchy': [('hierarchy_id', 'long'), ('hierarchy_name', 'string'), ('hierarchy_levels', 'int'),
+                  ('units_number', 'int')],
+    'unit': [('spatial_unit_id', 'long'), ('unit_name', 'string'), ('unit_type', 'string'),
+             ('unit_level', 'int'), ('unit_h3', 'string')],
+    'place': [('place_id', 'long'), ('place_name', 'string'), ('place_type', 'string'),
+              ('place_function', 'string'), ('place_key', 'string'), ('place_level', 'int'),
+              ('place_h3', 'string'), ('place_s2', 'string'), ('model_source', 'string'),
+              ('geometry_source', 'string')],
+    'geometry': [('geometry_id', 'string'), ('geometry_role', 'string'), ('geometry_type', 'string'),
+                 ('wkt', 'string'), ('wkt_lod0', 'string'), ('wkt_lod1', 'string'), ('wkt_lod2', 'string'),
+                 ('wkt_lod3', 'string'), ('latitude', 'double'), ('longitude', 'double'), ('area', 'double'),
+                 ('minx', 'double'), ('miny', 'double'), ('maxx', 'double'), ('maxy', 'double'),
+                 ('vertex_count', 'int'), ('shape_hash', 'string')],
+}
+
+# Native point properties of geometries: name -> (longitude field, latitude field)
+POINT_COLUMNS = {
+    'location': ('longitude', 'latitude'),
+    'location_sw': ('minx', 'miny'),
+    'location_ne': ('maxx', 'maxy'),
+}
+
+UNIT_LABELS = {'Admin': 'AdminUnit', 'Electoral': 'ElectoralUnit', 'Postal': 'PostalUnit'}
+
+
+def _header_name(name: str, kind: str) -> str:
+    """Header field for a property column (string is neo4j-admin's default type)."""
+    return name if kind == 'string' else f"{name}:{kind}"
+
+
+def _csv_value(value: Any, kind: str) -> Any:
+    """Cell text for a property value; None gives an empty field (property not set)."""
+    if value is None:
+        return None
+    if kind == 'byte[]':
+        return ARRAY_DELIMITER.join(str(b - 256 if b > 127 else b) for b in value)
+    if kind == 'string[]':
+        return ARRAY_DELIMITER.join(value)
+    return value
+
+
+class _CsvFile:
+    """One data file plus its header file, streamed to disk."""
+
+    def __init__(self, directory: str, name: str, header: List[str], compress: bool):
+        self.header_path = os.path.join(directory, f"{name}.header.csv")
+        self.path = os.path.join(directory, f"{name}.csv.gz" if compress else f"{name}.csv")
+        with open(self.header_path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(header)
+        self._file = (gzip.open(self.path, 'wt', newline='', encoding='utf-8', compresslevel=3) if compress
+                      else open(self.path, 'w', newline='', encoding='utf-8'))
+        self._writer = csv.writer(self._file)
+        self.rows = 0
+
+    def write(self, row: Sequence[Any]):
+        self._writer.writerow(row)
+        self.rows += 1
+
+    def close(self):
+        self._file.close()
+
+    def argument(self) -> str:
+        """Header and data file as one neo4j-admin --nodes/--relationships file group."""
+        return f"{os.path.abspath(self.header_path)},{os.path.abspath(self.path)}"
+
+
+class BulkExporter:
+    """
+    Streams hierarchies into neo4j-admin import files under one directory.
+
+    Node IDs are resolved per ID space (Unit, Place, Hierarchy, Geometry)
+    as rows are written, so relationship files reference them directly;
+    nodes seen twice are written once, and relationships whose endpoints
+    were never exported are counted and reported. Inverse relationships
+    (HAS_CHILD_UNIT, CHILD_OF_UNIT, BASE_PLACE_CHILD) are written
+    alongside the originals. close() writes import.sh with the
+    neo4j-admin command line.
+    """
+
+    def __init__(self, output_dir: str, compress: bool = False, geometry_encoding: str = 'wkt',
+                 keep_wkt: bool = True, spatial_cells: Optional[str] = None):
+        """
+        Args:
+            output_dir: Directory the CSVs and import.sh are written to (created if missing)
+            compress: Write gzip-compressed data files (.csv.gz)
+            geometry_encoding: Binary geometry_bin encoding: 'wkt' (none), 'wkb' or 'varint'
+            keep_wkt: Keep g.wkt next to geometry_bin
+            spatial_cells: Add centroid cells and h3_cover to geometries: None, 'h3' or 'h3+s2'
+        """
+        self.output_dir = output_dir
+        self.compress = compress
+        self.geometry_encoding = geometry_encoding
+        self.keep_wkt = keep_wkt
+        self.spatial_cells = spatial_cells
+        os.makedirs(os.path.join(output_dir, 'nodes'), exist_ok=True)
+        os.makedirs(os.path.join(output_dir, 'relationships'), exist_ok=True)
+
+        self.node_files: Dict[str, _CsvFile] = {}
+        self.relationship_files: Dict[Tuple[str, str, str], _CsvFile] = {}
+        self.node_ids: Dict[str, set] = {space: set() for space, _ in ID_SPACES.values()}
+        self.unresolved: set = set()  # (ID space, ID) referenced before (or without) its node
+        self.duplicates = 0
+        self.skipped = 0
+
+    def _geometry_columns(self) -> List[Tuple[str, str]]:
+        """Geometry property columns for the configured encoding and cells."""
+        columns = list(NODE_COLUMNS['geometry'])
+        if self.geometry_encoding != 'wkt':
+            columns += [('geometry_bin', 'byte[]'), ('geometry_encoding', 'string')]
+        if self.spatial_cells:
+            columns += [(name, 'string') for name in H3_PROPERTIES] + [('h3_cover', 'string[]')]
+            if 's2' in self.spatial_cells:
+                columns += [(name, 'string') for name in S2_PROPERTIES]
+        return columns
+
+    def _node_file(self, name: str, kind: str, columns: List[Tuple[str, str]]) -> _CsvFile:
+        if name not in self.node_files:
+            space = ID_SPACES[kind][0]
+            header = ([f":ID({space})"] + [_header_name(column, column_kind) for column, column_kind in columns]
+                      + [f"{point}:point{{crs:WGS-84}}" for point in POINT_COLUMNS if kind == 'geometry']
+                      + [":LABEL"])
+            self.node_files[name] = _CsvFile(os.path.join(self.output_dir, 'nodes'), name, header, self.compress)
+        return self.node_files[name]
+
+    def _relationship_file(self, rel_type: str, from_kind: str, to_kind: str) -> _CsvFile:
+        key = (rel_type, from_kind, to_kind)
+        if key not in self.relationship_files:
+            header = [f":START_ID({ID_SPACES[from_kind][0]})", f":END_ID({ID_SPACES[to_kind][0]})"]
+            self.relationship_files[key] = _CsvFile(os.path.join(self.output_dir, 'relationships'),
+                                                    f"{rel_type}_{from_kind}_{to_kind}", header, self.compress)
+        return self.relationship_files[key]
+
+    def _prepare_geometries(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add geometry_bin and cells to a chunk, per the exporter settings."""
+        batch = encode_geometry_records(batch, self.geometry_encoding, self.keep_wkt)
+        if self.spatial_cells:
+            batch = add_cells(batch, s2='s2' in self.spatial_cells)
+        return batch
+
+    def write_nodes(self, kind: str, records: Sequence[Dict[str, Any]], hierarchy_type: str = "Admin"):
+        """
+        Append node records of one kind.
+
+        Args:
+            kind: Record kind ('hierarchy', 'unit', 'place' or 'geometry')
+            records: Records (list of dicts or RecordStore)
+            hierarchy_type: Type of hierarchy, for the extra unit label
+        """
+        space, key = ID_SPACES[kind]
+        ids = self.node_ids[space]
+        if kind == 'geometry':
+            columns = self._geometry_columns()
+            csv_file = self._node_file('Geometry', kind, columns)
+        elif kind == 'unit':
+            columns = NODE_COLUMNS[kind]
+            csv_file = self._node_file(f"Unit_{hierarchy_type}", kind, columns)
+            labels = f"Unit{ARRAY_DELIMITER}{UNIT_LABELS.get(hierarchy_type, 'Unit')}"
+        else:
+            columns = NODE_COLUMNS[kind]
+            csv_file = self._node_file(space, kind, columns)
+            labels = space
+
+        for start in range(0, len(records), CHUNK_SIZE):
+            chunk = records[start:start + CHUNK_SIZE]
+            if kind == 'geometry':
+                chunk = self._prepare_geometries(chunk)
+            for record in chunk:
+                node_id = record.get(key)
+                if node_id is None:
+                    self.skipped += 1
+                    continue
+                node_id = str(node_id)
+                if node_id in ids:
+                    self.duplicates += 1
+                    continue
+                ids.add(node_id)
+
+                row = [node_id]
+                cells = record.get('cells') or {}
+                for column, column_kind in columns:
+                    row.append(_csv_value(record[column] if column in record else cells.get(column), column_kind))
+                if kind == 'geometry':
+                    for lon_field, lat_field in POINT_COLUMNS.values():
+                        lon, lat = record.get(lon_field), record.get(lat_field)
+                        row.append(f"{{longitude:{lon!r},latitude:{lat!r}}}"
+                                   if lon is not None and lat is not None else None)
+                    labels = (f"Geometry{ARRAY_DELIMITER}"
+                              f"{'PointGeometry' if record.get('geometry_type') == 'POINT' else 'PolygonGeometry'}")
+                row.append(labels)
+                csv_file.write(row)
+
+    def _endpoint_id(self, rel: Dict[str, Any], end: str, kind: str) -> Optional[str]:
+        """ID of a relationship endpoint within its kind's ID space."""
+        if kind == 'geometry':
+            return geometry_id(rel[f'{end}_uri'])
+        value = rel.get(f'{end}_id')
+        return None if value is None else str(value)
+
+    def write_relationships(self, relationships: Sequence[Dict[str, Any]]):
+        """Append relationship records (and their inverses), one file per type and endpoint kinds."""
+        for rel in relationships:
+            rel_type = rel['type']
+            from_kind, to_kind = rel.get('from_kind'), rel.get('to_kind')
+            if from_kind is None or to_kind is None:
+                from_kind, to_kind = endpoint_kinds(rel_type, rel['from_uri'], rel['to_uri'])
+            if from_kind not in ID_SPACES or to_kind not in ID_SPACES:
+                self.skipped += 1
+                continue
+            from_id = self._endpoint_id(rel, 'from', from_kind)
+            to_id = self._endpoint_id(rel, 'to', to_kind)
+            if from_id is None or to_id is None:
+                self.skipped += 1
+                continue
+
+            for kind, node_id in ((from_kind, from_id), (to_kind, to_id)):
+                space = ID_SPACES[kind][0]
+                if node_id not in self.node_ids[space]:
+                    self.unresolved.add((space, node_id))
+
+            self._relationship_file(rel_type, from_kind, to_kind).write((from_id, to_id))
+            if rel_type in INVERSE_RELATIONSHIPS:
+                self._relationship_file(INVERSE_RELATIONSHIPS[rel_type], to_kind, from_kind).write((to_id, from_id))
+
+    def add_hierarchy(self, data: Dict[str, Sequence[Dict[str, Any]]], hierarchy_type: str):
+        """
+        Append one hierarchy's extracted records.
+
+        Args:
+            data: Records by entity type ('hierarchies', 'units', 'places', 'geometries', 'relationships')
+            hierarchy_type: Type of hierarchy (Admin, Electoral, Postal)
+        """
+        print(f"📤 Exporting {hierarchy_type}: {len(data['units']):,} units, {len(data['places']):,} places, "
+              f"{len(data['geometries']):,} geometries, {len(data['relationships']):,} relationships")
+        self.write_nodes('hierarchy', data['hierarchies'])
+        self.write_nodes('unit', data['units'], hierarchy_type)
+        self.write_nodes('place', data['places'])
+        self.write_nodes('geometry', data['geometries'])
+        self.write_relationships(data['relationships'])
+
+    def dangling(self) -> int:
+        """Relationship endpoints referenced but never exported as nodes."""
+        return sum(1 for space, node_id in self.unresolved if node_id not in self.node_ids[space])
+
+    def import_command(self, database: str = 'neo4j') -> str:
+        """neo4j-admin command line importing the exported files (database name inserted as given)."""
+        args = ['--overwrite-destination', f'--array-delimiter={ARRAY_DELIMITER}']
+        if self.dangling():
+            args.append('--skip-bad-relationships=true')
+        args += [f"--nodes={csv_file.argument()}" for csv_file in self.node_files.values()]
+        args += [f"--relationships={rel_type}={csv_file.argument()}"
+                 for (rel_type, _, _), csv_file in self.relationship_files.items()]
+        return ' \\\n    '.join([f"neo4j-admin database import full {database}"] + [shlex.quote(arg) for arg in args])
+
+    def close(self) -> Dict[str, int]:
+        """
+        Finish every file, write import.sh and print a summary.
+
+        Returns:
+            Rows written per file name
+        """
+        for csv_file in list(self.node_files.values()) + list(self.relationship_files.values()):
+            csv_file.close()
+
+        script_path = os.path.join(self.output_dir, 'import.sh')
+        with open(script_path, 'w', encoding='utf-8') as f:
+            f.write("#!/bin/sh\n# Run with the target database stopped; it is overwritten\n")
+            f.write(self.import_command('"${1:-neo4j}"') + "\n")
+        os.chmod(script_path, 0o755)
+
+        counts = {}
+        print(f"\n📦 Bulk export written to {self.output_dir}:")
+        for csv_file in list(self.node_files.values()) + list(self.relationship_files.values()):
+            name = os.path.basename(csv_file.path)
+            counts[name] = csv_file.rows
+            print(f"  {name:<48} {csv_file.rows:>12,} rows {os.path.getsize(csv_file.path) / 1024 ** 2:>9.2f} MB")
+        if self.duplicates:
+            print(f"ℹ️  {self.duplicates:,} nodes seen more than once were written once")
+        if self.skipped:
+            print(f"⚠️  {self.skipped:,} records without a resolvable ID were skipped")
+        dangling = self.dangling()
+        if dangling:
+            print(f"⚠️  {dangling:,} relationship endpoints have no exported node; "
+                  f"import.sh skips those relationships")
+        print(f"▶️  Import with: {script_path} [database]")
+        return counts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description='Export QPM TTL files as neo4j-admin import CSVs')
+    parser.add_argument('ttl_files', nargs='*', help='Hierarchy, places and place geometry TTL files')
+    parser.add_argument('--output', default='bulk_export', help='Output directory (default: bulk_export)')
+    parser.add_argument('--hierarchy-type', default='Admin', choices=sorted(UNIT_LABELS),
+                        help='Unit label for the exported units (default: Admin)')
+    parser.add_argument('--compress', action='store_true', help='Write gzip-compressed data files')
+    parser.add_argument('--post-import', action='store_true',
+                        help='After neo4j-admin import: create constraints and indexes, place locations '
+                             'and (with --spatial-cells) the H3 cell table in NEO4J_URI')
+    parser.add_argument('--spatial-cells', choices=['h3', 'h3+s2'], default=None)
+    args = parser.parse_args()
+
+    if args.post_import:
+        from neo4j_importer import Neo4jImporter
+
+        load_dotenv()
+        with Neo4jImporter(os.getenv('NEO4J_URI', 'bolt://localhost:7687'), os.getenv('NEO4J_USER', 'neo4j'),
+                           os.getenv('NEO4J_PASSWORD', 'password')) as importer:
+            importer.create_constraints_and_indexes()
+            importer.create_place_locations()
+            if args.spatial_cells:
+                importer.create_cell_index()
+    elif args.ttl_files:
+        from ttl_parser import QPMParser
+        from parse_cache import extract_files
+
+        missing = [path for path in args.ttl_files if not os.path.exists(path)]
+        if missing:
+            parser.error(f"TTL file(s) not found: {', '.join(missing)}")
+
+        exporter = BulkExporter(args.output, args.compress, spatial_cells=args.spatial_cells)
+        for data in extract_files(QPMParser(), args.ttl_files):
+            exporter.add_hierarchy(data, args.hierarchy_type)
+        exporter.close()
+    else:
+        parser.print_help()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Uniqueness Checker for QPD/QPM Turtle Files
+Streams TTL files and reports duplicate subjects, duplicate edges and
+conflicting values of owl:FunctionalProperty predicates in a single pass
+"""
+
+import argparse
+import glob
+import hashlib
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set
+
+from rdflib import Graph, OWL, RDF
+
+from ttl_stream import TurtleSyntaxError, iter_subject_blocks
+
+
+# Examples kept per issue type in a report
+MAX_EXAMPLES = 10
+
+
+def load_functional_properties(ontology_file: str) -> Set[str]:
+    """
+    Read the predicates declared owl:FunctionalProperty from the ontology.
+
+    The ontology uses RDF collections, so it is parsed with rdflib rather
+    than the streaming reader; it is small.
+
+    Args:
+        ontology_file: Path to QPM_Ontology.ttl
+
+    Returns:
+        Set of predicate URIs
+    """
+    graph = Graph()
+    graph.parse(ontology_file, format='turtle')
+    return {str(prop) for prop in graph.subjects(RDF.type, OWL.FunctionalProperty)}
+
+
+def fingerprint(*parts: str) -> int:
+    """64-bit fingerprint of a tuple of strings."""
+    digest = hashlib.blake2b('\x00'.join(parts).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class FingerprintSet:
+    """Exact membership of 64-bit fingerprints (memory grows with the number of keys)."""
+
+    def __init__(self):
+        self._seen = set()
+
+    def add(self, *parts: str) -> bool:
+        """Add a key; returns True if it was already present."""
+        key = fingerprint(*parts)
+        if key in self._seen:
+            return True
+        self._seen.add(key)
+        return False
+
+    def contains(self, *parts: str) -> bool:
+        return fingerprint(*parts) in self._seen
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self._seen) + 32 * len(self._seen)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter.
+
+    Memory is set up front from the expected number of keys and the target
+    false-positive rate. A key that was never added is reported as present
+    with probability about error_rate, so hits are "possible" duplicates.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Initialize the filter.
+
+        Args:
+            capacity: Expected number of keys
+            error_rate: Target false-positive rate at capacity
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, parts):
+        digest = hashlib.blake2b('\x00'.join(parts).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        # Double hashing: k positions from two 64-bit hashes
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, *parts: str) -> bool:
+        """Add a key; returns True if it was (probably) already present."""
+        present = True
+        for pos in self._positions(parts):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                present = False
+                self._bits[byte] |= 1 << bit
+        return present
+
+    def contains(self, *parts: str) -> bool:
+        for pos in self._positions(parts):
+            byte, bit = divmod(pos, 8)
+            if not self._bits[byte] & (1 << bit):
+                return False
+        return True
+
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+def _new_seen_set(bloom_capacity: Optional[int], error_rate: float):
+    if bloom_capacity:
+        return BloomFilter(bloom_capacity, error_rate)
+    return FingerprintSet()
+
+
+def check_file(file_path: str, functional: Set[str], bloom_capacity: Optional[int] = None,
+               error_rate: float = 0.001) -> Dict[str, Any]:
+    """
+    Check one TTL file in a single streaming pass.
+
+    A subject is duplicated when it starts more than one statement block.
+    An edge is duplicated when the same (subject, predicate, object) triple
+    occurs twice. A functional property conflicts when a subject already has
+    a different value for it: its (subject, predicate) pair was seen but
+    this exact triple was not.
+
+    Args:
+        file_path: TTL file to check
+        functional: Predicate URIs declared owl:FunctionalProperty
+        bloom_capacity: Use Bloom filters sized for this many keys instead of
+            exact fingerprint sets (bounded memory, "possible" duplicates)
+        error_rate: Bloom filter false-positive rate
+
+    Returns:
+        Report with counts, examples and memory used by the seen-sets
+    """
+    start_time = time.time()
+    subjects = _new_seen_set(bloom_capacity, error_rate)
+    triples = _new_seen_set(bloom_capacity, error_rate)
+    functional_pairs = _new_seen_set(bloom_capacity, error_rate)
+
+    report = {
+        'file': file_path,
+        'mode': 'bloom' if bloom_capacity else 'exact',
+        'blocks': 0,
+        'triples': 0,
+        'duplicate_subjects': 0,
+        'duplicate_edges': 0,
+        'functional_conflicts': 0,
+        'examples': {'duplicate_subjects': [], 'duplicate_edges': [], 'functional_conflicts': []},
+        'error': None,
+    }
+
+    def note(issue: str, example: str):
+        report[issue] += 1
+        if len(report['examples'][issue]) < MAX_EXAMPLES:
+            report['examples'][issue].append(example)
+
+    try:
+        for subject, pairs in iter_subject_blocks(file_path):
+            report['blocks'] += 1
+            s = str(subject)
+            if subjects.add(s):
+                note('duplicate_subjects', s)
+
+            for predicate, obj in pairs:
+                report['triples'] += 1
+                p = str(predicate)
+                o = obj.n3()
+
+                if triples.add(s, p, o):
+                    note('duplicate_edges', f"{s} {p} {o}")
+                elif p in functional and functional_pairs.add(s, p):
+                    note('functional_conflicts', f"{s} {p} {o}")
+    except (TurtleSyntaxError, OSError) as e:
+        report['error'] = str(e)
+
+    report['memory_bytes'] = subjects.nbytes() + triples.nbytes() + functional_pairs.nbytes()
+    report['seconds'] = time.time() - start_time
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> bool:
+    """
+    Print one file's report.
+
+    Returns:
+        True if the file is clean
+    """
+    name = os.path.basename(report['file'])
+    print(f"\n📄 {name} ({report['mode']}, {report['seconds']:.2f}s, "
+          f"{report['memory_bytes'] / 1024 ** 2:.1f} MB of fingerprints)")
+
+    if report['error']:
+        print(f"  ❌ Could not read file: {report['error']}")
+        return False
+
+    print(f"  Blocks: {report['blocks']:,}  Triples: {report['triples']:,}")
+    prefix = "possible " if report['mode'] == 'bloom' else ""
+    clean = True
+    for issue, label in (('duplicate_subjects', 'duplicate subjects'),
+                         ('duplicate_edges', 'duplicate edges'),
+                         ('functional_conflicts', 'functional property conflicts')):
+        count = report[issue]
+        if count:
+            clean = False
+            print(f"  ⚠️  {count:,} {prefix}{label}")
+            for example in report['examples'][issue]:
+                print(f"      {example}")
+
+    if clean:
+        print("  ✅ No duplicates or conflicts")
+    return clean
+
+
+def check_files(file_paths: List[str], functional: Set[str], jobs: int = 1,
+                bloom_capacity: Optional[int] = None, error_rate: float = 0.001) -> List[Dict[str, Any]]:
+    """
+    Check several files, each in its own worker process when jobs > 1.
+
+    Files are checked independently; duplicates across files are not reported.
+
+    Returns:
+        Reports in the order of file_paths
+    """
+    if jobs <= 1 or len(file_paths) <= 1:
+        return [check_file(path, functional, bloom_capacity, error_rate) for path in file_paths]
+
+    reports = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {
+            executor.submit(check_file, path, functional, bloom_capacity, error_rate): path
+            for path in file_paths
+        }
+        for future in as_completed(futures):
+            reports[futures[future]] = future.result()
+            print(f"✔️  Checked {futures[future]}")
+    return [reports[path] for path in file_paths]
+
+
+def main():
+    default_dir = os.path.join('..', 'Hierarchy_Only_QPD_For_uniqueness_check')
+
+    arg_parser = argparse.ArgumentParser(
+        description='Find duplicate subjects, duplicate edges and functional property conflicts in TTL files'
+    )
+    arg_parser.add_argument('files', nargs='*',
+                            help=f'TTL files to check (default: {default_dir}/*.ttl)')
+    arg_parser.add_argument('--ontology', default=os.getenv('QPM_ONTOLOGY_FILE', '../QPM_Ontology.ttl'),
+                            help='Ontology declaring the owl:FunctionalProperty predicates')
+    arg_parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                            help='Number of files to check in parallel (default: CPU count)')
+    arg_parser.add_argument('--bloom', type=int, metavar='CAPACITY', default=None,
+                            help='Use Bloom filters sized for CAPACITY keys per file instead of exact fingerprints')
+    arg_parser.add_argument('--error-rate', type=float, default=0.001,
+                            help='Bloom filter false-positive rate (default: 0.001)')
+    args = arg_parser.parse_args()
+
+    file_paths = args.files or sorted(glob.glob(os.path.join(default_dir, '*.ttl')))
+    if not file_paths:
+        print("❌ No TTL files to check")
+        sys.exit(2)
+
+    print("="*60)
+    print("🔍 QPD Uniqueness Check")
+    print("="*60)
+
+    functional = load_functional_properties(args.ontology)
+    print(f"📐 Functional properties: {', '.join(sorted(p.rsplit('#', 1)[-1] for p in functional))}")
+
+    reports = check_files(file_paths, functional, args.jobs, args.bloom, args.error_rate)
+    clean = all([print_report(report) for report in reports])
+
+    print("\n" + ("✅ All files clean" if clean else "⚠️  Issues found"))
+    sys.exit(0 if clean else 1)
+
+
+if __name__ == "__main__":
+    main()
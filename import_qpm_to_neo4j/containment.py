@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Point-in-Polygon Containment of Places in Units
+Derives CONTAINED_BY_UNIT relationships from place points and unit polygons:
+candidates come from an STR tree over the unit bounding boxes and are
+confirmed by NumPy ray casting over every edge of the candidate rings
+"""
+
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from spatial_index import STRTree
+from uri_codec import decode_uri, geometry_id
+from wkt_parser import GEOMETRY_TYPE_CODES, batch_metrics, decode_wkt_batch
+
+
+# Points per task sent to a worker process
+CHUNK_SIZE = 5000
+
+# Upper bound on (point, edge) tests evaluated in one NumPy pass
+MAX_EDGE_TESTS = 2_000_000
+
+
+class ContainmentEngine:
+    """
+    Unit polygons prepared for bulk point-in-polygon tests.
+
+    Every ring of every unit is flattened into one edge array; the edges
+    of unit u are rows edge_offsets[u]:edge_offsets[u + 1]. A point is
+    inside a unit when a ray cast east from it crosses an odd number of
+    the unit's edges (even-odd rule), which handles holes and
+    multipolygons without looking at ring roles.
+    """
+
+    def __init__(self, units: Sequence[Dict[str, Any]], wkts: Sequence[Optional[str]]):
+        """
+        Args:
+            units: Unit records (spatial_unit_id, uri, unit_level, ...)
+            wkts: Main geometry WKT of each unit; units without a polygon never match
+        """
+        self.units = list(units)
+        batch = decode_wkt_batch(list(wkts))
+        metrics = batch_metrics(batch)
+
+        coords = batch['coords']
+        ring_offsets = batch['ring_offsets']
+        # Vertex range of each unit; points and undecodable strings contribute no edges
+        vertex_offsets = ring_offsets[batch['polygon_offsets'][batch['geometry_offsets']]]
+        polygonal = batch['geometry_type'] != GEOMETRY_TYPE_CODES['POINT']
+
+        # Edge i runs from vertex i to the next vertex of its ring (wrapping, in
+        # case a ring is not closed); horizontal edges can never be crossed
+        following = np.arange(1, len(coords) + 1)
+        following[ring_offsets[1:] - 1] = ring_offsets[:-1]
+        keep = np.repeat(polygonal, np.diff(vertex_offsets))
+        keep &= coords[:, 1] != coords[following, 1]
+        self.x1, self.y1 = coords[keep, 0], coords[keep, 1]
+        self.x2, self.y2 = coords[following[keep], 0], coords[following[keep], 1]
+
+        kept = np.zeros(len(coords) + 1, dtype=np.int64)
+        np.cumsum(keep, out=kept[1:])
+        self.edge_offsets = kept[vertex_offsets]
+
+        has_edges = np.diff(self.edge_offsets) > 0
+        self.tree_units = np.flatnonzero(has_edges)
+        bounds = np.column_stack([metrics[key] for key in ('minx', 'miny', 'maxx', 'maxy')])
+        self.tree = STRTree.build(bounds[self.tree_units])
+
+    @classmethod
+    def from_data(cls, data: Dict[str, List], levels: Optional[Sequence[int]] = None) -> 'ContainmentEngine':
+        """
+        Engine over the units of extracted data, using each unit's main geometry.
+
+        Args:
+            data: Extracted data with 'units', 'geometries' and 'relationships'
+            levels: Only use units of these unit_level values (default: every level)
+        """
+        units = [unit for unit in data['units'] if levels is None or unit.get('unit_level') in levels]
+        wkts = main_geometry_wkts(data, 'unit', [unit['uri'] for unit in units])
+        return cls(units, wkts)
+
+    def __len__(self) -> int:
+        return len(self.units)
+
+    def candidates(self, lons: np.ndarray, lats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(point, unit) index pairs where the unit's bounding box contains the point."""
+        point_parts, unit_parts = [], []
+        for i, (lon, lat) in enumerate(zip(lons.tolist(), lats.tolist())):
+            hits = self.tree.query_point(lon, lat)
+            if len(hits):
+                point_parts.append(np.full(len(hits), i, dtype=np.int64))
+                unit_parts.append(self.tree_units[hits])
+        if not point_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(point_parts), np.concatenate(unit_parts)
+
+    def _inside(self, px: np.ndarray, py: np.ndarray, units: np.ndarray) -> np.ndarray:
+        """Even-odd test of each point against the unit paired with it."""
+        starts = self.edge_offsets[units]
+        counts = self.edge_offsets[units + 1] - starts
+        pair = np.repeat(np.arange(len(units)), counts)
+        pair_starts = np.zeros(len(units), dtype=np.int64)
+        np.cumsum(counts[:-1], out=pair_starts[1:])
+        edges = np.arange(len(pair)) - np.repeat(pair_starts - starts, counts)
+
+        x, y = px[pair], py[pair]
+        y1, y2 = self.y1[edges], self.y2[edges]
+        straddles = (y1 > y) != (y2 > y)
+        x1 = self.x1[edges]
+        crossing_x = x1 + (y - y1) * (self.x2[edges] - x1) / (y2 - y1)
+        crossings = np.bincount(pair, weights=straddles & (x < crossing_x), minlength=len(units))
+        return crossings % 2 == 1
+
+    def contains(self, lons: Sequence[float], lats: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All (point, unit) pairs where the unit polygon contains the point.
+
+        Args:
+            lons, lats: Point coordinates in degrees
+
+        Returns:
+            Tuple of (point indices, unit indices into self.units)
+        """
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        points, units = self.candidates(lons, lats)
+
+        # Evaluate in slices of pairs so the edge arrays stay bounded
+        tests = np.cumsum(self.edge_offsets[units + 1] - self.edge_offsets[units])
+        inside = np.zeros(len(points), dtype=bool)
+        start = 0
+        while start < len(points):
+            done = tests[start - 1] if start else 0
+            stop = max(start + 1, int(np.searchsorted(tests, done + MAX_EDGE_TESTS, side='right')))
+            inside[start:stop] = self._inside(lons[points[start:stop]], lats[points[start:stop]], units[start:stop])
+            start = stop
+        return points[inside], units[inside]
+
+
+# Engine of each worker process, set once by the pool initializer
+_worker_engine: Optional[ContainmentEngine] = None
+
+
+def _init_worker(engine: ContainmentEngine):
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _contains_chunk(offset: int, lons: np.ndarray, lats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Process pool task: test one chunk of points."""
+    points, units = _worker_engine.contains(lons, lats)
+    return points + offset, units
+
+
+def locate_points(engine: ContainmentEngine, lons: Sequence[float], lats: Sequence[float],
+                  jobs: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Containment pairs for many points, split over worker processes when jobs > 1.
+
+    Returns:
+        Tuple of (point indices, unit indices), as ContainmentEngine.contains()
+    """
+    lons = np.asarray(lons, dtype=np.float64)
+    lats = np.asarray(lats, dtype=np.float64)
+    if jobs <= 1 or len(lons) <= CHUNK_SIZE:
+        return engine.contains(lons, lats)
+
+    offsets = range(0, len(lons), CHUNK_SIZE)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(engine,)) as executor:
+        results = list(executor.map(_contains_chunk, offsets,
+                                    [lons[i:i + CHUNK_SIZE] for i in offsets],
+                                    [lats[i:i + CHUNK_SIZE] for i in offsets]))
+    return (np.concatenate([points for points, _ in results]),
+            np.concatenate([units for _, units in results]))
+
+
+def main_geometry_wkts(data: Dict[str, List], kind: str, uris: Sequence[str]) -> List[Optional[str]]:
+    """WKT of the main geometry of each place or unit URI (None when it has none)."""
+    by_id = {record['geometry_id']: record for record in data['geometries']}
+    main = {}
+    for rel in data['relationships']:
+        if rel['type'] == 'HAS_MAIN_GEOMETRY' and decode_uri(rel['from_uri'])[0] == kind:
+            main[rel['from_uri']] = by_id.get(geometry_id(rel['to_uri']))
+    return [(main.get(uri) or {}).get('wkt') for uri in uris]
+
+
+def main_geometry_points(data: Dict[str, List], kind: str = 'place') -> List[Dict[str, Any]]:
+    """
+    Places (or units) with the centroid of their main geometry as longitude/latitude.
+
+    Args:
+        data: Extracted data with 'places'/'units', 'geometries' and 'relationships'
+        kind: 'place' or 'unit'
+
+    Returns:
+        List of record dicts (copies); records without a located main geometry are left out
+    """
+    by_id = {record['geometry_id']: record for record in data['geometries']}
+    entities = {record['uri']: record for record in data['places' if kind == 'place' else 'units']}
+    points = []
+    for rel in data['relationships']:
+        if rel['type'] != 'HAS_MAIN_GEOMETRY' or rel['from_uri'] not in entities:
+            continue
+        geometry = by_id.get(geometry_id(rel['to_uri']))
+        if geometry and geometry.get('longitude') is not None:
+            point = dict(entities[rel['from_uri']])
+            point['longitude'], point['latitude'] = geometry['longitude'], geometry['latitude']
+            points.append(point)
+    return points
+
+
+def place_points(data: Dict[str, List]) -> List[Dict[str, Any]]:
+    """Places with the centroid of their main geometry as longitude/latitude."""
+    return main_geometry_points(data, 'place')
+
+
+def load_points_csv(file_path: str, name_column: str = 'place') -> List[Dict[str, Any]]:
+    """
+    Points from a CSV with latitude/longitude columns (e.g. landmarks_converted.csv).
+
+    Returns:
+        List of dicts with 'place_name', 'longitude', 'latitude' and the raw row
+    """
+    points = []
+    with open(file_path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            try:
+                lon, lat = float(row['longitude']), float(row['latitude'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            points.append({'place_name': row.get(name_column), 'longitude': lon, 'latitude': lat, 'row': row})
+    return points
+
+
+def derive_containment(points: Sequence[Dict[str, Any]], engine: ContainmentEngine,
+                       jobs: int = 1) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    (point, unit) record pairs for every unit of every level containing a point.
+
+    Args:
+        points: Records with longitude/latitude (place_points() or load_points_csv())
+        engine: ContainmentEngine over the units
+        jobs: Number of worker processes
+
+    Returns:
+        List of (point record, unit record) tuples, ordered by point
+    """
+    point_index, unit_index = locate_points(
+        engine, [p['longitude'] for p in points], [p['latitude'] for p in points], jobs)
+    order = np.lexsort((unit_index, point_index))
+    return [(points[p], engine.units[u]) for p, u in zip(point_index[order].tolist(), unit_index[order].tolist())]
+
+
+def containment_relationships(pairs: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    CONTAINED_BY_UNIT relationship dicts for Neo4jImporter.import_relationships().
+
+    Points without a place_id (e.g. CSV landmarks) are skipped.
+    """
+    return [
+        {
+            'from_uri': place.get('uri'),
+            'to_uri': unit['uri'],
+            'type': 'CONTAINED_BY_UNIT',
+            'from_id': place['place_id'],
+            'to_id': unit['spatial_unit_id'],
+            'from_kind': 'place',
+            'to_kind': 'unit',
+        }
+        for place, unit in pairs
+        if place.get('place_id') is not None
+    ]
+
+
+def write_containment_csv(pairs: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]], file_path: str):
+    """Write place,contained_by_unit,unit_name,unit_level rows (one per pair)."""
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['place', 'contained_by_unit', 'unit_name', 'unit_level'])
+        for place, unit in pairs:
+            writer.writerow([place.get('place_name'), unit['spatial_unit_id'],
+                             unit.get('unit_name'), unit.get('unit_level')])
+
+
+def print_containment_report(pairs: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]], point_count: int):
+    """Print matched points and containment counts per unit level."""
+    per_level: Dict[Any, int] = {}
+    for _, unit in pairs:
+        per_level[unit.get('unit_level')] = per_level.get(unit.get('unit_level'), 0) + 1
+    located = len({id(place) for place, _ in pairs})
+    print(f"\n📦 {located:,} of {point_count:,} points fall inside a unit ({len(pairs):,} containments)")
+    for level in sorted(per_level, key=lambda value: (value is None, value)):
+        print(f"  Level {level}: {per_level[level]:,}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    from dotenv import load_dotenv
+
+    from neo4j_importer import Neo4jImporter
+    from parse_cache import cache_from_env, extract_files
+    from ttl_parser import QPMParser
+
+    arg_parser = argparse.ArgumentParser(description='Derive CONTAINED_BY_UNIT from place points and unit polygons')
+    arg_parser.add_argument('ttl_files', nargs='+', help='Hierarchy file, then places files')
+    arg_parser.add_argument('--landmarks', help='CSV of extra points with latitude/longitude columns '
+                                                '(e.g. landmarks_converted.csv)')
+    arg_parser.add_argument('--output', help='Write the containments of the CSV points to this file')
+    arg_parser.add_argument('--levels', type=int, nargs='+', help='Only test units of these levels')
+    arg_parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (default: CPU count)')
+    arg_parser.add_argument('--check', action='store_true',
+                            help='Compare with the CONTAINED_BY_UNIT edges in the files')
+    arg_parser.add_argument('--import', dest='do_import', action='store_true',
+                            help='MERGE the derived relationships into Neo4j')
+    arg_parser.add_argument('--no-cache', action='store_true', help='Disable the parse cache')
+    args = arg_parser.parse_args()
+
+    extracted = [d for d in extract_files(QPMParser(), args.ttl_files, cache_from_env(not args.no_cache)) if d]
+    data = {key: [record for d in extracted for record in d[key]]
+            for key in ('units', 'places', 'geometries', 'relationships')}
+
+    start_time = time.time()
+    engine = ContainmentEngine.from_data(data, args.levels)
+    print(f"🧭 Prepared {len(engine):,} units ({len(engine.x1):,} edges) in {time.time() - start_time:.2f}s")
+
+    places = place_points(data)
+    start_time = time.time()
+    pairs = derive_containment(places, engine, args.jobs)
+    elapsed = time.time() - start_time
+    print_containment_report(pairs, len(places))
+    print(f"⏱️  Located {len(places):,} places in {elapsed:.2f}s with {args.jobs} worker processes")
+
+    relationships = containment_relationships(pairs)
+    if args.check:
+        upstream = {(r['from_id'], r['to_id']) for r in data['relationships'] if r['type'] == 'CONTAINED_BY_UNIT'}
+        derived = {(r['from_id'], r['to_id']) for r in relationships}
+        print(f"\n🔍 Upstream CONTAINED_BY_UNIT: {len(upstream):,}; derived: {len(derived):,}; "
+              f"in both: {len(upstream & derived):,}")
+
+    if args.landmarks:
+        landmarks = load_points_csv(args.landmarks)
+        landmark_pairs = derive_containment(landmarks, engine, args.jobs)
+        print_containment_report(landmark_pairs, len(landmarks))
+        if args.output:
+            write_containment_csv(landmark_pairs, args.output)
+            print(f"💾 Wrote {len(landmark_pairs):,} rows to {args.output}")
+
+    if args.do_import:
+        load_dotenv()
+        with Neo4jImporter(os.getenv('NEO4J_URI', 'bolt://localhost:7687'),
+                           os.getenv('NEO4J_USER', 'neo4j'),
+                           os.getenv('NEO4J_PASSWORD', 'password')) as importer:
+            importer.import_relationships(relationships, merge=True)
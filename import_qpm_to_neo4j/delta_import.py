@@ -0,0 +1,275 @@
+"""
+Delta Import for Re-Published QPM Snapshots
+Diffs a new TTL snapshot against the fingerprint manifest of the last import
+and applies only the added, changed and removed records to Neo4j
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from neo4j_importer import Neo4jImporter
+from ttl_parser import PARSER_VERSION
+from uri_codec import geometry_id
+
+
+MANIFEST_VERSION = 1
+
+# Node tables: extracted data key -> (Neo4j label, unique key property)
+NODE_TABLES = {
+    'hierarchies': ('Hierarchy', 'hierarchy_id'),
+    'units': ('Unit', 'spatial_unit_id'),
+    'places': ('Place', 'place_id'),
+    'geometries': ('Geometry', 'geometry_id'),
+}
+
+# Relationships whose target is a Geometry node
+GEOMETRY_RELATIONSHIPS = ('HAS_MAIN_GEOMETRY', 'HAS_EXTRA_GEOMETRY')
+
+
+def record_fingerprint(record: Dict[str, Any]) -> str:
+    """Stable 64-bit content hash of a record, as hex."""
+    payload = json.dumps(record, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def edge_key(rel: Dict[str, Any]) -> str:
+    """Identity of a relationship: type plus both endpoint URIs."""
+    return f"{rel['type']}|{rel['from_uri']}|{rel['to_uri']}"
+
+
+def build_manifest(data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Fingerprint an extracted snapshot.
+
+    Args:
+        data: Extracted data (hierarchies, units, places, geometries, relationships)
+
+    Returns:
+        Manifest with a key -> fingerprint map per node table and an
+        edge key -> [from_id, to_id] map for relationships
+    """
+    manifest = {
+        'manifest_version': MANIFEST_VERSION,
+        'parser_version': PARSER_VERSION,
+        'nodes': {},
+        'edges': {edge_key(rel): [rel['from_id'], rel['to_id']] for rel in data.get('relationships', [])},
+    }
+
+    for table, (_, id_property) in NODE_TABLES.items():
+        manifest['nodes'][table] = {
+            str(record[id_property]): record_fingerprint(record)
+            for record in data.get(table, [])
+            if record.get(id_property) is not None
+        }
+
+    return manifest
+
+
+def _edge_from_key(key: str, from_id: Any, to_id: Any) -> Dict[str, Any]:
+    """Rebuild a relationship dictionary from its manifest entry."""
+    rel_type, from_uri, to_uri = key.split('|', 2)
+    return {
+        'type': rel_type,
+        'from_uri': from_uri,
+        'to_uri': to_uri,
+        'from_id': from_id,
+        'to_id': to_id,
+    }
+
+
+def compute_delta(previous: Optional[Dict[str, Any]], data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Compute what changed between the last imported snapshot and a new one.
+
+    Args:
+        previous: Manifest of the last import, or None for a first delta run
+        data: Extracted data of the new snapshot
+
+    Returns:
+        Dictionary with 'upsert' (added and changed records per table),
+        'removed' (key values per table), 'added_edges', 'removed_edges',
+        per-table 'counts' and the new 'manifest'
+    """
+    manifest = build_manifest(data)
+    old_nodes = previous['nodes'] if previous else {}
+    old_edges = previous['edges'] if previous else {}
+
+    delta = {'upsert': {}, 'removed': {}, 'counts': {}, 'manifest': manifest}
+
+    for table, (_, id_property) in NODE_TABLES.items():
+        old = old_nodes.get(table, {})
+        new = manifest['nodes'][table]
+
+        added = [key for key in new if key not in old]
+        changed = [key for key in new if key in old and old[key] != new[key]]
+        removed = [key for key in old if key not in new]
+        upsert_keys = set(added) | set(changed)
+
+        delta['upsert'][table] = [
+            record for record in data.get(table, [])
+            if str(record.get(id_property)) in upsert_keys
+        ]
+        delta['removed'][table] = removed
+        delta['counts'][table] = {'added': len(added), 'changed': len(changed), 'removed': len(removed)}
+
+    new_edges = manifest['edges']
+    delta['added_edges'] = [rel for rel in data.get('relationships', []) if edge_key(rel) not in old_edges]
+    delta['removed_edges'] = [
+        _edge_from_key(key, from_id, to_id)
+        for key, (from_id, to_id) in old_edges.items()
+        if key not in new_edges
+    ]
+    delta['counts']['relationships'] = {
+        'added': len(delta['added_edges']),
+        'changed': 0,
+        'removed': len(delta['removed_edges']),
+    }
+
+    return delta
+
+
+def referenced_geometries(manifests: List[Dict[str, Any]]) -> Set[str]:
+    """
+    Geometry IDs that manifests store or point geometry relationships at.
+
+    With geometry deduplication, one hierarchy's relationships can target the
+    copy of a shape that another hierarchy imported.
+    """
+    referenced = set()
+    for manifest in manifests:
+        referenced.update(manifest['nodes'].get('geometries', {}))
+        for key in manifest['edges']:
+            rel_type, _, to_uri = key.split('|', 2)
+            if rel_type in GEOMETRY_RELATIONSHIPS:
+                referenced.add(geometry_id(to_uri))
+    return referenced
+
+
+def apply_deltas(importer: Neo4jImporter, deltas: List[Tuple[str, Dict[str, Any]]],
+                 other_manifests: Optional[List[Dict[str, Any]]] = None):
+    """
+    Apply computed deltas for one or more hierarchies to Neo4j.
+
+    Removed edges go first, then removed nodes, then added/changed nodes are
+    MERGEd and finally added edges are MERGEd. Each stage runs for every
+    hierarchy before the next starts, since edges can point across
+    hierarchies, and re-running a delta never duplicates data.
+
+    A removed geometry is kept while any new or other manifest still refers
+    to it, since deleting the node would also drop that hierarchy's edges.
+
+    Args:
+        importer: Neo4jImporter instance
+        deltas: (hierarchy type, compute_delta() result) pairs
+        other_manifests: Stored manifests of hierarchies not in this run
+    """
+    for _, delta in deltas:
+        if delta['removed_edges']:
+            importer.delete_relationships(delta['removed_edges'])
+
+    in_use = referenced_geometries([delta['manifest'] for _, delta in deltas] + list(other_manifests or []))
+    for _, delta in deltas:
+        for table, (label, id_property) in NODE_TABLES.items():
+            removed = delta['removed'][table]
+            if table == 'geometries':
+                kept = [key for key in removed if key in in_use]
+                if kept:
+                    print(f"ℹ️  Keeping {len(kept)} removed geometries still referenced by another hierarchy")
+                    removed = [key for key in removed if key not in in_use]
+            if removed:
+                # Manifest keys are strings; only geometry IDs are strings in Neo4j
+                ids = removed if table == 'geometries' else [int(key) for key in removed]
+                importer.delete_nodes(label, id_property, ids)
+
+    for hierarchy_type, delta in deltas:
+        upsert = delta['upsert']
+        if upsert['hierarchies']:
+            importer.import_hierarchies(upsert['hierarchies'], merge=True)
+        if upsert['units']:
+            importer.import_units(upsert['units'], hierarchy_type, merge=True)
+        if upsert['places']:
+            importer.import_places(upsert['places'], merge=True)
+        if upsert['geometries']:
+            importer.import_geometries(upsert['geometries'])
+
+    for _, delta in deltas:
+        if delta['added_edges']:
+            importer.import_relationships(delta['added_edges'], merge=True)
+
+
+def print_delta_summary(hierarchy_type: str, delta: Dict[str, Any]):
+    """Print added/changed/removed counts per table."""
+    print(f"\n🧮 {hierarchy_type} delta:")
+    for table, counts in delta['counts'].items():
+        print(f"  {table:<14} +{counts['added']:,}  ~{counts['changed']:,}  -{counts['removed']:,}")
+
+
+class ManifestStore:
+    """Stores the fingerprint manifest of the last imported snapshot per hierarchy."""
+
+    def __init__(self, state_dir: str):
+        self.state_dir = Path(state_dir)
+
+    def _path(self, hierarchy_type: str) -> Path:
+        return self.state_dir / f"manifest_{hierarchy_type.lower()}.json"
+
+    def _read(self, path: Path) -> Optional[Dict[str, Any]]:
+        """Read a manifest file, or None if missing or in an older manifest format."""
+        if not path.exists():
+            return None
+
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        if manifest.get('manifest_version') != MANIFEST_VERSION:
+            print(f"⚠️  Ignoring {path.name}: unsupported manifest format")
+            return None
+        return manifest
+
+    def load(self, hierarchy_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a manifest to diff against.
+
+        Returns None if it is missing, in an older manifest format or written
+        by another parser version, whose records fingerprint differently.
+        """
+        path = self._path(hierarchy_type)
+        manifest = self._read(path)
+        if manifest is not None and manifest.get('parser_version') != PARSER_VERSION:
+            print(f"⚠️  {path.name} was written by parser version {manifest.get('parser_version')}, "
+                  f"not {PARSER_VERSION}; treating the snapshot as new")
+            return None
+        return manifest
+
+    def load_others(self, hierarchy_types: List[str]) -> List[Dict[str, Any]]:
+        """Load the stored manifests of every hierarchy not in hierarchy_types, of any parser version."""
+        skip = {self._path(hierarchy_type) for hierarchy_type in hierarchy_types}
+        manifests = []
+        for path in sorted(self.state_dir.glob('manifest_*.json')):
+            if path not in skip:
+                manifest = self._read(path)
+                if manifest is not None:
+                    manifests.append(manifest)
+        return manifests
+
+    def save(self, hierarchy_type: str, manifest: Dict[str, Any]):
+        """Write a manifest atomically."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(hierarchy_type)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        """Forget all manifests (e.g. after the database was cleared)."""
+        for path in self.state_dir.glob('manifest_*.json'):
+            path.unlink()
+
+
+def manifest_store_from_env() -> ManifestStore:
+    """Create the manifest store in QPM_STATE_DIR (default: .qpm_state next to this script)."""
+    return ManifestStore(os.getenv('QPM_STATE_DIR', str(Path(__file__).parent / '.qpm_state')))
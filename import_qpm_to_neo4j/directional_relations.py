@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Directional Relations from Centroids
+Computes north_of / south_of / east_of / west_of (and an eight-way N, NE, ...
+neighbour table) as the nearest neighbour of each unit or place in each
+compass sector, so the edges can be regenerated whenever geometries change
+"""
+
+import csv
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from containment import main_geometry_points
+from neo4j_importer import ENDPOINT_MATCHES
+from spatial_index import STRTree
+
+
+DIRECTIONS_4 = ('N', 'E', 'S', 'W')
+DIRECTIONS_8 = ('N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW')
+
+# X north_of Y when Y is X's nearest neighbour in the southern sector
+DIRECTION_RELATIONSHIPS = {'S': 'NORTH_OF', 'N': 'SOUTH_OF', 'W': 'EAST_OF', 'E': 'WEST_OF'}
+DIRECTION_PREDICATES = {'NORTH_OF': 'north_of', 'SOUTH_OF': 'south_of', 'EAST_OF': 'east_of', 'WEST_OF': 'west_of'}
+
+# Points per task sent to a worker process
+CHUNK_SIZE = 2000
+
+QPM_NAMESPACE = 'http://qpm.ontology/2025#'
+
+# Formatted with the source node's MATCH from neo4j_importer.ENDPOINT_MATCHES
+CLEAR_DIRECTIONS_QUERY = """
+UNWIND $batch AS rel
+{match}
+MATCH (from)-[r:NORTH_OF|SOUTH_OF|EAST_OF|WEST_OF]->()
+DELETE r
+"""
+
+
+def sector_of(dx: np.ndarray, dy: np.ndarray, sectors: int) -> np.ndarray:
+    """Compass sector index (0 = north, clockwise) of offsets east dx and north dy."""
+    bearing = np.degrees(np.arctan2(dx, dy)) % 360.0
+    width = 360.0 / sectors
+    return ((bearing + width / 2) // width).astype(np.int64) % sectors
+
+
+def _sector_reach(xs: np.ndarray, ys: np.ndarray, bounds: Sequence[float], sectors: int) -> np.ndarray:
+    """
+    Farthest distance at which each point can have a neighbour in each sector.
+
+    Every point of a sector lies at most half a sector width off its centre
+    line, so its distance is at most its progress along that line divided by
+    cos(half width), and the progress is bounded by the group's bounding box.
+    A sector searched out to this distance is complete, even when empty.
+    """
+    minx, miny, maxx, maxy = bounds
+    scale = np.cos(np.radians(ys))
+    angles = np.radians(np.arange(sectors) * 360.0 / sectors)
+    east, north = np.sin(angles), np.cos(angles)
+    progress = np.full((len(xs), sectors), -np.inf)
+    for cx, cy in ((minx, miny), (minx, maxy), (maxx, miny), (maxx, maxy)):
+        dx = ((cx - xs) * scale)[:, None]
+        dy = (cy - ys)[:, None]
+        progress = np.maximum(progress, dx * east + dy * north)
+    return progress / math.cos(math.pi / sectors)
+
+
+def _nearest_chunk(tree: STRTree, xs: np.ndarray, ys: np.ndarray, start: int, stop: int,
+                   sectors: int, radius: float, max_radius: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Nearest neighbour per sector of points start..stop-1 of a group.
+
+    Searches a box of the given radius around each point and doubles it for
+    points with an unfilled sector until the sector is known to be empty. A
+    neighbour found within the radius is final, since everything outside the
+    box is farther away.
+    """
+    count = stop - start
+    best = np.full((count, sectors), -1, dtype=np.int64)
+    best_distance = np.full((count, sectors), np.inf)
+    reach = _sector_reach(xs[start:stop], ys[start:stop],
+                          (xs.min(), ys.min(), xs.max(), ys.max()), sectors)
+    pending = np.arange(count)
+
+    while len(pending):
+        point_parts, item_parts = [], []
+        for i in pending.tolist():
+            x, y = xs[start + i], ys[start + i]
+            half_width = radius / max(math.cos(math.radians(y)), 1e-6)
+            hits = tree.query_bbox(x - half_width, y - radius, x + half_width, y + radius)
+            point_parts.append(np.full(len(hits), i, dtype=np.int64))
+            item_parts.append(hits)
+        points = np.concatenate(point_parts)
+        items = np.concatenate(item_parts)
+
+        # Equirectangular offsets: longitude degrees shrink with cos(latitude)
+        origin_y = ys[start + points]
+        dx = (xs[items] - xs[start + points]) * np.cos(np.radians(origin_y))
+        dy = ys[items] - origin_y
+        distance = np.hypot(dx, dy)
+        keep = (distance > 0) & (distance <= radius)
+        points, items, distance = points[keep], items[keep], distance[keep]
+        sector = sector_of(dx[keep], dy[keep], sectors)
+
+        # Closest candidate of every (point, sector)
+        order = np.lexsort((distance, sector, points))
+        points, items, distance, sector = points[order], items[order], distance[order], sector[order]
+        first = np.ones(len(points), dtype=bool)
+        first[1:] = (points[1:] != points[:-1]) | (sector[1:] != sector[:-1])
+        better = distance[first] < best_distance[points[first], sector[first]]
+        rows, cols = points[first][better], sector[first][better]
+        best[rows, cols] = items[first][better]
+        best_distance[rows, cols] = distance[first][better]
+
+        if radius >= max_radius:
+            break
+        pending = pending[((best[pending] < 0) & (reach[pending] > radius)).any(axis=1)]
+        radius *= 2
+    return best, best_distance
+
+
+# Trees and coordinates of each worker process, set once by the pool initializer
+_worker_groups: Optional[Dict[Any, Tuple[STRTree, np.ndarray, np.ndarray]]] = None
+
+
+def _init_worker(groups: Dict[Any, Tuple[STRTree, np.ndarray, np.ndarray]]):
+    global _worker_groups
+    _worker_groups = groups
+
+
+def _nearest_task(key: Any, start: int, stop: int, sectors: int, radius: float, max_radius: float):
+    """Process pool task: one chunk of one group."""
+    tree, xs, ys = _worker_groups[key]
+    return _nearest_chunk(tree, xs, ys, start, stop, sectors, radius, max_radius)
+
+
+def _search_radii(xs: np.ndarray, ys: np.ndarray) -> Tuple[float, float]:
+    """Starting radius (a few typical spacings) and the radius spanning the whole group."""
+    width = (xs.max() - xs.min()) * math.cos(math.radians(float(np.abs(ys).min())))
+    height = ys.max() - ys.min()
+    max_radius = max(math.hypot(width, height) * 1.01, 1e-9)
+    spacing = math.sqrt(max(width * height, max_radius ** 2 * 1e-6) / len(xs))
+    return min(4 * spacing, max_radius), max_radius
+
+
+def nearest_by_sector(groups: Dict[Any, Tuple[np.ndarray, np.ndarray]], sectors: int = 4,
+                      jobs: int = 1) -> Dict[Any, np.ndarray]:
+    """
+    Nearest neighbour of every point in each compass sector, within its group.
+
+    Args:
+        groups: Group key -> (longitudes, latitudes)
+        sectors: 4 (N, E, S, W) or 8 (N, NE, ... NW)
+        jobs: Number of worker processes
+
+    Returns:
+        Group key -> (points, sectors) array of neighbour indices within the group, -1 where a sector is empty
+    """
+    trees = {}
+    tasks = []
+    for key, (xs, ys) in groups.items():
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if len(xs) < 2:
+            continue
+        trees[key] = (STRTree.build(np.column_stack([xs, ys, xs, ys])), xs, ys)
+        radius, max_radius = _search_radii(xs, ys)
+        tasks.extend((key, i, min(i + CHUNK_SIZE, len(xs)), sectors, radius, max_radius)
+                     for i in range(0, len(xs), CHUNK_SIZE))
+
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(trees,)) as executor:
+            results = list(executor.map(_nearest_task, *zip(*tasks)))
+    else:
+        results = [_nearest_chunk(*trees[key], start, stop, *rest) for key, start, stop, *rest in tasks]
+
+    neighbours = {key: np.full((len(xs), sectors), -1, dtype=np.int64) for key, (xs, _) in groups.items()}
+    for (key, start, stop, *_), (best, _) in zip(tasks, results):
+        neighbours[key][start:stop] = best
+    return neighbours
+
+
+def located_entities(data: Dict[str, List]) -> Dict[Any, List[Dict[str, Any]]]:
+    """
+    Units and places with main-geometry centroids, grouped into comparable sets.
+
+    Units are compared with units of the same hierarchy and level, places
+    with places of the same level.
+
+    Returns:
+        Dictionary of (kind, hierarchy URI, level) -> records with longitude/latitude
+    """
+    hierarchy_of = {rel['from_uri']: rel['to_uri'] for rel in data['relationships']
+                    if rel['type'] == 'BELONGS_TO_HIERARCHY'}
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for unit in main_geometry_points(data, 'unit'):
+        groups.setdefault(('unit', hierarchy_of.get(unit['uri']), unit.get('unit_level')), []).append(unit)
+    for place in main_geometry_points(data, 'place'):
+        groups.setdefault(('place', None, place.get('place_level')), []).append(place)
+    return groups
+
+
+def directional_neighbours(data: Dict[str, List], sectors: int = 4,
+                           jobs: int = 1) -> List[Tuple[Dict[str, Any], str, Dict[str, Any]]]:
+    """
+    (entity, direction, neighbour) triples: the neighbour is the entity's nearest in that direction.
+
+    Args:
+        data: Extracted data with units, places, geometries and relationships
+        sectors: 4 or 8 compass sectors
+        jobs: Number of worker processes
+
+    Returns:
+        List of triples, direction one of DIRECTIONS_4 or DIRECTIONS_8
+    """
+    directions = DIRECTIONS_4 if sectors == 4 else DIRECTIONS_8
+    groups = located_entities(data)
+    neighbours = nearest_by_sector(
+        {key: ([r['longitude'] for r in records], [r['latitude'] for r in records])
+         for key, records in groups.items()},
+        sectors, jobs)
+
+    triples = []
+    for key, records in groups.items():
+        for i, row in enumerate(neighbours[key].tolist()):
+            for sector, j in enumerate(row):
+                if j >= 0:
+                    triples.append((records[i], directions[sector], records[j]))
+    return triples
+
+
+def _entity_id(record: Dict[str, Any]) -> Any:
+    return record['spatial_unit_id'] if 'spatial_unit_id' in record else record['place_id']
+
+
+def _entity_kind(record: Dict[str, Any]) -> str:
+    return 'unit' if 'spatial_unit_id' in record else 'place'
+
+
+def directional_relationships(triples: Sequence[Tuple[Dict[str, Any], str, Dict[str, Any]]]
+                              ) -> List[Dict[str, Any]]:
+    """
+    NORTH_OF / SOUTH_OF / EAST_OF / WEST_OF dicts for Neo4jImporter.import_relationships().
+
+    Only the four cardinal directions map to relationships; eight-way
+    diagonals are left out.
+    """
+    return [
+        {
+            'from_uri': entity['uri'],
+            'to_uri': neighbour['uri'],
+            'type': DIRECTION_RELATIONSHIPS[direction],
+            'from_id': _entity_id(entity),
+            'to_id': _entity_id(neighbour),
+            'from_kind': _entity_kind(entity),
+            'to_kind': _entity_kind(neighbour),
+        }
+        for entity, direction, neighbour in triples
+        if direction in DIRECTION_RELATIONSHIPS
+    ]
+
+
+def _turtle_term(uri: str) -> str:
+    return f"qpm:{uri[len(QPM_NAMESPACE):]}" if uri.startswith(QPM_NAMESPACE) else f"<{uri}>"
+
+
+def write_directions_ttl(relationships: Sequence[Dict[str, Any]], file_path: str):
+    """Write the relationships as qpm:north_of ... triples, one block per subject."""
+    by_subject: Dict[str, List[Dict[str, Any]]] = {}
+    for rel in relationships:
+        by_subject.setdefault(rel['from_uri'], []).append(rel)
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(f"@prefix qpm: <{QPM_NAMESPACE}> .\n\n")
+        for subject, rels in by_subject.items():
+            rels = sorted(rels, key=lambda rel: DIRECTION_PREDICATES[rel['type']])
+            objects = " ;\n    ".join(
+                f"qpm:{DIRECTION_PREDICATES[rel['type']]} {_turtle_term(rel['to_uri'])}" for rel in rels)
+            f.write(f"{_turtle_term(subject)} {objects} .\n\n")
+
+
+def write_directions_csv(triples: Sequence[Tuple[Dict[str, Any], str, Dict[str, Any]]], file_path: str):
+    """Write name,direction,neighbour rows in the converter CSV vocabulary (neighbour lies in direction)."""
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', 'direction', 'neighbour'])
+        for entity, direction, neighbour in triples:
+            writer.writerow([entity.get('unit_name') or entity.get('place_name'), direction,
+                             neighbour.get('unit_name') or neighbour.get('place_name')])
+
+
+def import_directional_relationships(importer, relationships: List[Dict[str, Any]]):
+    """
+    Replace the directional relationships of the given entities in Neo4j.
+
+    The properties are functional, so existing edges of each source node
+    are deleted before the new ones are merged.
+    """
+    sources: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+    for rel in relationships:
+        sources.setdefault(rel['from_kind'], {})[rel['from_id']] = {'from_id': rel['from_id']}
+    for kind, rows in sources.items():
+        query = CLEAR_DIRECTIONS_QUERY.format(match=ENDPOINT_MATCHES[kind].format(end='from'))
+        importer._batch_import(list(rows.values()), query, f"{kind} directional relationship clean-up")
+    importer.import_relationships(relationships, merge=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    from dotenv import load_dotenv
+
+    from neo4j_importer import Neo4jImporter
+    from parse_cache import cache_from_env, extract_files
+    from ttl_parser import QPMParser
+
+    arg_parser = argparse.ArgumentParser(description='Compute directional relations from geometry centroids')
+    arg_parser.add_argument('ttl_files', nargs='+', help='Hierarchy and places files')
+    arg_parser.add_argument('--sectors', type=int, choices=(4, 8), default=4, help='Compass sectors')
+    arg_parser.add_argument('--ttl', help='Write north_of/south_of/east_of/west_of triples to this file')
+    arg_parser.add_argument('--csv', help='Write name,direction,neighbour rows to this file')
+    arg_parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (default: CPU count)')
+    arg_parser.add_argument('--check', action='store_true', help='Compare with the directional edges in the files')
+    arg_parser.add_argument('--import', dest='do_import', action='store_true',
+                            help='Replace the directional relationships in Neo4j')
+    arg_parser.add_argument('--no-cache', action='store_true', help='Disable the parse cache')
+    args = arg_parser.parse_args()
+
+    extracted = [d for d in extract_files(QPMParser(), args.ttl_files, cache_from_env(not args.no_cache)) if d]
+    data = {key: [record for d in extracted for record in d[key]]
+            for key in ('units', 'places', 'geometries', 'relationships')}
+
+    start_time = time.time()
+    triples = directional_neighbours(data, args.sectors, args.jobs)
+    relationships = directional_relationships(triples)
+    elapsed = time.time() - start_time
+    entities = len({id(entity) for entity, _, _ in triples})
+    print(f"\n🧭 {len(triples):,} neighbours for {entities:,} units and places "
+          f"({args.sectors} sectors) in {elapsed:.2f}s with {args.jobs} worker processes")
+
+    if args.check:
+        types = set(DIRECTION_RELATIONSHIPS.values())
+        upstream = {(r['from_uri'], r['type'], r['to_uri']) for r in data['relationships'] if r['type'] in types}
+        derived = {(r['from_uri'], r['type'], r['to_uri']) for r in relationships}
+        print(f"🔍 Upstream directional edges: {len(upstream):,}; derived: {len(derived):,}; "
+              f"in both: {len(upstream & derived):,}")
+
+    if args.ttl:
+        write_directions_ttl(relationships, args.ttl)
+        print(f"💾 Wrote {len(relationships):,} triples to {args.ttl}")
+    if args.csv:
+        write_directions_csv(triples, args.csv)
+        print(f"💾 Wrote {len(triples):,} rows to {args.csv}")
+
+    if args.do_import:
+        load_dotenv()
+        with Neo4jImporter(os.getenv('NEO4J_URI', 'bolt://localhost:7687'),
+                           os.getenv('NEO4J_USER', 'neo4j'),
+                           os.getenv('NEO4J_PASSWORD', 'password')) as importer:
+            import_directional_relationships(importer, relationships)
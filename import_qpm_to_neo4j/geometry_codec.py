@@ -0,0 +1,355 @@
+"""
+Binary Geometry Codec
+Encodes WKT geometries as WKB or as a compact stream of quantised,
+delta-encoded varints, and decodes them back into coordinate batches
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+
+from wkt_parser import decode_wkt_batch, empty_batch, strip_crs
+
+
+# Values of Neo4jImporter.geometry_encoding; 'wkt' stores no binary property
+GEOMETRY_ENCODINGS = ('wkt', 'wkb', 'varint')
+
+# Varint stream format version, written as the first value of every stream
+VARINT_VERSION = 1
+
+# Coordinates are stored as integer multiples of 1e-7 degrees (about 1 cm)
+QUANTIZATION = 10 ** 7
+
+# A uint64 needs at most ten 7-bit groups
+_MAX_VARINT_BYTES = 10
+
+
+def encode_wkb_batch(wkt_strings: Sequence[Optional[str]]) -> List[Optional[bytes]]:
+    """
+    Encode WKT strings as little-endian 2D WKB.
+
+    A leading GeoSPARQL CRS IRI is dropped, as the varint decoder does.
+
+    Returns:
+        WKB bytes per string; None where the WKT is missing or invalid
+    """
+    plain = [strip_crs(wkt) for wkt in wkt_strings]
+    geometries = shapely.from_wkt(np.asarray(plain, dtype=object), on_invalid='ignore')
+    return shapely.to_wkb(geometries, output_dimension=2, byte_order=1).tolist()
+
+
+def decode_wkb_batch(blobs: Sequence[Optional[bytes]]) -> np.ndarray:
+    """Decode WKB bytes into an array of shapely geometries (None stays None)."""
+    return shapely.from_wkb(np.asarray(blobs, dtype=object), on_invalid='ignore')
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    """Map signed to unsigned integers so small magnitudes get small codes."""
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
+
+
+def _varint_bytes(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    LEB128-encode unsigned integers, all at once.
+
+    Returns:
+        Tuple of the (N, 10) uint8 byte matrix, the (N, 10) mask of bytes in
+        use (row-major order gives the encoded stream) and the byte count
+        per value
+    """
+    values = values.astype(np.uint64)
+    shifts = np.arange(_MAX_VARINT_BYTES, dtype=np.uint64) * np.uint64(7)
+    groups = (values[:, None] >> shifts) & np.uint64(0x7F)
+    lengths = np.maximum(1, np.count_nonzero(values[:, None] >> shifts, axis=1))
+    used = np.arange(_MAX_VARINT_BYTES) < lengths[:, None]
+    # Continuation bit on every byte except the last of each value
+    more = np.arange(_MAX_VARINT_BYTES) < (lengths - 1)[:, None]
+    return (groups | (more.astype(np.uint64) << np.uint64(7))).astype(np.uint8), used, lengths
+
+
+def _encode_varints(values: Sequence[int]) -> bytes:
+    """Varint-encode a short sequence of unsigned integers."""
+    groups, used, _ = _varint_bytes(np.asarray(values, dtype=np.uint64))
+    return groups[used].tobytes()
+
+
+def _decode_varints(data: bytes) -> np.ndarray:
+    """Decode a concatenation of varints into a uint64 array."""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if not len(raw):
+        return np.zeros(0, dtype=np.uint64)
+    ends = raw < 0x80
+    if not ends[-1]:
+        raise ValueError("Truncated varint stream")
+    starts = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    # Byte position within its value gives the shift of its 7 payload bits
+    position = np.arange(len(raw)) - np.repeat(starts, np.diff(np.append(starts, len(raw))))
+    terms = (raw & 0x7F).astype(np.uint64) << (position.astype(np.uint64) * np.uint64(7))
+    return np.add.reduceat(terms, starts)
+
+
+def encode_varint_batch(wkt_strings: Sequence[Optional[str]]) -> List[Optional[bytes]]:
+    """
+    Encode WKT strings as quantised, delta-encoded varint streams.
+
+    Each stream is a sequence of unsigned LEB128 varints: the format
+    version, the geometry type code (see GEOMETRY_TYPES), the number of
+    polygons, the number of rings of each polygon, the number of vertices
+    of each ring, and then the x and y of every vertex. Coordinates are
+    quantised to 1/QUANTIZATION degrees and stored as zigzag-encoded
+    differences from the previous vertex, so neighbouring vertices of a
+    ring take one to three bytes per axis instead of ~18 characters.
+
+    Returns:
+        Encoded bytes per string; None where the WKT could not be decoded
+    """
+    batch = decode_wkt_batch(wkt_strings)
+    geometry_offsets = batch['geometry_offsets']
+    polygon_offsets = batch['polygon_offsets']
+    ring_offsets = batch['ring_offsets']
+
+    quantised = np.round(batch['coords'] * QUANTIZATION).astype(np.int64)
+    deltas = np.diff(quantised, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+    # Vertex index where each geometry's coordinates start
+    vertex_starts = ring_offsets[polygon_offsets[geometry_offsets]]
+    first = vertex_starts[:-1][geometry_offsets[1:] > geometry_offsets[:-1]]
+    deltas[first] = quantised[first]
+
+    groups, used, lengths = _varint_bytes(_zigzag(deltas.ravel()))
+    coord_bytes = groups[used].tobytes()
+    byte_offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=byte_offsets[1:])
+
+    encoded = []
+    for g, type_code in enumerate(batch['geometry_type'].tolist()):
+        first_polygon, last_polygon = geometry_offsets[g], geometry_offsets[g + 1]
+        if first_polygon == last_polygon:
+            encoded.append(None)
+            continue
+        first_ring, last_ring = polygon_offsets[first_polygon], polygon_offsets[last_polygon]
+        header = [VARINT_VERSION, type_code, last_polygon - first_polygon]
+        header.extend(np.diff(polygon_offsets[first_polygon:last_polygon + 1]).tolist())
+        header.extend(np.diff(ring_offsets[first_ring:last_ring + 1]).tolist())
+        coord_start = byte_offsets[2 * vertex_starts[g]]
+        coord_end = byte_offsets[2 * vertex_starts[g + 1]]
+        encoded.append(_encode_varints(header) + coord_bytes[coord_start:coord_end])
+    return encoded
+
+
+def decode_varint_batch(blobs: Sequence[Optional[bytes]]) -> Dict[str, np.ndarray]:
+    """
+    Decode varint streams into the coordinate batch layout of decode_wkt_batch.
+
+    Args:
+        blobs: Streams written by encode_varint_batch (None entries allowed)
+
+    Returns:
+        Dictionary with 'geometry_type', 'coords', 'ring_offsets',
+        'polygon_offsets' and 'geometry_offsets'
+    """
+    present = [blob for blob in blobs if blob]
+    data = b''.join(present)
+    values = _decode_varints(data)
+    # Values before each stream boundary: one per byte without the continuation bit
+    value_ends = np.cumsum(np.frombuffer(data, dtype=np.uint8) < 0x80)
+    stream_ends = np.cumsum([len(blob) for blob in present], dtype=np.int64)
+    value_offsets = np.concatenate(([0], value_ends[stream_ends - 1])).astype(np.int64)
+
+    type_codes = np.zeros(len(blobs), dtype=np.int8)
+    geometry_offsets = [0]
+    polygon_offsets = [0]
+    ring_lengths = []
+    coord_starts = []
+    vertex_counts = []
+
+    # Fixed header fields of every stream at once, then the variable-length
+    # ring and vertex counts stream by stream
+    stream_starts = value_offsets[:-1]
+    versions = values[stream_starts]
+    if len(versions) and (versions != VARINT_VERSION).any():
+        raise ValueError(f"Unsupported varint geometry version: {versions.max()}")
+    stream_types = values[stream_starts + 1].tolist()
+    polygon_counts = values[stream_starts + 2].tolist()
+    stream_starts = stream_starts.tolist()
+    stream_stops = value_offsets[1:].tolist()
+
+    stream = 0
+    for i, blob in enumerate(blobs):
+        if blob:
+            start, stop = stream_starts[stream], stream_stops[stream]
+            type_codes[i] = stream_types[stream]
+            cursor = start + 3 + polygon_counts[stream]
+            stream += 1
+            rings = values[start + 3:cursor].tolist()
+            lengths = values[cursor:cursor + sum(rings)].tolist()
+            cursor += len(lengths)
+            if stop - cursor != 2 * sum(lengths):
+                raise ValueError("Varint geometry stream has the wrong number of coordinates")
+
+            for ring_count in rings:
+                polygon_offsets.append(polygon_offsets[-1] + ring_count)
+            ring_lengths.extend(lengths)
+            coord_starts.append(cursor)
+            vertex_counts.append((stop - cursor) // 2)
+        geometry_offsets.append(len(polygon_offsets) - 1)
+
+    if not coord_starts:
+        return empty_batch(type_codes)
+
+    # Coordinate values are everything after each header up to the next stream
+    is_coord = np.zeros(len(values) + 1, dtype=np.int8)
+    coord_starts = np.asarray(coord_starts, dtype=np.int64)
+    vertex_counts = np.asarray(vertex_counts, dtype=np.int64)
+    np.add.at(is_coord, coord_starts, 1)
+    np.add.at(is_coord, coord_starts + 2 * vertex_counts, -1)
+    deltas = _unzigzag(values[np.cumsum(is_coord[:-1]) > 0]).reshape(-1, 2)
+
+    # Undo the deltas with one running sum, restarted at each geometry by
+    # subtracting the sum reached at the end of the previous geometry
+    totals = np.cumsum(deltas, axis=0)
+    restarts = np.cumsum(vertex_counts)[:-1]
+    bases = np.concatenate((np.zeros((1, 2), dtype=np.int64), totals[restarts - 1]))
+    quantised = totals - np.repeat(bases, vertex_counts, axis=0)
+
+    ring_offsets = np.zeros(len(ring_lengths) + 1, dtype=np.int64)
+    np.cumsum(ring_lengths, out=ring_offsets[1:])
+    return {
+        'geometry_type': type_codes,
+        'coords': quantised / QUANTIZATION,
+        'ring_offsets': ring_offsets,
+        'polygon_offsets': np.asarray(polygon_offsets, dtype=np.int64),
+        'geometry_offsets': np.asarray(geometry_offsets, dtype=np.int64),
+    }
+
+
+def encode_geometry_batch(wkt_strings: Sequence[Optional[str]], encoding: str) -> List[Optional[bytes]]:
+    """
+    Encode WKT strings with one of the binary GEOMETRY_ENCODINGS.
+
+    Args:
+        wkt_strings: WKT strings (None entries allowed)
+        encoding: 'wkb' or 'varint'
+
+    Returns:
+        Encoded bytes per string (None where the WKT could not be decoded)
+    """
+    if encoding == 'wkb':
+        return encode_wkb_batch(wkt_strings)
+    if encoding == 'varint':
+        return encode_varint_batch(wkt_strings)
+    raise ValueError(f"Unknown binary geometry encoding: {encoding}")
+
+
+def encode_geometry_records(geometries: Sequence[Dict[str, Any]], encoding: str,
+                            keep_wkt: bool = True) -> List[Dict[str, Any]]:
+    """
+    Copies of geometry records with geometry_bin and geometry_encoding set.
+
+    Args:
+        geometries: Geometry records (a batch about to be written)
+        encoding: One of GEOMETRY_ENCODINGS; 'wkt' returns the records unchanged
+        keep_wkt: Keep the wkt property next to the binary one (compatibility
+            mode for consumers that still parse WKT)
+
+    Returns:
+        List of record dicts
+    """
+    if encoding == 'wkt':
+        return list(geometries)
+
+    records = [dict(record) for record in geometries]
+    blobs = encode_geometry_batch([record.get('wkt') for record in records], encoding)
+    failed = sum(1 for record, blob in zip(records, blobs) if blob is None and record.get('wkt'))
+    if failed:
+        print(f"⚠️  {failed} geometries could not be encoded as {encoding}; they keep only their WKT")
+    for record, blob in zip(records, blobs):
+        record['geometry_bin'] = blob
+        record['geometry_encoding'] = encoding if blob is not None else None
+        if not keep_wkt and blob is not None:
+            record['wkt'] = None
+    return records
+
+
+if __name__ == "__main__":
+    # Size and decode speed of each encoding, plus Bolt transfer time with --neo4j
+    import argparse
+    import os
+    import time
+
+    arg_parser = argparse.ArgumentParser(description='Benchmark WKT against WKB and varint geometry encodings')
+    arg_parser.add_argument('ttl_file', nargs='?', help='TTL file with geometries (default: synthetic polygons)')
+    arg_parser.add_argument('--neo4j', action='store_true',
+                            help='Also time a Bolt round trip through the database in NEO4J_URI')
+    args = arg_parser.parse_args()
+
+    if args.ttl_file:
+        from ttl_parser import parse_ttl_file
+        wkts = [g['wkt'] for g in parse_ttl_file(args.ttl_file, streaming=True)['geometries'] if g.get('wkt')]
+    else:
+        rng = np.random.default_rng(1)
+        wkts = []
+        for _ in range(20000):
+            cx, cy = rng.uniform(-5.3, -2.7), rng.uniform(51.3, 53.4)
+            angles = np.sort(rng.uniform(0, 2 * np.pi, 60))
+            radius = rng.uniform(0.001, 0.02)
+            ring = [(cx + radius * np.cos(a), cy + radius * np.sin(a)) for a in angles]
+            ring.append(ring[0])
+            wkts.append("POLYGON ((" + ", ".join(f"{x} {y}" for x, y in ring) + "))")
+
+    payloads = {
+        'wkt': wkts,
+        'wkb': encode_wkb_batch(wkts),
+        'varint': encode_varint_batch(wkts),
+    }
+
+    # Round trip: varint coordinates match WKT within the quantisation step
+    reference = decode_wkt_batch(wkts)
+    decoded = decode_varint_batch(payloads['varint'])
+    assert np.array_equal(reference['ring_offsets'], decoded['ring_offsets'])
+    assert np.abs(reference['coords'] - decoded['coords']).max() <= 0.5 / QUANTIZATION + 1e-12
+    print(f"✅ {len(wkts):,} geometries round-trip")
+
+    # Each decoder goes from stored payload to a flat coordinate array
+    decoders = {
+        'wkt': lambda: decode_wkt_batch(payloads['wkt'])['coords'],
+        'wkb': lambda: shapely.get_coordinates(decode_wkb_batch(payloads['wkb'])),
+        'varint': lambda: decode_varint_batch(payloads['varint'])['coords'],
+    }
+
+    print(f"\n{'encoding':<10} {'size':>10} {'vs WKT':>7} {'decode':>10}")
+    wkt_size = sum(len(w.encode('utf-8')) for w in wkts)
+    for encoding, values in payloads.items():
+        size = wkt_size if encoding == 'wkt' else sum(len(b) for b in values if b)
+        start_time = time.perf_counter()
+        decoders[encoding]()
+        elapsed = time.perf_counter() - start_time
+        print(f"{encoding:<10} {size / 1024 ** 2:>7.2f} MB {100.0 * size / wkt_size:>6.1f}% {elapsed * 1000:>7.1f} ms")
+
+    if args.neo4j:
+        from neo4j import GraphDatabase
+
+        driver = GraphDatabase.driver(os.getenv('NEO4J_URI', 'bolt://localhost:7687'),
+                                      auth=(os.getenv('NEO4J_USER', 'neo4j'), os.getenv('NEO4J_PASSWORD', 'password')))
+        print(f"\n{'encoding':<10} {'write':>10} {'read':>10}")
+        try:
+            with driver.session() as session:
+                for encoding, values in payloads.items():
+                    rows = [{'i': i, 'v': v} for i, v in enumerate(values)]
+                    start_time = time.perf_counter()
+                    for i in range(0, len(rows), 1000):
+                        session.run("UNWIND $batch AS row CREATE (:CodecBenchmark {i: row.i, v: row.v})",
+                                    batch=rows[i:i + 1000]).consume()
+                    write_time = time.perf_counter() - start_time
+
+                    start_time = time.perf_counter()
+                    session.run("MATCH (n:CodecBenchmark) RETURN n.v AS v").values()
+                    read_time = time.perf_counter() - start_time
+                    session.run("MATCH (n:CodecBenchmark) DETACH DELETE n").consume()
+                    print(f"{encoding:<10} {write_time * 1000:>7.1f} ms {read_time * 1000:>7.1f} ms")
+        finally:
+            driver.close()
@@ -0,0 +1,245 @@
+"""
+Geometry Deduplication by Content Hash
+Canonicalises geometry coordinates (rounding, ring orientation, start vertex,
+ring and polygon order) and hashes them, so a shape that appears under several
+geometry IDs is stored once and every relationship points at that copy
+"""
+
+import hashlib
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from record_store import RecordStore
+from uri_codec import geometry_id
+from wkt_parser import GEOMETRY_TYPE_CODES, decode_wkt_batch
+
+
+# Decimal places kept before hashing (1e-7 degrees is about 1 cm)
+ROUNDING_DECIMALS = 7
+
+# Geometries decoded per decode_wkt_batch() call
+DECODE_BATCH = 1024
+
+_GEOMETRY_RELATIONSHIPS = ('HAS_MAIN_GEOMETRY', 'HAS_EXTRA_GEOMETRY')
+_PAYLOAD_PROPERTIES = ('wkt', 'wkt_lod0', 'wkt_lod1', 'wkt_lod2', 'wkt_lod3')
+
+
+def _canonical_ring(ring: np.ndarray, exterior: bool) -> bytes:
+    """
+    Quantised ring bytes independent of closing vertex, direction and start vertex.
+
+    Exteriors are turned counter-clockwise and holes clockwise, then the
+    ring is rotated to start at its lowest (x, y) vertex.
+    """
+    if len(ring) > 1 and (ring[0] == ring[-1]).all():
+        ring = ring[:-1]
+    if len(ring) > 2:
+        x, y = ring[:, 0].astype(np.float64), ring[:, 1].astype(np.float64)
+        signed_area = np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)
+        if (signed_area < 0) == exterior:
+            ring = ring[::-1]
+    start = np.lexsort((ring[:, 1], ring[:, 0]))[0] if len(ring) else 0
+    return np.ascontiguousarray(np.roll(ring, -start, axis=0)).tobytes()
+
+
+def shape_hashes(wkt_strings: Sequence[Optional[str]], decimals: int = ROUNDING_DECIMALS) -> List[Optional[str]]:
+    """
+    Content hash of each geometry's canonical form.
+
+    Two WKT strings hash alike when they describe the same shape up to
+    rounding: rings may be open or closed, start at any vertex and run in
+    either direction, and holes and polygons may come in any order. A
+    POLYGON and a single-part MULTIPOLYGON with the same rings match.
+
+    Args:
+        wkt_strings: WKT strings (None entries allowed)
+        decimals: Decimal places kept before hashing
+
+    Returns:
+        Hex digest per string, None where the string could not be decoded
+    """
+    hashes: List[Optional[str]] = []
+    scale = 10.0 ** decimals
+    for start in range(0, len(wkt_strings), DECODE_BATCH):
+        batch = decode_wkt_batch(list(wkt_strings[start:start + DECODE_BATCH]))
+        coords = np.round(batch['coords'] * scale).astype(np.int64)
+        ring_offsets = batch['ring_offsets']
+        polygon_offsets = batch['polygon_offsets']
+        geometry_offsets = batch['geometry_offsets']
+
+        for g, type_code in enumerate(batch['geometry_type'].tolist()):
+            if geometry_offsets[g] == geometry_offsets[g + 1]:
+                hashes.append(None)
+                continue
+            polygons = []
+            for p in range(geometry_offsets[g], geometry_offsets[g + 1]):
+                first, last = polygon_offsets[p], polygon_offsets[p + 1]
+                shell = _canonical_ring(coords[ring_offsets[first]:ring_offsets[first + 1]], True)
+                holes = sorted(_canonical_ring(coords[ring_offsets[r]:ring_offsets[r + 1]], False)
+                               for r in range(first + 1, last))
+                polygons.append(b''.join(len(part).to_bytes(4, 'little') + part for part in [shell] + holes))
+
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(b'P' if type_code == GEOMETRY_TYPE_CODES['POINT'] else b'A')
+            for polygon in sorted(polygons):
+                digest.update(len(polygon).to_bytes(4, 'little'))
+                digest.update(polygon)
+            hashes.append(digest.hexdigest())
+    return hashes
+
+
+def _payload_bytes(record: Dict[str, Any]) -> int:
+    """Bytes of geometry text a dropped duplicate would have sent."""
+    return sum(len(record.get(name) or '') for name in _PAYLOAD_PROPERTIES)
+
+
+class GeometryDeduplicator:
+    """
+    Registry of shapes seen during one import run.
+
+    The first geometry with a given shape hash is kept (with a shape_hash
+    property); later geometries with the same hash are dropped, and
+    relationships to them are redirected to the kept geometry. Because
+    the registry spans every file and hierarchy of the run, admin,
+    electoral and postal copies of a boundary collapse into one node;
+    load_existing() carries it over from an earlier import.
+    """
+
+    def __init__(self, decimals: int = ROUNDING_DECIMALS):
+        self.decimals = decimals
+        self.canonical: Dict[str, str] = {}  # shape hash -> URI (or stored ID) of the kept geometry
+        self.redirects: Dict[str, str] = {}  # URI of a dropped geometry -> URI of the kept one
+        self.report: Dict[str, Dict[str, int]] = {}
+
+    def dedup_geometries(self, geometries: Sequence[Dict[str, Any]],
+                         label: str = "Admin") -> Sequence[Dict[str, Any]]:
+        """
+        Drop geometries whose shape is already registered.
+
+        Args:
+            geometries: Geometry records (list of dicts or RecordStore)
+            label: Name the savings are reported under (e.g. the hierarchy type)
+
+        Returns:
+            Kept records with shape_hash set; a RecordStore input gives a new RecordStore
+        """
+        records = [dict(record) for record in geometries]
+        hashes = shape_hashes([record.get('wkt') for record in records], self.decimals)
+        counts = self.report.setdefault(label, {'geometries': 0, 'duplicates': 0,
+                                                'bytes': 0, 'saved_bytes': 0})
+
+        kept = []
+        for record, shape_hash in zip(records, hashes):
+            counts['geometries'] += 1
+            counts['bytes'] += _payload_bytes(record)
+            if shape_hash is None:
+                kept.append(record)
+                continue
+
+            canonical = self.canonical.setdefault(shape_hash, record['uri'])
+            if geometry_id(canonical) == geometry_id(record['uri']):
+                record['shape_hash'] = shape_hash
+                kept.append(record)
+            elif self.redirects.setdefault(record['uri'], canonical) == canonical:
+                counts['duplicates'] += 1
+                counts['saved_bytes'] += _payload_bytes(record)
+
+        if isinstance(geometries, RecordStore):
+            store = RecordStore('geometry')
+            store.extend(kept)
+            return store
+        return kept
+
+    def rewrite_relationships(self, relationships: Sequence[Dict[str, Any]]) -> Sequence[Dict[str, Any]]:
+        """
+        Point geometry relationships at the kept copy of their shape.
+
+        Relationships made identical by the rewrite (an entity with two
+        copies of one shape) are written once.
+
+        Returns:
+            Relationship records; a RecordStore input gives a new RecordStore
+        """
+        if not self.redirects:
+            return relationships
+
+        rewritten, seen = [], set()
+        for rel in relationships:
+            if rel['type'] in _GEOMETRY_RELATIONSHIPS:
+                # Key every geometry edge: an untouched edge to the kept copy
+                # and a redirected one to a dropped copy collapse into one
+                if rel['to_uri'] in self.redirects:
+                    rel = dict(rel)
+                    rel['to_uri'] = self.redirects[rel['to_uri']]
+                key = (rel['from_uri'], rel['type'], geometry_id(rel['to_uri']))
+                if key in seen:
+                    continue
+                seen.add(key)
+            rewritten.append(rel)
+
+        if isinstance(relationships, RecordStore):
+            store = RecordStore('relationship')
+            store.extend(rewritten)
+            return store
+        return rewritten
+
+    def load_existing(self, driver) -> int:
+        """
+        Register the shapes already kept in a database by a deduplicated import.
+
+        Later runs (e.g. add_place_geometries.py) then drop their copies of
+        those shapes and point relationships at the stored geometry instead
+        of writing the copies back.
+
+        Args:
+            driver: Neo4j driver
+
+        Returns:
+            Number of shapes registered (0 when the database was not deduplicated)
+        """
+        with driver.session() as session:
+            result = session.run("""
+                MATCH (g:Geometry) WHERE g.shape_hash IS NOT NULL
+                RETURN g.shape_hash AS shape_hash, g.geometry_id AS geometry_id
+            """)
+            # A bare geometry ID stands in for the URI: relationships match geometries on its last segment
+            before = len(self.canonical)
+            for record in result:
+                self.canonical.setdefault(record['shape_hash'], record['geometry_id'])
+        return len(self.canonical) - before
+
+    def print_report(self):
+        """Print duplicates dropped and geometry text saved per label."""
+        print("\n🧬 Geometry deduplication:")
+        print(f"  {'':<12} {'geometries':>12} {'duplicates':>12} {'payload':>11} {'saved':>11} {'':>7}")
+        totals = {'geometries': 0, 'duplicates': 0, 'bytes': 0, 'saved_bytes': 0}
+        for label, counts in list(self.report.items()) + [('Total', totals)]:
+            if label != 'Total':
+                for key in totals:
+                    totals[key] += counts[key]
+            share = 100.0 * counts['saved_bytes'] / counts['bytes'] if counts['bytes'] else 0.0
+            print(f"  {label:<12} {counts['geometries']:>12,} {counts['duplicates']:>12,} "
+                  f"{counts['bytes'] / 1024 ** 2:>8.2f} MB {counts['saved_bytes'] / 1024 ** 2:>8.2f} MB "
+                  f"{share:>6.1f}%")
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from ttl_parser import parse_ttl_file
+
+    if len(sys.argv) < 2:
+        print("Usage: python geometry_dedup.py <path_to_ttl_file> [...]")
+        sys.exit(1)
+
+    dedup = GeometryDeduplicator()
+    start_time = time.time()
+    for path in sys.argv[1:]:
+        data = parse_ttl_file(path, streaming=True)
+        kept = dedup.dedup_geometries(data['geometries'], label=path.rsplit('/', 1)[-1][:12])
+        dedup.rewrite_relationships(data['relationships'])
+        print(f"  {path}: kept {len(kept):,} of {len(data['geometries']):,} geometries")
+    print(f"⏱️  Hashed in {time.time() - start_time:.2f}s")
+    dedup.print_report()
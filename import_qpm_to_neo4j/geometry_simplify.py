@@ -0,0 +1,180 @@
+"""
+Multi-Resolution Polygon Simplification
+Builds simplified level-of-detail (LOD) WKT strings for polygon geometries,
+stored next to the full-resolution wkt as wkt_lod0..N
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+
+from record_store import RecordStore
+from wkt_parser import strip_crs
+
+
+# Simplification tolerance per level in degrees, finest first
+# (roughly 1 m, 10 m, 100 m and 1 km at Welsh latitudes)
+LOD_TOLERANCES = (0.00001, 0.0001, 0.001, 0.01)
+LOD_PROPERTIES = tuple(f"wkt_lod{level}" for level in range(len(LOD_TOLERANCES)))
+
+# Geometries per task sent to a worker process
+CHUNK_SIZE = 2000
+
+# Only areal geometries are simplified; points have nothing to drop
+_SIMPLIFIED_TYPES = ('POLYGON', 'MULTIPOLYGON')
+
+
+def _rounding_precision(tolerance: float) -> int:
+    """Decimal places worth keeping at a tolerance: one digit finer than the tolerance."""
+    return max(0, math.ceil(-math.log10(tolerance)) + 1)
+
+
+def simplify_wkts(wkt_strings: Sequence[str],
+                  tolerances: Sequence[float] = LOD_TOLERANCES) -> Tuple[List[List[Optional[str]]], np.ndarray]:
+    """
+    Simplify WKT polygons at each tolerance.
+
+    Uses topology-preserving Douglas-Peucker (shapely.simplify with
+    preserve_topology=True), so rings never self-intersect or collapse and
+    holes stay inside their shells. Coordinates are rounded to the
+    precision each level can show.
+
+    Args:
+        wkt_strings: WKT strings to simplify
+        tolerances: Tolerance per level, in coordinate units (degrees)
+
+    Returns:
+        Tuple of (WKT strings per level, (levels + 1, 2) array of total
+        vertices and payload bytes: full resolution first, then each level).
+        Unparseable strings give None at every level. A leading GeoSPARQL
+        CRS IRI is dropped.
+    """
+    plain = [strip_crs(wkt) for wkt in wkt_strings]
+    geometries = shapely.from_wkt(np.asarray(plain, dtype=object), on_invalid='ignore')
+    valid = ~shapely.is_missing(geometries)
+
+    totals = np.zeros((len(tolerances) + 1, 2), dtype=np.int64)
+    totals[0] = (shapely.get_num_coordinates(geometries[valid]).sum(),
+                 sum(len(wkt) for wkt, ok in zip(wkt_strings, valid) if ok))
+
+    levels = []
+    for level, tolerance in enumerate(tolerances, start=1):
+        simplified = shapely.simplify(geometries, tolerance, preserve_topology=True)
+        wkts = shapely.to_wkt(simplified, rounding_precision=_rounding_precision(tolerance), trim=True)
+        levels.append([wkt if ok else None for wkt, ok in zip(wkts.tolist(), valid)])
+        totals[level] = (shapely.get_num_coordinates(simplified[valid]).sum(),
+                         sum(len(wkt) for wkt in wkts[valid]))
+
+    return levels, totals
+
+
+def _simplify_chunk(wkt_strings: List[str], tolerances: Sequence[float]):
+    """Process pool task: simplify one chunk."""
+    return simplify_wkts(wkt_strings, tolerances)
+
+
+def simplify_geometries(geometries: Sequence[Dict[str, Any]], jobs: int = 1,
+                        tolerances: Sequence[float] = LOD_TOLERANCES
+                        ) -> Tuple[Sequence[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Add wkt_lod0..N to every polygon geometry record.
+
+    Chunks of WKT strings are simplified in worker processes when jobs > 1.
+    Point geometries and geometries without WKT are left unchanged.
+
+    Args:
+        geometries: Geometry records (list of dicts or RecordStore)
+        jobs: Number of worker processes
+        tolerances: Tolerance per level, finest first
+
+    Returns:
+        Tuple of (records with LOD properties, size report). A list is
+        updated in place; a RecordStore is rebuilt, since stores are append-only.
+    """
+    records = geometries if isinstance(geometries, list) else list(geometries)
+    targets = [
+        i for i, record in enumerate(records)
+        if record.get('wkt') and record.get('geometry_type') in _SIMPLIFIED_TYPES
+    ]
+    chunks = [targets[i:i + CHUNK_SIZE] for i in range(0, len(targets), CHUNK_SIZE)]
+    chunk_wkts = [[records[i]['wkt'] for i in chunk] for chunk in chunks]
+
+    if jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_simplify_chunk, chunk_wkts, repeat(tolerances)))
+    else:
+        results = [simplify_wkts(wkts, tolerances) for wkts in chunk_wkts]
+
+    report = new_lod_report(tolerances)
+    for chunk, (levels, totals) in zip(chunks, results):
+        for offset, i in enumerate(chunk):
+            for level, wkts in enumerate(levels):
+                records[i][f"wkt_lod{level}"] = wkts[offset]
+        report['geometries'] += len(chunk)
+        report['unparsed'] += sum(1 for wkt in levels[0] if wkt is None) if levels else 0
+        report['totals'] += totals
+
+    if isinstance(geometries, RecordStore):
+        store = RecordStore('geometry')
+        store.extend(records)
+        return store, report
+    return records, report
+
+
+def new_lod_report(tolerances: Sequence[float] = LOD_TOLERANCES) -> Dict[str, Any]:
+    """Empty size report, for accumulating over several simplify_geometries() calls."""
+    return {
+        'tolerances': tuple(tolerances),
+        'geometries': 0,
+        'unparsed': 0,
+        'totals': np.zeros((len(tolerances) + 1, 2), dtype=np.int64),
+    }
+
+
+def merge_lod_reports(report: Dict[str, Any], other: Dict[str, Any]):
+    """Add the counts of other into report."""
+    report['geometries'] += other['geometries']
+    report['unparsed'] += other['unparsed']
+    report['totals'] += other['totals']
+
+
+def print_lod_report(report: Dict[str, Any]):
+    """Print vertex count and payload size per level, relative to full resolution."""
+    full_vertices, full_bytes = (int(v) for v in report['totals'][0])
+    print(f"\n🪶 Levels of detail for {report['geometries']:,} polygon geometries:")
+    print(f"  {'level':<10} {'tolerance':>10} {'vertices':>14} {'':>7} {'payload':>11} {'':>7}")
+    print(f"  {'wkt':<10} {'-':>10} {full_vertices:>14,} {'100.0%':>7} "
+          f"{full_bytes / 1024 ** 2:>8.2f} MB {'100.0%':>7}")
+    for level, tolerance in enumerate(report['tolerances']):
+        vertices, size = (int(v) for v in report['totals'][level + 1])
+        vertex_share = 100.0 * vertices / full_vertices if full_vertices else 0.0
+        size_share = 100.0 * size / full_bytes if full_bytes else 0.0
+        print(f"  {'wkt_lod' + str(level):<10} "
+              f"{tolerance:>10g} {vertices:>14,} {vertex_share:>6.1f}% "
+              f"{size / 1024 ** 2:>8.2f} MB {size_share:>6.1f}%")
+    if report['unparsed']:
+        print(f"  ⚠️  {report['unparsed']:,} geometries have WKT shapely cannot parse and no levels of detail")
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    from ttl_parser import parse_ttl_file
+
+    arg_parser = argparse.ArgumentParser(description='Report level-of-detail simplification for a TTL file')
+    arg_parser.add_argument('ttl_file', help='TTL file with geometries')
+    arg_parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes (default: CPU count)')
+    args = arg_parser.parse_args()
+
+    data = parse_ttl_file(args.ttl_file, streaming=True)
+    start_time = time.time()
+    _, lod_report = simplify_geometries(data['geometries'], args.jobs)
+    print_lod_report(lod_report)
+    print(f"\n⏱️  Simplified in {time.time() - start_time:.2f}s with {args.jobs} worker processes")
@@ -7,12 +7,23 @@ Orchestrates the full import process for Admin, Electoral, and Postal hierarchie
 import os
 import sys
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dotenv import load_dotenv
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 import time
 
 from ttl_parser import QPMParser
 from neo4j_importer import Neo4jImporter
+from adaptive_batches import TARGET_SECONDS, print_sizer_report
+from parse_cache import ParseCache, cache_from_env, extract_files
+from record_store import concat_records
+from import_pipeline import pipeline_sources, run_pipeline
+from delta_import import ManifestStore, apply_deltas, compute_delta, manifest_store_from_env, print_delta_summary
+from geometry_codec import GEOMETRY_ENCODINGS
+from geometry_dedup import GeometryDeduplicator
+from bulk_export import BulkExporter
+from geometry_simplify import merge_lod_reports, new_lod_report, print_lod_report, simplify_geometries
 
 
 def load_config():
@@ -38,7 +49,11 @@ def load_config():
 def import_hierarchy(parser: QPMParser, importer: Neo4jImporter,
                      hierarchy_file: str, places_file: str,
                      place_geometry_file: str,
-                     hierarchy_type: str):
+                     hierarchy_type: str,
+                     cache: Optional[ParseCache] = None,
+                     lod_jobs: int = 0,
+                     dedup: Optional[GeometryDeduplicator] = None,
+                     streaming: bool = False):
     """
     Import a single hierarchy (Admin, Electoral, or Postal).
 
@@ -49,6 +64,10 @@ def import_hierarchy(parser: QPMParser, importer: Neo4jImporter,
         places_file: Path to places TTL file (optional)
         place_geometry_file: Path to place geometry TTL file (optional)
         hierarchy_type: Type of hierarchy ("Admin", "Electoral", "Postal")
+        cache: Parse cache to reuse extraction results from (optional)
+        lod_jobs: Worker processes for level-of-detail simplification (0: skip it)
+        dedup: Registry that drops geometries with an already imported shape (optional)
+        streaming: Parse with the streaming reader instead of an rdflib graph
     """
     print(f"\n{'='*60}")
     print(f"📦 Importing {hierarchy_type} Hierarchy")
@@ -56,69 +75,334 @@ def import_hierarchy(parser: QPMParser, importer: Neo4jImporter,
 
     start_time = time.time()
 
-    # Parse hierarchy file
-    print(f"📖 Parsing {hierarchy_type} hierarchy file...")
-    parser.parse_file(hierarchy_file)
+    # Places and place geometry files are optional, the hierarchy file is not
+    if not hierarchy_file or not os.path.exists(hierarchy_file):
+        raise FileNotFoundError(f"{hierarchy_type} hierarchy file not found: {hierarchy_file}")
 
-    # Extract data
-    hierarchies = parser.extract_hierarchies()
-    units = parser.extract_units()
-    geometries = parser.extract_geometries()
-    relationships = parser.extract_relationships()
+    # Parse the hierarchy file, then the places and place geometry files on
+    # top of it; each result holds only what that file added
+    print(f"📖 Parsing {hierarchy_type} hierarchy files...")
+    hierarchy_data, places_data, place_geometry_data = extract_files(
+        parser, [hierarchy_file, places_file, place_geometry_file], cache, streaming
+    )
+
+    if lod_jobs:
+        print(f"🪶 Simplifying {hierarchy_type} polygons into levels of detail...")
+        lod_report = new_lod_report()
+        for file_data in (hierarchy_data, places_data, place_geometry_data):
+            if file_data and file_data['geometries']:
+                file_data['geometries'], file_report = simplify_geometries(file_data['geometries'], lod_jobs)
+                merge_lod_reports(lod_report, file_report)
+        print_lod_report(lod_report)
+
+    if dedup is not None:
+        # Register every geometry of the hierarchy before redirecting relationships
+        files = [d for d in (hierarchy_data, places_data, place_geometry_data) if d]
+        for file_data in files:
+            file_data['geometries'] = dedup.dedup_geometries(file_data['geometries'], hierarchy_type)
+        for file_data in files:
+            file_data['relationships'] = dedup.rewrite_relationships(file_data['relationships'])
 
     # Import into Neo4j
     print(f"\n💾 Importing {hierarchy_type} data into Neo4j...")
 
     # Import hierarchies (only once)
-    if hierarchies:
-        importer.import_hierarchies(hierarchies)
+    if hierarchy_data['hierarchies']:
+        importer.import_hierarchies(hierarchy_data['hierarchies'])
 
     # Import units with hierarchy-specific label
-    if units:
-        importer.import_units(units, hierarchy_type)
+    if hierarchy_data['units']:
+        importer.import_units(hierarchy_data['units'], hierarchy_type)
 
     # Import geometries
-    if geometries:
-        importer.import_geometries(geometries)
+    if hierarchy_data['geometries']:
+        importer.import_geometries(hierarchy_data['geometries'])
 
     # Import relationships
-    if relationships:
-        importer.import_relationships(relationships)
+    if hierarchy_data['relationships']:
+        importer.import_relationships(hierarchy_data['relationships'])
 
-    # Parse and import places if provided
-    if places_file and os.path.exists(places_file):
-        print(f"\n📖 Parsing {hierarchy_type} places file...")
-        parser.graph.parse(places_file, format='turtle')
+    # Import places if provided
+    if places_data:
+        if places_data['places']:
+            importer.import_places(places_data['places'])
 
-        places = parser.extract_places()
-        place_geoms = parser.extract_geometries()
-        place_rels = parser.extract_relationships()
+        if places_data['geometries']:
+            importer.import_geometries(places_data['geometries'])
 
-        if places:
-            importer.import_places(places)
+        if places_data['relationships']:
+            importer.import_relationships(places_data['relationships'])
 
-        if place_geoms:
-            importer.import_geometries(place_geoms)
+    # Import place geometries if provided
+    if place_geometry_data:
+        if place_geometry_data['geometries']:
+            importer.import_geometries(place_geometry_data['geometries'])
 
-        if place_rels:
-            importer.import_relationships(place_rels)
+        if place_geometry_data['relationships']:
+            importer.import_relationships(place_geometry_data['relationships'])
 
-    # Parse and import place geometries if provided
-    if place_geometry_file and os.path.exists(place_geometry_file):
-        print(f"\n📖 Parsing {hierarchy_type} place geometry file...")
-        parser.graph.parse(place_geometry_file, format='turtle')
+    elapsed = time.time() - start_time
+    print(f"\n✅ {hierarchy_type} hierarchy imported in {elapsed:.2f} seconds")
 
-        geom_geometries = parser.extract_geometries()
-        geom_rels = parser.extract_relationships()
 
-        if geom_geometries:
-            importer.import_geometries(geom_geometries)
+def extract_hierarchy_data(hierarchy: Dict[str, Any], cache: Optional[ParseCache] = None,
+                           compact: bool = False, lod_jobs: int = 0,
+                           streaming: bool = False) -> Dict[str, Any]:
+    """
+    Parse and extract one hierarchy without touching Neo4j.
 
-        if geom_rels:
-            importer.import_relationships(geom_rels)
+    Runs in a worker process for --jobs mode, so it only returns plain
+    record lists that can be sent back to the coordinator.
 
-    elapsed = time.time() - start_time
-    print(f"\n✅ {hierarchy_type} hierarchy imported in {elapsed:.2f} seconds")
+    Args:
+        hierarchy: Hierarchy entry as built in main() (type and file paths)
+        cache: Parse cache to reuse extraction results from (optional)
+        compact: Keep records in column-backed RecordStores
+        lod_jobs: Worker processes for level-of-detail simplification (0: skip it)
+        streaming: Parse with the streaming reader instead of an rdflib graph
+
+    Returns:
+        Dictionary with the hierarchy type, extracted records, parse time
+        and the level-of-detail report (None when skipped)
+    """
+    start_time = time.time()
+    if not hierarchy['hierarchy_file'] or not os.path.exists(hierarchy['hierarchy_file']):
+        raise FileNotFoundError(f"{hierarchy['type']} hierarchy file not found: {hierarchy['hierarchy_file']}")
+
+    hierarchy_data, places_data, place_geometry_data = extract_files(
+        QPMParser(compact=compact),
+        [hierarchy['hierarchy_file'], hierarchy.get('places_file'), hierarchy.get('place_geometry_file')],
+        cache, streaming
+    )
+    # Places and place geometries, same selection as import_hierarchy()
+    extra_files = [d for d in (places_data, place_geometry_data) if d]
+    data = {
+        'hierarchies': hierarchy_data['hierarchies'],
+        'units': hierarchy_data['units'],
+        'places': places_data['places'] if places_data else [],
+        'geometries': concat_records('geometry', [hierarchy_data['geometries']] +
+                                     [d['geometries'] for d in extra_files]),
+        'relationships': concat_records('relationship', [hierarchy_data['relationships']] +
+                                        [d['relationships'] for d in extra_files]),
+    }
+
+    lod_report = None
+    if lod_jobs:
+        data['geometries'], lod_report = simplify_geometries(data['geometries'], lod_jobs)
+
+    return {
+        'type': hierarchy['type'],
+        'data': data,
+        'parse_time': time.time() - start_time,
+        'lod_report': lod_report,
+    }
+
+
+def import_hierarchies_parallel(importer: Neo4jImporter, hierarchies: List[Dict[str, Any]],
+                                jobs: int, cache: Optional[ParseCache] = None,
+                                compact: bool = False, lod: bool = False,
+                                dedup: Optional[GeometryDeduplicator] = None,
+                                streaming: bool = False) -> Dict[str, float]:
+    """
+    Parse hierarchies in worker processes and write them from this process.
+
+    Nodes are written as soon as each worker finishes (hierarchies first,
+    then units, places and geometries), so writing overlaps with the
+    remaining parses. Relationships are held back until every hierarchy's
+    nodes exist, because edges can point across hierarchy files.
+
+    Args:
+        importer: Neo4jImporter instance
+        hierarchies: Hierarchy entries as built in main()
+        jobs: Number of worker processes
+        cache: Parse cache to reuse extraction results from (optional)
+        compact: Have workers return column-backed RecordStores (smaller to send back)
+        lod: Have workers add level-of-detail WKT to polygon geometries
+        dedup: Registry that drops geometries with an already imported shape (optional);
+            hashing runs here, as hierarchies arrive in submission order
+        streaming: Have workers parse with the streaming reader instead of an rdflib graph
+
+    Returns:
+        Seconds spent per stage
+    """
+    timings = {}
+    pending_relationships = []
+
+    def timed(stage: str, func, *args):
+        stage_start = time.time()
+        func(*args)
+        timings[stage] = timings.get(stage, 0.0) + time.time() - stage_start
+
+    print(f"\n⚙️  Parsing {len(hierarchies)} hierarchies with {jobs} worker processes...")
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # Workers simplify their own geometries in-process; hierarchies already run in parallel
+        futures = [executor.submit(extract_hierarchy_data, hierarchy, cache, compact, 1 if lod else 0, streaming)
+                   for hierarchy in hierarchies]
+
+        # Deduplication keeps the first copy of each shape, so with a registry the
+        # hierarchies are taken in submission order for the same result every run
+        for future in (futures if dedup is not None else as_completed(futures)):
+            result = future.result()
+            hierarchy_type = result['type']
+            data = result['data']
+            timings[f"Parse + extract ({hierarchy_type}, worker)"] = result['parse_time']
+            if result['lod_report']:
+                print(f"\n🪶 {hierarchy_type}:", end='')
+                print_lod_report(result['lod_report'])
+
+            if dedup is not None:
+                data['geometries'] = dedup.dedup_geometries(data['geometries'], hierarchy_type)
+
+            print(f"\n💾 Writing {hierarchy_type} nodes into Neo4j...")
+            if data['hierarchies']:
+                timed("Write hierarchies", importer.import_hierarchies, data['hierarchies'])
+            if data['units']:
+                timed("Write units", importer.import_units, data['units'], hierarchy_type)
+            if data['places']:
+                timed("Write places", importer.import_places, data['places'])
+            if data['geometries']:
+                timed("Write geometries", importer.import_geometries, data['geometries'])
+
+            pending_relationships.extend(data['relationships'])
+
+    if pending_relationships:
+        if dedup is not None:
+            pending_relationships = dedup.rewrite_relationships(pending_relationships)
+        print("\n🔗 Writing relationships for all hierarchies...")
+        timed("Write relationships", importer.import_relationships, pending_relationships)
+
+    return timings
+
+
+def import_hierarchies_delta(importer: Neo4jImporter, hierarchies: List[Dict[str, Any]],
+                             cache: Optional[ParseCache], store: ManifestStore,
+                             compact: bool = False, lod_jobs: int = 0,
+                             dedup: Optional[GeometryDeduplicator] = None, streaming: bool = False):
+    """
+    Apply only what changed since the last delta import.
+
+    Each hierarchy's snapshot is diffed against its stored fingerprint
+    manifest; the manifests are updated once every delta has been applied.
+    Removed geometries that the stored manifests of other hierarchies still
+    reference are kept.
+
+    Args:
+        importer: Neo4jImporter instance
+        hierarchies: Hierarchy entries as built in main()
+        cache: Parse cache to reuse extraction results from (optional)
+        store: Manifest store holding the last imported snapshots
+        compact: Keep records in column-backed RecordStores
+        lod_jobs: Worker processes for level-of-detail simplification (0: skip it)
+        dedup: Registry that drops geometries with an already imported shape (optional);
+            snapshots are diffed after deduplication
+        streaming: Parse with the streaming reader instead of an rdflib graph
+    """
+    deltas = []
+    for hierarchy in hierarchies:
+        hierarchy_type = hierarchy['type']
+        print(f"\n📦 Diffing {hierarchy_type} snapshot...")
+        result = extract_hierarchy_data(hierarchy, cache, compact, lod_jobs, streaming)
+        data = result['data']
+        if result['lod_report']:
+            print_lod_report(result['lod_report'])
+        if dedup is not None:
+            data['geometries'] = dedup.dedup_geometries(data['geometries'], hierarchy_type)
+            data['relationships'] = dedup.rewrite_relationships(data['relationships'])
+
+        previous = store.load(hierarchy_type)
+        if previous is None:
+            print(f"ℹ️  No manifest for {hierarchy_type}; every record is treated as new and MERGEd")
+
+        delta = compute_delta(previous, data)
+        print_delta_summary(hierarchy_type, delta)
+        deltas.append((hierarchy_type, delta))
+
+    others = store.load_others([hierarchy['type'] for hierarchy in hierarchies])
+    apply_deltas(importer, deltas, others)
+
+    for hierarchy_type, delta in deltas:
+        store.save(hierarchy_type, delta['manifest'])
+
+
+def hierarchy_entries(selection: str) -> List[Dict[str, Any]]:
+    """
+    Hierarchy entries (type and file paths from .env) for a --hierarchy choice.
+
+    Args:
+        selection: 'admin', 'electoral', 'postal' or 'all'
+
+    Returns:
+        List of entries with 'type', 'hierarchy_file', 'places_file' and 'place_geometry_file'
+    """
+    hierarchies_to_import = []
+
+    if selection in ['admin', 'all']:
+        hierarchies_to_import.append({
+            'type': 'Admin',
+            'hierarchy_file': os.getenv('ADMIN_HIERARCHY_FILE',
+                                       '../Hierarchy_Full_with_names_and_places/Admin_Hierarchy.ttl'),
+            'places_file': os.getenv('ADMIN_PLACES_FILE',
+                                    '../Hierarchy_Full_with_names_and_places/Admin_Full_places52.ttl'),
+            'place_geometry_file': os.getenv('ADMIN_PLACE_GEOMETRY_FILE',
+                                             '../QPM_Place_Graph_populated_Wales.ttl')
+        })
+
+    if selection in ['electoral', 'all']:
+        hierarchies_to_import.append({
+            'type': 'Electoral',
+            'hierarchy_file': os.getenv('ELECTORAL_HIERARCHY_FILE',
+                                       '../Hierarchy_Full_with_names_and_places/Electoral Hierarchy.ttl'),
+            'places_file': None,  # Electoral places in same file
+            'place_geometry_file': None
+        })
+
+    if selection in ['postal', 'all']:
+        hierarchies_to_import.append({
+            'type': 'Postal',
+            'hierarchy_file': os.getenv('POSTAL_HIERARCHY_FILE',
+                                       '../Hierarchy_Full_with_names_and_places/Postal_hierarchy.ttl'),
+            'places_file': None,  # Postal places in same file
+            'place_geometry_file': None
+        })
+
+    return hierarchies_to_import
+
+
+def export_hierarchies_bulk(exporter: BulkExporter, hierarchies: List[Dict[str, Any]],
+                            cache: Optional[ParseCache] = None, compact: bool = False,
+                            lod_jobs: int = 0, dedup: Optional[GeometryDeduplicator] = None,
+                            streaming: bool = False):
+    """
+    Write hierarchies as neo4j-admin import files instead of importing them.
+
+    Args:
+        exporter: BulkExporter writing the CSVs
+        hierarchies: Hierarchy entries as built by hierarchy_entries()
+        cache: Parse cache to reuse extraction results from (optional)
+        compact: Keep records in column-backed RecordStores
+        lod_jobs: Worker processes for level-of-detail simplification (0: skip it)
+        dedup: Registry that drops geometries with an already exported shape (optional)
+        streaming: Parse with the streaming reader instead of an rdflib graph
+    """
+    for hierarchy in hierarchies:
+        result = extract_hierarchy_data(hierarchy, cache, compact, lod_jobs, streaming)
+        data = result['data']
+        if result['lod_report']:
+            print_lod_report(result['lod_report'])
+        if dedup is not None:
+            data['geometries'] = dedup.dedup_geometries(data['geometries'], hierarchy['type'])
+            data['relationships'] = dedup.rewrite_relationships(data['relationships'])
+        exporter.add_hierarchy(data, hierarchy['type'])
+    exporter.close()
+
+
+def print_timings(timings: Dict[str, float]):
+    """Print a per-stage timing breakdown."""
+    print("\n⏱️  Stage timings:")
+    width = max(len(stage) for stage in timings)
+    for stage, seconds in timings.items():
+        print(f"  {stage:<{width}}  {seconds:8.2f} s")
 
 
 def main():
@@ -137,6 +421,95 @@ def main():
         default='all',
         help='Which hierarchy to import'
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Parse hierarchies in N worker processes (default: 1, sequential)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always re-parse TTL files instead of using the parse cache'
+    )
+    parser.add_argument(
+        '--delta',
+        action='store_true',
+        help='Apply only records added, changed or removed since the last --delta import'
+    )
+    parser.add_argument(
+        '--compact-records',
+        action='store_true',
+        help='Hold extracted records in typed column arrays instead of dicts to reduce memory'
+    )
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Parse TTL files with the streaming reader instead of an rdflib graph (falls back on unsupported syntax); '
+             'without --jobs, --delta or --bulk-export, records are written as they are read, as with --pipeline'
+    )
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='Stream records into Neo4j while parsing, with bounded memory (MERGE writes)'
+    )
+    parser.add_argument(
+        '--memory-limit-mb',
+        type=int,
+        default=256,
+        help='With --pipeline: maximum MB of batches buffered between parser and writer (default: 256)'
+    )
+    parser.add_argument(
+        '--lod',
+        action='store_true',
+        help='Store simplified level-of-detail WKT (wkt_lod0..3) on polygon geometries'
+    )
+    parser.add_argument(
+        '--geometry-encoding',
+        choices=GEOMETRY_ENCODINGS,
+        default='wkt',
+        help='Also store each geometry as binary geometry_bin: wkb or quantised delta varints (default: wkt only)'
+    )
+    parser.add_argument(
+        '--drop-wkt',
+        action='store_true',
+        help='With --geometry-encoding wkb/varint: store only geometry_bin, not the WKT text'
+    )
+    parser.add_argument(
+        '--spatial-cells',
+        choices=['h3', 'h3+s2'],
+        default=None,
+        help='Derive H3 (and S2) cells for geometries and build the H3Cell lookup table (needs h3/s2sphere)'
+    )
+    parser.add_argument(
+        '--dedup-geometries',
+        action='store_true',
+        help='Store each distinct shape once (content hash) and point relationships at the shared copy'
+    )
+    parser.add_argument(
+        '--write-workers',
+        type=int,
+        default=1,
+        help='Concurrent Neo4j write sessions, batches partitioned to avoid lock conflicts (default: 1)'
+    )
+    parser.add_argument(
+        '--target-batch-seconds',
+        type=float,
+        default=None,
+        help='Grow or shrink batches (from BATCH_SIZE) towards this transaction latency; 0 keeps BATCH_SIZE '
+             f'(default: {TARGET_SECONDS}, fixed with --pipeline)'
+    )
+    parser.add_argument(
+        '--bulk-export',
+        metavar='DIR',
+        help='Write neo4j-admin import CSVs (and import.sh) to DIR instead of importing; '
+             'for a first load into an empty database'
+    )
+    parser.add_argument(
+        '--bulk-compress',
+        action='store_true',
+        help='With --bulk-export: gzip the data files'
+    )
     parser.add_argument(
         '--ontology',
         type=str,
@@ -144,6 +517,23 @@ def main():
     )
 
     args = parser.parse_args()
+    # A sequential --stream import hands records straight to the pipeline writer instead of collecting them
+    use_pipeline = args.pipeline or (args.stream and args.jobs <= 1 and not args.delta and not args.bulk_export)
+
+    # The pipeline writes fixed-size batches in one session from records it does not keep
+    if args.pipeline:
+        for flag, given in (('--jobs', args.jobs > 1), ('--delta', args.delta), ('--bulk-export', args.bulk_export)):
+            if given:
+                parser.error(f"--pipeline cannot be combined with {flag}")
+    if use_pipeline:
+        mode = '--pipeline' if args.pipeline else '--stream without --jobs, --delta or --bulk-export'
+        for flag, given in (('--write-workers', args.write_workers > 1),
+                            ('--target-batch-seconds', args.target_batch_seconds),
+                            ('--compact-records', args.compact_records)):
+            if given:
+                parser.error(f"{flag} is not supported with {mode}")
+    if args.target_batch_seconds is None:
+        args.target_batch_seconds = 0 if use_pipeline else TARGET_SECONDS
 
     # Load configuration
     config = load_config()
@@ -159,8 +549,38 @@ def main():
     print(f"  Neo4j URI: {config['neo4j_uri']}")
     print(f"  Neo4j User: {config['neo4j_user']}")
     print(f"  Batch Size: {config['batch_size']}")
+    print(f"  Write workers: {args.write_workers}")
+    print(f"  Target batch latency: {f'{args.target_batch_seconds}s' if args.target_batch_seconds else 'fixed'}")
     print(f"  Clear DB: {config['clear_db']}")
     print(f"  Hierarchy: {args.hierarchy}")
+    print(f"  Jobs: {args.jobs}")
+    print(f"  Parse cache: {'not used' if use_pipeline else 'disabled' if args.no_cache else 'enabled'}")
+    print(f"  Delta import: {args.delta}")
+    print(f"  Compact records: {args.compact_records}")
+    print(f"  Streaming parse: {args.stream}")
+    print(f"  Levels of detail: {args.lod}")
+    print(f"  Spatial cells: {args.spatial_cells or 'none'}")
+    print(f"  Deduplicate geometries: {args.dedup_geometries}")
+    print(f"  Geometry encoding: {args.geometry_encoding}"
+          f"{' (binary only)' if args.drop_wkt and args.geometry_encoding != 'wkt' else ''}")
+    if use_pipeline:
+        print(f"  Pipeline: memory limit {args.memory_limit_mb} MB")
+
+    if args.bulk_export:
+        print(f"  Bulk export: {args.bulk_export}{' (gzip)' if args.bulk_compress else ''}")
+        export_start = time.time()
+        dedup = GeometryDeduplicator() if args.dedup_geometries else None
+        exporter = BulkExporter(args.bulk_export, args.bulk_compress, args.geometry_encoding,
+                                not args.drop_wkt, args.spatial_cells)
+        export_hierarchies_bulk(exporter, hierarchy_entries(args.hierarchy),
+                                cache_from_env(enabled=not args.no_cache), args.compact_records,
+                                (os.cpu_count() or 1) if args.lod else 0, dedup, args.stream)
+        if dedup is not None:
+            dedup.print_report()
+        print(f"\n⏱️  Total export time: {time.time() - export_start:.2f} seconds")
+        print("ℹ️  After neo4j-admin import, start the database and run "
+              "python bulk_export.py --post-import for constraints, indexes and place locations")
+        return
 
     if config['clear_db']:
         response = input("\n⚠️  WARNING: This will DELETE ALL DATA in the database. Continue? (yes/no): ")
@@ -176,67 +596,78 @@ def main():
         config['neo4j_password']
     )
     importer.batch_size = config['batch_size']
+    importer.geometry_encoding = args.geometry_encoding
+    importer.keep_wkt = not args.drop_wkt
+    importer.spatial_cells = args.spatial_cells
+    importer.write_workers = args.write_workers
+    importer.target_batch_seconds = args.target_batch_seconds or None
 
     try:
         # Clear database if requested
+        manifest_store = manifest_store_from_env()
         if config['clear_db']:
             importer.clear_database(confirm=True)
+            # Manifests describe the data that was just deleted
+            manifest_store.clear()
 
         # Create schema (constraints and indexes)
         print("\n📐 Setting up database schema...")
         importer.create_constraints_and_indexes()
 
         # Determine which hierarchies to import
-        hierarchies_to_import = []
-
-        if args.hierarchy in ['admin', 'all']:
-            hierarchies_to_import.append({
-                'type': 'Admin',
-                'hierarchy_file': os.getenv('ADMIN_HIERARCHY_FILE',
-                                           '../Hierarchy_Full_with_names_and_places/Admin_Hierarchy.ttl'),
-                'places_file': os.getenv('ADMIN_PLACES_FILE',
-                                        '../Hierarchy_Full_with_names_and_places/Admin_Full_places52.ttl'),
-                'place_geometry_file': os.getenv('ADMIN_PLACE_GEOMETRY_FILE',
-                                                 '../QPM_Place_Graph_populated_Wales.ttl')
-            })
-
-        if args.hierarchy in ['electoral', 'all']:
-            hierarchies_to_import.append({
-                'type': 'Electoral',
-                'hierarchy_file': os.getenv('ELECTORAL_HIERARCHY_FILE',
-                                           '../Hierarchy_Full_with_names_and_places/Electoral Hierarchy.ttl'),
-                'places_file': None,  # Electoral places in same file
-                'place_geometry_file': None
-            })
-
-        if args.hierarchy in ['postal', 'all']:
-            hierarchies_to_import.append({
-                'type': 'Postal',
-                'hierarchy_file': os.getenv('POSTAL_HIERARCHY_FILE',
-                                           '../Hierarchy_Full_with_names_and_places/Postal_hierarchy.ttl'),
-                'places_file': None,  # Postal places in same file
-                'place_geometry_file': None
-            })
+        hierarchies_to_import = hierarchy_entries(args.hierarchy)
 
         # Import each hierarchy
         total_start = time.time()
-
-        for hierarchy in hierarchies_to_import:
-            # Create a fresh parser for each hierarchy
-            qpm_parser = QPMParser()
-
-            import_hierarchy(
-                qpm_parser,
-                importer,
-                hierarchy['hierarchy_file'],
-                hierarchy['places_file'],
-                hierarchy.get('place_geometry_file'),
-                hierarchy['type']
-            )
+        timings = {}
+        cache = cache_from_env(enabled=not args.no_cache)
+        lod_jobs = (os.cpu_count() or 1) if args.lod else 0
+        dedup = GeometryDeduplicator() if args.dedup_geometries else None
+
+        if args.delta:
+            import_hierarchies_delta(importer, hierarchies_to_import, cache, manifest_store,
+                                     args.compact_records, lod_jobs, dedup, args.stream)
+        elif use_pipeline:
+            timings = run_pipeline(importer, pipeline_sources(hierarchies_to_import), args.memory_limit_mb,
+                                   lod=args.lod, dedup=dedup)
+        elif args.jobs > 1:
+            timings = import_hierarchies_parallel(importer, hierarchies_to_import, args.jobs, cache,
+                                                 args.compact_records, args.lod, dedup, args.stream)
+        else:
+            for hierarchy in hierarchies_to_import:
+                # Create a fresh parser for each hierarchy
+                qpm_parser = QPMParser(compact=args.compact_records)
+
+                import_hierarchy(
+                    qpm_parser,
+                    importer,
+                    hierarchy['hierarchy_file'],
+                    hierarchy['places_file'],
+                    hierarchy.get('place_geometry_file'),
+                    hierarchy['type'],
+                    cache,
+                    lod_jobs,
+                    dedup,
+                    args.stream
+                )
+
+        if dedup is not None:
+            dedup.print_report()
 
         # Create inverse relationships for easier querying
         print("\n🔄 Creating inverse relationships...")
+        inverse_start = time.time()
         importer.create_inverse_relationships()
+        timings["Inverse relationships"] = time.time() - inverse_start
+
+        location_start = time.time()
+        importer.create_place_locations()
+        timings["Place locations"] = time.time() - location_start
+
+        if args.spatial_cells:
+            cells_start = time.time()
+            importer.create_cell_index()
+            timings["Cell lookup table"] = time.time() - cells_start
 
         # Print final statistics
         print("\n" + "="*60)
@@ -248,6 +679,12 @@ def main():
             print(f"  {label}: {count:,}")
 
         total_elapsed = time.time() - total_start
+        if args.jobs > 1 or use_pipeline:
+            print_timings(timings)
+        if importer.parallel_writer is not None:
+            importer.parallel_writer.print_report()
+        if args.target_batch_seconds:
+            print_sizer_report(importer.batch_sizers)
         print(f"\n⏱️  Total import time: {total_elapsed:.2f} seconds")
         print("\n✅ All done! Your Neo4j database is ready.")
 
@@ -0,0 +1,305 @@
+"""
+Bounded-Memory Streaming Import Pipeline
+Streams records from TTL files into Neo4j while parsing continues, with
+backpressure so queued batches stay within a fixed memory limit
+"""
+
+import os
+import pickle
+import tempfile
+import threading
+import queue
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from geometry_dedup import GeometryDeduplicator
+from geometry_simplify import merge_lod_reports, new_lod_report, print_lod_report, simplify_geometries
+from neo4j_importer import Neo4jImporter
+from record_store import dict_record_bytes
+from ttl_parser import UPDATE_KINDS, UPDATED_KINDS, QPMParser
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+_END = object()  # Queue sentinel: the reader has finished
+
+_GEOMETRY_KINDS = ('geometry', UPDATE_KINDS['geometry'])
+
+
+class _ByteBudget:
+    """
+    Blocks producers while queued batches exceed a byte limit.
+
+    A single batch larger than the limit is still let through when nothing
+    else is queued, so an undersized limit slows the pipeline down instead
+    of deadlocking it.
+    """
+
+    def __init__(self, limit_bytes: int):
+        self.limit_bytes = limit_bytes
+        self.used = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, size: int, stop: threading.Event) -> bool:
+        """Reserve size bytes; returns False if stop was set while waiting."""
+        with self._cond:
+            while self.used and self.used + size > self.limit_bytes:
+                if stop.is_set():
+                    return False
+                self._cond.wait(timeout=0.5)
+            self.used += size
+            self.peak = max(self.peak, self.used)
+            return True
+
+    def release(self, size: int):
+        with self._cond:
+            self.used -= size
+            self._cond.notify_all()
+
+
+class RelationshipSpill:
+    """
+    Relationship batches parked on disk until every node has been written.
+
+    Edges can point at nodes from files that have not been read yet, so
+    they are spilled to a temporary file instead of being held in memory.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix='qpm_rels_')
+        self.count = 0
+
+    def write(self, batch: List[Dict[str, Any]]):
+        pickle.dump(batch, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.count += len(batch)
+
+    def batches(self):
+        self._file.seek(0)
+        while True:
+            try:
+                yield pickle.load(self._file)
+            except EOFError:
+                return
+
+    def close(self):
+        self._file.close()
+
+
+def _batch_bytes(batch: List[Dict[str, Any]]) -> int:
+    """Approximate in-memory size of a batch of record dicts."""
+    return sum(dict_record_bytes(record) for record in batch) + 8 * len(batch)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and in bytes on macOS
+    return peak / 1024 ** 2 if os.uname().sysname == 'Darwin' else peak / 1024
+
+
+def pipeline_sources(hierarchies: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """
+    List the files to stream for hierarchy entries as built in import_all_hierarchies.main().
+
+    Returns:
+        (hierarchy type, file path) pairs for the files that exist
+
+    Raises:
+        FileNotFoundError: A hierarchy file is missing (places files are optional)
+    """
+    sources = []
+    for hierarchy in hierarchies:
+        for key in ('hierarchy_file', 'places_file', 'place_geometry_file'):
+            file_path = hierarchy.get(key)
+            if key == 'hierarchy_file' and (not file_path or not os.path.exists(file_path)):
+                raise FileNotFoundError(f"{hierarchy['type']} hierarchy file not found: {file_path}")
+            if not file_path:
+                continue
+            if os.path.exists(file_path):
+                sources.append((hierarchy['type'], file_path))
+            else:
+                print(f"⚠️  File not found, skipping: {file_path}")
+    return sources
+
+
+def run_pipeline(importer: Neo4jImporter, sources: List[Tuple[str, str]],
+                 memory_limit_mb: int = 256, lod: bool = False,
+                 dedup: Optional[GeometryDeduplicator] = None) -> Dict[str, float]:
+    """
+    Stream TTL files into Neo4j with overlapping parse and write.
+
+    A reader thread streams records block by block (no RDF graph is built),
+    cuts them into batches of importer.batch_size and hands node batches to
+    this thread through a queue bounded by memory_limit_mb; when the writer
+    falls behind, the reader blocks. Relationship batches are spilled to a
+    temporary file and replayed once every node has been written. All
+    writes MERGE, so records repeated across files are not duplicated, and
+    blocks that add properties to an entity read earlier are written as
+    updates that keep its other properties. A file the streaming reader
+    cannot parse is read from an rdflib graph instead.
+
+    Args:
+        importer: Neo4jImporter to write with
+        sources: (hierarchy type, file path) pairs, streamed in order
+        memory_limit_mb: Upper bound on batches buffered between reader and writer
+        lod: Add level-of-detail WKT to polygon geometry batches (in the reader thread)
+        dedup: Drop geometry batches' already seen shapes and redirect the
+            spilled relationships to the kept copies (optional)
+
+    Returns:
+        Seconds spent per stage (reader and writer stages overlap)
+    """
+    batch_size = importer.batch_size
+    budget = _ByteBudget(memory_limit_mb * 1024 * 1024)
+    batches = queue.Queue()
+    stop = threading.Event()
+    spill = RelationshipSpill()
+    timings = {}
+    lod_report = new_lod_report() if lod else None
+
+    def emit(kind: str, hierarchy_type: str, batch: List[Dict[str, Any]]) -> bool:
+        if lod and kind in _GEOMETRY_KINDS:
+            batch, batch_report = simplify_geometries(batch)
+            merge_lod_reports(lod_report, batch_report)
+        if dedup is not None and kind in _GEOMETRY_KINDS:
+            batch = dedup.dedup_geometries(batch, hierarchy_type)
+            if not batch:
+                return True
+        size = _batch_bytes(batch)
+        if not budget.acquire(size, stop):
+            return False
+        batches.put((kind, hierarchy_type, batch, size))
+        return True
+
+    def flush(pending: Dict[str, List[Dict[str, Any]]], kind: str, hierarchy_type: str) -> bool:
+        # An update must reach the writer after the full record it updates, whose SET nulls what it lacks
+        base = UPDATED_KINDS.get(kind)
+        if pending.get(base):
+            if not emit(base, hierarchy_type, pending[base]):
+                return False
+            pending[base] = []
+        if pending[kind] and not emit(kind, hierarchy_type, pending[kind]):
+            return False
+        pending[kind] = []
+        return True
+
+    def read():
+        parser = QPMParser()
+        parse_start = time.time()
+        try:
+            for hierarchy_type, file_path in sources:
+                print(f"📖 Streaming {file_path}...")
+                pending = {}
+                relationships = []
+
+                for kind, record in parser.iter_records(file_path, fallback=True):
+                    if stop.is_set():
+                        # The writer failed; don't parse and spill the rest
+                        return
+                    if kind == 'relationship':
+                        relationships.append(record)
+                        if len(relationships) >= batch_size:
+                            spill.write(relationships)
+                            relationships = []
+                        continue
+
+                    batch = pending.setdefault(kind, [])
+                    batch.append(record)
+                    if len(batch) >= batch_size and not flush(pending, kind, hierarchy_type):
+                        return
+
+                for kind in list(pending):
+                    if not flush(pending, kind, hierarchy_type):
+                        return
+                if relationships:
+                    spill.write(relationships)
+
+            timings["Parse (reader thread)"] = time.time() - parse_start
+
+            for batch in spill.batches():
+                if dedup is not None:
+                    batch = dedup.rewrite_relationships(batch)
+                if not emit('relationship', None, batch):
+                    return
+        except Exception as e:
+            batches.put(e)
+        finally:
+            batches.put(_END)
+
+    reader = threading.Thread(target=read, name='qpm-pipeline-reader', daemon=True)
+    wall_start = time.time()
+    reader.start()
+
+    counts = {}
+    write_time = {'nodes': 0.0, 'relationships': 0.0}
+    progress = tqdm(desc="Pipeline", unit=" records")
+
+    try:
+        while True:
+            item = batches.get()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            kind, hierarchy_type, batch, size = item
+            write_start = time.time()
+            importer.write_batch(kind, batch, hierarchy_type or "Admin", merge=True)
+            stage = 'relationships' if kind == 'relationship' else 'nodes'
+            write_time[stage] += time.time() - write_start
+
+            budget.release(size)
+            counts[kind] = counts.get(kind, 0) + len(batch)
+            progress.update(len(batch))
+    finally:
+        stop.set()
+        progress.close()
+        reader.join()
+        spill.close()
+
+    timings["Write nodes"] = write_time['nodes']
+    timings["Write relationships"] = write_time['relationships']
+    timings["Pipeline wall time"] = time.time() - wall_start
+
+    print("\n✅ Pipeline finished:")
+    for kind, count in counts.items():
+        print(f"  {kind}: {count:,}")
+    print(f"  Peak queued batches: {budget.peak / 1024 ** 2:.1f} MB (limit {memory_limit_mb} MB)")
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"  Peak RSS: {rss:.0f} MB")
+    if lod_report:
+        print_lod_report(lod_report)
+
+    return timings
+
+
+if __name__ == "__main__":
+    # Dry run against a stand-in importer that only counts writes
+    import sys
+
+    class _CountingImporter:
+        batch_size = 1000
+
+        def __init__(self):
+            self.written = 0
+
+        def write_batch(self, kind, batch, hierarchy_type="Admin", merge=False):
+            time.sleep(0.001)
+            self.written += len(batch)
+
+    if len(sys.argv) > 1:
+        counting = _CountingImporter()
+        stage_times = run_pipeline(counting, [("Admin", path) for path in sys.argv[1:]], memory_limit_mb=16)
+        for stage, seconds in stage_times.items():
+            print(f"  {stage}: {seconds:.2f}s")
+    else:
+        print("Usage: python import_pipeline.py <path_to_ttl_file> [...]")
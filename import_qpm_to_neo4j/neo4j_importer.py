@@ -4,14 +4,102 @@ Handles batch import of large-scale spatial data into Neo4j
 """
 
 from neo4j import GraphDatabase
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from tqdm import tqdm
 import time
 
+from concurrent.futures import ProcessPoolExecutor
+import os
+import re
+
+from adaptive_batches import TARGET_SECONDS, AdaptiveBatchSizer, execute_batch, write_batches
+from geometry_codec import encode_geometry_records
+from parallel_writer import ParallelWriter, relationship_lock_key
+from spatial_cells import H3_PROPERTIES, S2_PROPERTIES, add_cells
+from record_store import RecordStore
+from ttl_parser import UPDATED_KINDS
+from uri_codec import endpoint_kinds
+
+
+# Relationship types and the inverse created by create_inverse_relationships()
+INVERSE_RELATIONSHIPS = {
+    'CONTAINED_BY': 'HAS_CHILD_UNIT',
+    'CONTAINED_BY_UNIT': 'CHILD_OF_UNIT',
+    'BASE_PLACE_PARENT': 'BASE_PLACE_CHILD',
+}
+
+# Creates each inverse relationship that does not exist yet (child/parent order as in INVERSE_RELATIONSHIPS)
+INVERSE_RELATIONSHIP_QUERIES = [
+    # HAS_CHILD_UNIT (inverse of CONTAINED_BY)
+    """
+    MATCH (child:Unit)-[:CONTAINED_BY]->(parent:Unit)
+    WHERE NOT (parent)-[:HAS_CHILD_UNIT]->(child)
+    CREATE (parent)-[:HAS_CHILD_UNIT]->(child)
+    """,
+    # CHILD_OF_UNIT (inverse of CONTAINED_BY_UNIT)
+    """
+    MATCH (p:Place)-[:CONTAINED_BY_UNIT]->(u:Unit)
+    WHERE NOT (u)-[:CHILD_OF_UNIT]->(p)
+    CREATE (u)-[:CHILD_OF_UNIT]->(p)
+    """,
+    # BASE_PLACE_CHILD (inverse of BASE_PLACE_PARENT)
+    """
+    MATCH (child:Place)-[:BASE_PLACE_PARENT]->(parent:Place)
+    WHERE NOT (parent)-[:BASE_PLACE_CHILD]->(child)
+    CREATE (parent)-[:BASE_PLACE_CHILD]->(child)
+    """,
+]
+
+# Copies each place's main geometry location (and bbox corners) onto the Place node
+PLACE_LOCATION_QUERY = """
+MATCH (p:Place)-[:HAS_MAIN_GEOMETRY]->(g:Geometry)
+WHERE g.location IS NOT NULL
+SET p.location = g.location,
+    p.location_sw = g.location_sw,
+    p.location_ne = g.location_ne
+"""
+
+# Builds the (:H3Cell)-[:COVERS]->(:Geometry) table: drop stale covers, merge current
+# ones, then copy the centroid cells onto places and units
+CELL_INDEX_QUERIES = [
+    """
+    MATCH (c:H3Cell)-[r:COVERS]->(g:Geometry)
+    WHERE NOT c.cell_id IN coalesce(g.h3_cover, [])
+    DELETE r
+    """,
+    """
+    MATCH (g:Geometry) WHERE g.h3_cover IS NOT NULL
+    CALL {
+        WITH g
+        UNWIND g.h3_cover AS cell_id
+        MERGE (c:H3Cell {cell_id: cell_id})
+        MERGE (c)-[:COVERS]->(g)
+    } IN TRANSACTIONS OF 1000 ROWS
+    """,
+    f"""
+    MATCH (n)-[:HAS_MAIN_GEOMETRY]->(g:Geometry)
+    WHERE g.h3_cover IS NOT NULL AND (n:Place OR n:Unit)
+    SET {", ".join(f"n.{prop} = g.{prop}" for prop in H3_PROPERTIES + S2_PROPERTIES)}
+    """,
+]
+
+# Index-backed MATCH of a relationship endpoint per node kind (rel.from_kind / rel.to_kind)
+ENDPOINT_MATCHES = {
+    'unit': "MATCH ({end}:Unit {{spatial_unit_id: rel.{end}_id}})",
+    'place': "MATCH ({end}:Place {{place_id: rel.{end}_id}})",
+    'hierarchy': "MATCH ({end}:Hierarchy {{hierarchy_id: rel.{end}_id}})",
+    'geometry': "MATCH ({end}:Geometry {{geometry_id: split(rel.{end}_uri, '/')[-1]}})",
+}
+
+# A "node.property = row.property" (or "= point({...})") assignment in a MERGE node query
+_PROPERTY_SET_RE = re.compile(r'^(\s*(?:SET\s+)?)(\w+\.\w+) = (\w+\.\w+|point\(\{.*\}\))(,?)$', re.MULTILINE)
+
 
 class Neo4jImporter:
     """Handles batch import of QPM data into Neo4j"""
 
+    driver_factory = GraphDatabase  # AsyncGraphDatabase in AsyncNeo4jImporter
+
     def __init__(self, uri: str, user: str, password: str):
         """
         Initialize Neo4j connection.
@@ -21,11 +109,22 @@ class Neo4jImporter:
             user: Neo4j username
             password: Neo4j password
         """
-        self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        self.batch_size = 1000  # Default batch size for imports
+        self.driver = self.driver_factory.driver(uri, auth=(user, password))
+        self.batch_size = 1000  # Starting batch size for imports
+        self.target_batch_seconds = TARGET_SECONDS  # Adapt batch sizes to this latency; None keeps batch_size
+        self.batch_sizers: Dict[str, AdaptiveBatchSizer] = {}  # One controller per write stream
+        self.apoc_available = None  # Unknown until the first geometry write
+        self.geometry_encoding = 'wkt'  # Binary geometry_bin encoding: 'wkt' (none), 'wkb' or 'varint'
+        self.keep_wkt = True  # Keep g.wkt next to geometry_bin for WKT consumers
+        self.spatial_cells = None  # Derive cells on geometry writes: None, 'h3' or 'h3+s2'
+        self._cell_executor = None
+        self.write_workers = 1  # Concurrent write sessions; more than 1 partitions batches across them
+        self.parallel_writer = None  # Created by the first parallel write
 
     def close(self):
         """Close Neo4j connection."""
+        if self._cell_executor is not None:
+            self._cell_executor.shutdown()
         self.driver.close()
 
     def __enter__(self):
@@ -52,57 +151,86 @@ class Neo4jImporter:
             session.run("MATCH (n) DETACH DELETE n")
             print("✅ Database cleared")
 
+    def _schema_statements(self) -> Tuple[List[str], List[str]]:
+        """Constraint and index statements of the QPM schema."""
+        # Constraints
+        constraints = [
+            # Unit constraints
+            "CREATE CONSTRAINT unit_id_unique IF NOT EXISTS FOR (u:Unit) REQUIRE u.spatial_unit_id IS UNIQUE",
+
+            # Place constraints
+            "CREATE CONSTRAINT place_id_unique IF NOT EXISTS FOR (p:Place) REQUIRE p.place_id IS UNIQUE",
+
+            # Hierarchy constraints
+            "CREATE CONSTRAINT hierarchy_id_unique IF NOT EXISTS FOR (h:Hierarchy) REQUIRE h.hierarchy_id IS UNIQUE",
+            "CREATE CONSTRAINT hierarchy_name_unique IF NOT EXISTS FOR (h:Hierarchy) REQUIRE h.hierarchy_name IS UNIQUE",
+
+            # Geometry constraints
+            "CREATE CONSTRAINT geometry_id_unique IF NOT EXISTS FOR (g:Geometry) REQUIRE g.geometry_id IS UNIQUE",
+
+            # Cell lookup table
+            "CREATE CONSTRAINT h3_cell_id_unique IF NOT EXISTS FOR (c:H3Cell) REQUIRE c.cell_id IS UNIQUE",
+        ]
+
+        # Indexes
+        indexes = [
+            # Search indexes
+            "CREATE INDEX unit_name_index IF NOT EXISTS FOR (u:Unit) ON (u.unit_name)",
+            "CREATE INDEX place_name_index IF NOT EXISTS FOR (p:Place) ON (p.place_name)",
+
+            # Spatial query indexes
+            "CREATE INDEX unit_h3_index IF NOT EXISTS FOR (u:Unit) ON (u.unit_h3)",
+            "CREATE INDEX place_h3_index IF NOT EXISTS FOR (p:Place) ON (p.place_h3)",
+            "CREATE INDEX place_s2_index IF NOT EXISTS FOR (p:Place) ON (p.place_s2)",
+
+            # Hierarchy traversal indexes
+            "CREATE INDEX unit_level_index IF NOT EXISTS FOR (u:Unit) ON (u.unit_level)",
+            "CREATE INDEX place_level_index IF NOT EXISTS FOR (p:Place) ON (p.place_level)",
+
+            # Filtering indexes
+            "CREATE INDEX unit_type_index IF NOT EXISTS FOR (u:Unit) ON (u.unit_type)",
+            "CREATE INDEX place_type_index IF NOT EXISTS FOR (p:Place) ON (p.place_type)",
+            "CREATE INDEX place_function_index IF NOT EXISTS FOR (p:Place) ON (p.place_function)",
+
+            # Geometry role index
+            "CREATE INDEX geometry_role_index IF NOT EXISTS FOR (g:Geometry) ON (g.geometry_role)",
+
+            # Content hash of deduplicated shapes (see geometry_dedup.py)
+            "CREATE INDEX geometry_shape_hash_index IF NOT EXISTS FOR (g:Geometry) ON (g.shape_hash)",
+
+            # Geometry bounding box indexes (viewport filtering without parsing WKT)
+            "CREATE INDEX geometry_minx_index IF NOT EXISTS FOR (g:Geometry) ON (g.minx)",
+            "CREATE INDEX geometry_maxx_index IF NOT EXISTS FOR (g:Geometry) ON (g.maxx)",
+            "CREATE INDEX geometry_miny_index IF NOT EXISTS FOR (g:Geometry) ON (g.miny)",
+            "CREATE INDEX geometry_maxy_index IF NOT EXISTS FOR (g:Geometry) ON (g.maxy)",
+
+            # Native point indexes (point.withinBBox / point.distance)
+            "CREATE POINT INDEX geometry_location_index IF NOT EXISTS FOR (g:Geometry) ON (g.location)",
+            "CREATE POINT INDEX geometry_location_sw_index IF NOT EXISTS FOR (g:Geometry) ON (g.location_sw)",
+            "CREATE POINT INDEX geometry_location_ne_index IF NOT EXISTS FOR (g:Geometry) ON (g.location_ne)",
+            "CREATE POINT INDEX place_location_index IF NOT EXISTS FOR (p:Place) ON (p.location)",
+        ]
+
+        # Derived H3/S2 centroid cells (see spatial_cells.py)
+        for label, var in (('Geometry', 'g'), ('Place', 'p'), ('Unit', 'u')):
+            for prop in H3_PROPERTIES + S2_PROPERTIES:
+                indexes.append(f"CREATE INDEX {label.lower()}_{prop}_index IF NOT EXISTS "
+                               f"FOR ({var}:{label}) ON ({var}.{prop})")
+
+        return constraints, indexes
+
     def create_constraints_and_indexes(self):
         """Create all necessary constraints and indexes for the QPM schema."""
         print("📐 Creating constraints and indexes...")
+        constraints, indexes = self._schema_statements()
 
         with self.driver.session() as session:
-            # Constraints
-            constraints = [
-                # Unit constraints
-                "CREATE CONSTRAINT unit_id_unique IF NOT EXISTS FOR (u:Unit) REQUIRE u.spatial_unit_id IS UNIQUE",
-
-                # Place constraints
-                "CREATE CONSTRAINT place_id_unique IF NOT EXISTS FOR (p:Place) REQUIRE p.place_id IS UNIQUE",
-
-                # Hierarchy constraints
-                "CREATE CONSTRAINT hierarchy_id_unique IF NOT EXISTS FOR (h:Hierarchy) REQUIRE h.hierarchy_id IS UNIQUE",
-                "CREATE CONSTRAINT hierarchy_name_unique IF NOT EXISTS FOR (h:Hierarchy) REQUIRE h.hierarchy_name IS UNIQUE",
-
-                # Geometry constraints
-                "CREATE CONSTRAINT geometry_id_unique IF NOT EXISTS FOR (g:Geometry) REQUIRE g.geometry_id IS UNIQUE",
-            ]
-
             for constraint in tqdm(constraints, desc="Creating constraints"):
                 try:
                     session.run(constraint)
                 except Exception as e:
                     print(f"⚠️  Constraint may already exist: {e}")
 
-            # Indexes
-            indexes = [
-                # Search indexes
-                "CREATE INDEX unit_name_index IF NOT EXISTS FOR (u:Unit) ON (u.unit_name)",
-                "CREATE INDEX place_name_index IF NOT EXISTS FOR (p:Place) ON (p.place_name)",
-
-                # Spatial query indexes
-                "CREATE INDEX unit_h3_index IF NOT EXISTS FOR (u:Unit) ON (u.unit_h3)",
-                "CREATE INDEX place_h3_index IF NOT EXISTS FOR (p:Place) ON (p.place_h3)",
-                "CREATE INDEX place_s2_index IF NOT EXISTS FOR (p:Place) ON (p.place_s2)",
-
-                # Hierarchy traversal indexes
-                "CREATE INDEX unit_level_index IF NOT EXISTS FOR (u:Unit) ON (u.unit_level)",
-                "CREATE INDEX place_level_index IF NOT EXISTS FOR (p:Place) ON (p.place_level)",
-
-                # Filtering indexes
-                "CREATE INDEX unit_type_index IF NOT EXISTS FOR (u:Unit) ON (u.unit_type)",
-                "CREATE INDEX place_type_index IF NOT EXISTS FOR (p:Place) ON (p.place_type)",
-                "CREATE INDEX place_function_index IF NOT EXISTS FOR (p:Place) ON (p.place_function)",
-
-                # Geometry role index
-                "CREATE INDEX geometry_role_index IF NOT EXISTS FOR (g:Geometry) ON (g.geometry_role)",
-            ]
-
             for index in tqdm(indexes, desc="Creating indexes"):
                 try:
                     session.run(index)
@@ -111,261 +239,513 @@ class Neo4jImporter:
 
         print("✅ Constraints and indexes created")
 
-    def import_hierarchies(self, hierarchies: List[Dict[str, Any]]):
-        """Import Hierarchy nodes."""
-        print(f"🗂️  Importing {len(hierarchies)} hierarchies...")
+    def import_hierarchies(self, hierarchies: List[Dict[str, Any]], merge: bool = False):
+        """
+        Import Hierarchy nodes.
 
-        query = """
-        UNWIND $hierarchies AS h
-        CREATE (hierarchy:Hierarchy {
-            hierarchy_id: h.hierarchy_id,
-            hierarchy_name: h.hierarchy_name,
-            hierarchy_levels: h.hierarchy_levels,
-            units_number: h.units_number
-        })
+        Args:
+            hierarchies: List of hierarchy dictionaries
+            merge: MERGE on hierarchy_id and update properties instead of CREATE
         """
+        print(f"🗂️  Importing {len(hierarchies)} hierarchies...")
 
         with self.driver.session() as session:
-            session.run(query, hierarchies=hierarchies)
+            execute_batch(session, self._node_query('hierarchy', merge=merge), list(hierarchies))
 
         print(f"✅ Imported {len(hierarchies)} hierarchies")
 
-    def import_units(self, units: List[Dict[str, Any]], hierarchy_type: str = "Admin"):
+    def import_units(self, units: List[Dict[str, Any]], hierarchy_type: str = "Admin", merge: bool = False):
         """
         Import Unit nodes in batches.
 
         Args:
             units: List of unit dictionaries
             hierarchy_type: Type of hierarchy (Admin, Electoral, Postal)
+            merge: MERGE on spatial_unit_id and update properties instead of CREATE
         """
         print(f"🏢 Importing {len(units)} units ({hierarchy_type})...")
+        self._batch_import(units, self._node_query('unit', hierarchy_type, merge), "units",
+                           key='spatial_unit_id')
 
-        # Determine additional label based on hierarchy type
-        if hierarchy_type == "Admin":
-            label = "AdminUnit"
-        elif hierarchy_type == "Electoral":
-            label = "ElectoralUnit"
-        elif hierarchy_type == "Postal":
-            label = "PostalUnit"
-        else:
-            label = "Unit"
-
-        query = f"""
-        UNWIND $batch AS unit
-        CREATE (u:Unit:{label} {{
-            spatial_unit_id: unit.spatial_unit_id,
-            unit_name: unit.unit_name,
-            unit_type: unit.unit_type,
-            unit_level: unit.unit_level,
-            unit_h3: unit.unit_h3
-        }})
+    def import_places(self, places: List[Dict[str, Any]], merge: bool = False):
         """
+        Import Place nodes in batches.
 
-        self._batch_import(units, query, "units")
-
-    def import_places(self, places: List[Dict[str, Any]]):
-        """Import Place nodes in batches."""
-        print(f"📍 Importing {len(places)} places...")
-
-        query = """
-        UNWIND $batch AS place
-        CREATE (p:Place {
-            place_id: place.place_id,
-            place_name: place.place_name,
-            place_type: place.place_type,
-            place_function: place.place_function,
-            place_key: place.place_key,
-            place_level: place.place_level,
-            place_h3: place.place_h3,
-            place_s2: place.place_s2,
-            model_source: place.model_source,
-            geometry_source: place.geometry_source
-        })
+        Args:
+            places: List of place dictionaries
+            merge: MERGE on place_id and update properties instead of CREATE
         """
-
-        self._batch_import(places, query, "places")
+        print(f"📍 Importing {len(places)} places...")
+        self._batch_import(places, self._node_query('place', merge=merge), "places", key='place_id')
 
     def import_geometries(self, geometries: List[Dict[str, Any]]):
         """Import Geometry nodes in batches."""
         print(f"🗺️  Importing {len(geometries)} geometries...")
 
-        query = """
-        UNWIND $batch AS geom
-        MERGE (g:Geometry {geometry_id: geom.geometry_id})
-        ON CREATE SET
-            g.geometry_role = geom.geometry_role,
-            g.geometry_type = geom.geometry_type,
-            g.wkt = geom.wkt,
-            g.latitude = geom.latitude,
-            g.longitude = geom.longitude
-        ON MATCH SET
-            g.geometry_role = geom.geometry_role,
-            g.geometry_type = geom.geometry_type,
-            g.wkt = geom.wkt,
-            g.latitude = geom.latitude,
-            g.longitude = geom.longitude
-        WITH g
-        CALL apoc.do.when(
-            g.geometry_type = 'POINT',
-            'SET g:PointGeometry RETURN g',
-            'SET g:PolygonGeometry RETURN g',
-            {g: g}
-        ) YIELD value
-        RETURN value
-        """
-
         # Try with APOC first, fallback to simple import if APOC not available
         try:
-            self._batch_import(geometries, query, "geometries")
+            self._batch_import(geometries, self._node_query('geometry'), "geometries",
+                               self._encode_geometries, key='geometry_id')
         except Exception as e:
+            if self.apoc_available is False:
+                raise
             print(f"⚠️  APOC not available, using simple import: {e}")
+            self.apoc_available = False
+            self._batch_import(geometries, self._node_query('geometry'), "geometries",
+                               self._encode_geometries, key='geometry_id')
+
+    def _encode_geometries(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add the binary geometry property and spatial cells to a batch, per the importer settings."""
+        batch = encode_geometry_records(batch, self.geometry_encoding, self.keep_wkt)
+        if self.spatial_cells:
+            if self._cell_executor is None and (os.cpu_count() or 1) > 1:
+                self._cell_executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+            batch = add_cells(batch, s2='s2' in self.spatial_cells, executor=self._cell_executor)
+        return batch
+
+    def write_batch(self, kind: str, batch: List[Dict[str, Any]], hierarchy_type: str = "Admin",
+                    merge: bool = False):
+        """
+        Write one batch of records without progress output.
+
+        Used by callers that produce batches incrementally (e.g. the streaming
+        pipeline) instead of handing over complete record lists.
 
-            # Fallback query without APOC
-            simple_query = """
+        Args:
+            kind: Record kind ('hierarchy', 'unit', 'place', 'geometry' or
+                'relationship'), or a ttl_parser.UPDATE_KINDS value for
+                records that only set the properties they hold
+            batch: Records to write in one transaction
+            hierarchy_type: Type of hierarchy, for unit labels
+            merge: MERGE nodes and relationships instead of CREATE (geometries always MERGE)
+        """
+        partial = kind in UPDATED_KINDS
+        kind = UPDATED_KINDS.get(kind, kind)
+
+        with self.driver.session() as session:
+            if kind == 'relationship':
+                for (rel_type, from_kind, to_kind), rels in self._group_by_endpoints(batch).items():
+                    query = self._relationship_query(rel_type, merge, from_kind, to_kind)
+                    if query is None:
+                        print(f"⚠️  Unknown relationship type: {rel_type}")
+                        continue
+                    execute_batch(session, query, list(rels))
+                return
+
+            if kind == 'geometry':
+                batch = self._encode_geometries(batch)
+
+            if kind == 'geometry' and self.apoc_available is not False:
+                try:
+                    execute_batch(session, self._node_query('geometry', partial=partial), batch)
+                    self.apoc_available = True
+                    return
+                except Exception as e:
+                    if self.apoc_available:
+                        raise
+                    print(f"⚠️  APOC not available, using simple import: {e}")
+                    self.apoc_available = False
+
+            execute_batch(session, self._node_query(kind, hierarchy_type, merge, partial), batch)
+
+    def _node_query(self, kind: str, hierarchy_type: str = "Admin", merge: bool = False,
+                    partial: bool = False) -> str:
+        """
+        Cypher query writing one $batch of node records.
+
+        Args:
+            kind: Record kind ('hierarchy', 'unit', 'place' or 'geometry')
+            hierarchy_type: Type of hierarchy, for the extra unit label
+            merge: MERGE on the unique key and update properties instead of CREATE
+            partial: MERGE and set only the properties a record holds, keeping
+                the stored value of every property it lacks
+        """
+        if partial:
+            return _PROPERTY_SET_RE.sub(r'\1\2 = coalesce(\3, \2)\4', self._node_query(kind, hierarchy_type, True))
+
+        if kind == 'hierarchy':
+            if merge:
+                return """
+                UNWIND $batch AS h
+                MERGE (hierarchy:Hierarchy {hierarchy_id: h.hierarchy_id})
+                SET hierarchy.hierarchy_name = h.hierarchy_name,
+                    hierarchy.hierarchy_levels = h.hierarchy_levels,
+                    hierarchy.units_number = h.units_number
+                """
+            return """
+            UNWIND $batch AS h
+            CREATE (hierarchy:Hierarchy {
+                hierarchy_id: h.hierarchy_id,
+                hierarchy_name: h.hierarchy_name,
+                hierarchy_levels: h.hierarchy_levels,
+                units_number: h.units_number
+            })
+            """
+
+        if kind == 'unit':
+            # Determine additional label based on hierarchy type
+            if hierarchy_type == "Admin":
+                label = "AdminUnit"
+            elif hierarchy_type == "Electoral":
+                label = "ElectoralUnit"
+            elif hierarchy_type == "Postal":
+                label = "PostalUnit"
+            else:
+                label = "Unit"
+
+            if merge:
+                return f"""
+                UNWIND $batch AS unit
+                MERGE (u:Unit {{spatial_unit_id: unit.spatial_unit_id}})
+                SET u:{label},
+                    u.unit_name = unit.unit_name,
+                    u.unit_type = unit.unit_type,
+                    u.unit_level = unit.unit_level,
+                    u.unit_h3 = unit.unit_h3
+                """
+            return f"""
+            UNWIND $batch AS unit
+            CREATE (u:Unit:{label} {{
+                spatial_unit_id: unit.spatial_unit_id,
+                unit_name: unit.unit_name,
+                unit_type: unit.unit_type,
+                unit_level: unit.unit_level,
+                unit_h3: unit.unit_h3
+            }})
+            """
+
+        if kind == 'place':
+            if merge:
+                return """
+                UNWIND $batch AS place
+                MERGE (p:Place {place_id: place.place_id})
+                SET p.place_name = place.place_name,
+                    p.place_type = place.place_type,
+                    p.place_function = place.place_function,
+                    p.place_key = place.place_key,
+                    p.place_level = place.place_level,
+                    p.place_h3 = place.place_h3,
+                    p.place_s2 = place.place_s2,
+                    p.model_source = place.model_source,
+                    p.geometry_source = place.geometry_source
+                """
+            return """
+            UNWIND $batch AS place
+            CREATE (p:Place {
+                place_id: place.place_id,
+                place_name: place.place_name,
+                place_type: place.place_type,
+                place_function: place.place_function,
+                place_key: place.place_key,
+                place_level: place.place_level,
+                place_h3: place.place_h3,
+                place_s2: place.place_s2,
+                model_source: place.model_source,
+                geometry_source: place.geometry_source
+            })
+            """
+
+        if kind == 'geometry':
+            query = """
             UNWIND $batch AS geom
             MERGE (g:Geometry {geometry_id: geom.geometry_id})
-            ON CREATE SET
-                g.geometry_role = geom.geometry_role,
-                g.geometry_type = geom.geometry_type,
-                g.wkt = geom.wkt,
-                g.latitude = geom.latitude,
-                g.longitude = geom.longitude
-            ON MATCH SET
+            SET
                 g.geometry_role = geom.geometry_role,
                 g.geometry_type = geom.geometry_type,
                 g.wkt = geom.wkt,
+                g.geometry_bin = geom.geometry_bin,
+                g.geometry_encoding = geom.geometry_encoding,
+                g.wkt_lod0 = geom.wkt_lod0,
+                g.wkt_lod1 = geom.wkt_lod1,
+                g.wkt_lod2 = geom.wkt_lod2,
+                g.wkt_lod3 = geom.wkt_lod3,
                 g.latitude = geom.latitude,
-                g.longitude = geom.longitude
+                g.longitude = geom.longitude,
+                g.area = geom.area,
+                g.minx = geom.minx,
+                g.miny = geom.miny,
+                g.maxx = geom.maxx,
+                g.maxy = geom.maxy,
+                g.vertex_count = geom.vertex_count,
+                g.shape_hash = geom.shape_hash,
+                g.location = point({longitude: geom.longitude, latitude: geom.latitude}),
+                g.location_sw = point({longitude: geom.minx, latitude: geom.miny}),
+                g.location_ne = point({longitude: geom.maxx, latitude: geom.maxy}),
+                g += coalesce(geom.cells, {})
+            """
+            if self.apoc_available is False:
+                # Fallback query without APOC
+                return query
+            return query + """
+            WITH g
+            CALL apoc.do.when(
+                g.geometry_type = 'POINT',
+                'SET g:PointGeometry RETURN g',
+                'SET g:PolygonGeometry RETURN g',
+                {g: g}
+            ) YIELD value
+            RETURN value
             """
-            self._batch_import(geometries, simple_query, "geometries")
 
-    def import_relationships(self, relationships: List[Dict[str, Any]]):
-        """Import relationships in batches grouped by type."""
+        raise ValueError(f"Unknown node kind: {kind}")
+
+    def import_relationships(self, relationships: List[Dict[str, Any]], merge: bool = False):
+        """
+        Import relationships in batches grouped by type.
+
+        Args:
+            relationships: List of relationship dictionaries
+            merge: MERGE relationships so existing ones are not duplicated
+        """
         print(f"🔗 Importing {len(relationships)} relationships...")
 
-        # Group relationships by type for efficient batching
-        rel_by_type = {}
+        # Import each relationship type, per pair of endpoint kinds
+        groups = self._group_by_endpoints(relationships)
+        for (rel_type, from_kind, to_kind), rels in tqdm(groups.items(), desc="Relationship types"):
+            self._import_relationships_by_type(rels, rel_type, merge, from_kind, to_kind)
+
+    def delete_relationships(self, relationships: List[Dict[str, Any]]):
+        """
+        Delete relationships (and their inverse relationships) in batches.
+
+        Args:
+            relationships: List of relationship dictionaries identifying the edges
+        """
+        print(f"✂️  Deleting {len(relationships)} relationships...")
+
+        for (rel_type, from_kind, to_kind), rels in self._group_by_endpoints(relationships).items():
+            query = self._delete_relationship_query(rel_type, from_kind, to_kind)
+            if query is None:
+                print(f"⚠️  Unknown relationship type: {rel_type}")
+                continue
+
+            self._batch_import(rels, query, f"{rel_type} deletions", lock_key=relationship_lock_key(rel_type))
+
+    def _delete_relationship_query(self, rel_type: str, from_kind: Optional[str] = None,
+                                   to_kind: Optional[str] = None) -> Optional[str]:
+        """Cypher query deleting one $batch of relationships (and inverses), or None if the type is unknown."""
+        match = self._relationship_match(rel_type, from_kind, to_kind)
+        if match is None:
+            return None
+
+        if rel_type in INVERSE_RELATIONSHIPS:
+            return f"""
+            UNWIND $batch AS rel{match}
+            MATCH (from)-[r:{rel_type}]->(to)
+            OPTIONAL MATCH (to)-[inverse:{INVERSE_RELATIONSHIPS[rel_type]}]->(from)
+            DELETE r, inverse
+            """
+        return f"""
+        UNWIND $batch AS rel{match}
+        MATCH (from)-[r:{rel_type}]->(to)
+        DELETE r
+        """
+
+    def delete_nodes(self, label: str, id_property: str, ids: List[Any]):
+        """
+        Delete nodes and all their relationships in batches.
+
+        Args:
+            label: Node label (e.g. "Unit")
+            id_property: Unique key property (e.g. "spatial_unit_id")
+            ids: Key values of the nodes to delete
+        """
+        print(f"🗑️  Deleting {len(ids)} {label} nodes...")
+
+        query = self._delete_nodes_query(label, id_property)
+
+        self._batch_import(ids, query, f"{label} deletions")
+
+    def _delete_nodes_query(self, label: str, id_property: str) -> str:
+        """Cypher query detaching and deleting the nodes whose keys are in $batch."""
+        return f"""
+        UNWIND $batch AS id
+        MATCH (n:{label} {{{id_property}: id}})
+        DETACH DELETE n
+        """
+
+    def _group_by_endpoints(self, relationships: List[Dict[str, Any]]) -> Dict[tuple, List[Dict[str, Any]]]:
+        """
+        Group relationships by (type, from kind, to kind) for efficient batching.
+
+        Records without from_kind/to_kind (e.g. from manifests written before
+        the extractor tagged them) get their kinds from their URIs.
+        """
+        groups = {}
+        if isinstance(relationships, RecordStore):
+            # Row views keep the records column-backed until each batch is sliced
+            for key, rows in relationships.group_by('type', 'from_kind', 'to_kind').items():
+                if key[1] is not None and key[2] is not None:
+                    groups[key] = rows
+                else:
+                    for rel in rows:
+                        groups.setdefault((key[0], *endpoint_kinds(key[0], rel['from_uri'], rel['to_uri'])),
+                                          []).append(rel)
+            return groups
+
         for rel in relationships:
             rel_type = rel['type']
-            if rel_type not in rel_by_type:
-                rel_by_type[rel_type] = []
-            rel_by_type[rel_type].append(rel)
-
-        # Import each relationship type
-        for rel_type, rels in tqdm(rel_by_type.items(), desc="Relationship types"):
-            self._import_relationships_by_type(rels, rel_type)
+            from_kind, to_kind = rel.get('from_kind'), rel.get('to_kind')
+            if from_kind is None or to_kind is None:
+                from_kind, to_kind = endpoint_kinds(rel_type, rel['from_uri'], rel['to_uri'])
+            key = (rel_type, from_kind, to_kind)
+            if key not in groups:
+                groups[key] = []
+            groups[key].append(rel)
+        return groups
+
+    def _relationship_match(self, rel_type: str, from_kind: Optional[str] = None,
+                            to_kind: Optional[str] = None) -> Optional[str]:
+        """
+        MATCH clauses binding `from` and `to` for a relationship row `rel`.
 
-    def _import_relationships_by_type(self, relationships: List[Dict[str, Any]], rel_type: str):
-        """Import relationships of a specific type."""
+        Types whose endpoints can be units or places (directional and
+        geometry relationships) are matched by label and key when the
+        endpoint kinds are known, so the unique constraints serve each row;
+        otherwise they fall back to a label-less scan.
+        """
+        if rel_type in ["NORTH_OF", "SOUTH_OF", "EAST_OF", "WEST_OF", "HAS_MAIN_GEOMETRY", "HAS_EXTRA_GEOMETRY"]:
+            if from_kind in ENDPOINT_MATCHES and to_kind in ENDPOINT_MATCHES:
+                return f"""
+            {ENDPOINT_MATCHES[from_kind].format(end='from')}
+            {ENDPOINT_MATCHES[to_kind].format(end='to')}"""
 
         # Different queries based on relationship type
         if rel_type == "CONTAINED_BY":
-            query = """
-            UNWIND $batch AS rel
-            MATCH (child:Unit) WHERE child.spatial_unit_id = rel.from_id
-            MATCH (parent:Unit) WHERE parent.spatial_unit_id = rel.to_id
-            CREATE (child)-[:CONTAINED_BY]->(parent)
-            """
+            return """
+            MATCH (from:Unit) WHERE from.spatial_unit_id = rel.from_id
+            MATCH (to:Unit) WHERE to.spatial_unit_id = rel.to_id"""
 
         elif rel_type == "BELONGS_TO_HIERARCHY":
-            query = """
-            UNWIND $batch AS rel
-            MATCH (u:Unit) WHERE u.spatial_unit_id = rel.from_id
-            MATCH (h:Hierarchy) WHERE h.hierarchy_id = rel.to_id
-            CREATE (u)-[:BELONGS_TO_HIERARCHY]->(h)
-            """
+            return """
+            MATCH (from:Unit) WHERE from.spatial_unit_id = rel.from_id
+            MATCH (to:Hierarchy) WHERE to.hierarchy_id = rel.to_id"""
 
         elif rel_type == "CONTAINED_BY_UNIT":
-            query = """
-            UNWIND $batch AS rel
-            MATCH (p:Place) WHERE p.place_id = rel.from_id
-            MATCH (u:Unit) WHERE u.spatial_unit_id = rel.to_id
-            CREATE (p)-[:CONTAINED_BY_UNIT]->(u)
-            """
+            return """
+            MATCH (from:Place) WHERE from.place_id = rel.from_id
+            MATCH (to:Unit) WHERE to.spatial_unit_id = rel.to_id"""
 
         elif rel_type == "BASE_PLACE_PARENT":
-            query = """
-            UNWIND $batch AS rel
-            MATCH (child:Place) WHERE child.place_id = rel.from_id
-            MATCH (parent:Place) WHERE parent.place_id = rel.to_id
-            CREATE (child)-[:BASE_PLACE_PARENT]->(parent)
-            """
+            return """
+            MATCH (from:Place) WHERE from.place_id = rel.from_id
+            MATCH (to:Place) WHERE to.place_id = rel.to_id"""
 
         elif rel_type in ["NORTH_OF", "SOUTH_OF", "EAST_OF", "WEST_OF"]:
-            query = f"""
-            UNWIND $batch AS rel
+            return """
             MATCH (from) WHERE from.spatial_unit_id = rel.from_id OR from.place_id = rel.from_id
-            MATCH (to) WHERE to.spatial_unit_id = rel.to_id OR to.place_id = rel.to_id
-            CREATE (from)-[:{rel_type}]->(to)
-            """
+            MATCH (to) WHERE to.spatial_unit_id = rel.to_id OR to.place_id = rel.to_id"""
 
-        elif rel_type == "HAS_MAIN_GEOMETRY":
-            query = """
-            UNWIND $batch AS rel
-            MATCH (entity) WHERE entity.spatial_unit_id = rel.from_id OR entity.place_id = rel.from_id
-            MATCH (g:Geometry) WHERE g.geometry_id = split(rel.to_uri, '/')[-1]
-            CREATE (entity)-[:HAS_MAIN_GEOMETRY]->(g)
-            """
+        elif rel_type in ["HAS_MAIN_GEOMETRY", "HAS_EXTRA_GEOMETRY"]:
+            return """
+            MATCH (from) WHERE from.spatial_unit_id = rel.from_id OR from.place_id = rel.from_id
+            MATCH (to:Geometry) WHERE to.geometry_id = split(rel.to_uri, '/')[-1]"""
 
-        elif rel_type == "HAS_EXTRA_GEOMETRY":
-            query = """
-            UNWIND $batch AS rel
-            MATCH (entity) WHERE entity.spatial_unit_id = rel.from_id OR entity.place_id = rel.from_id
-            MATCH (g:Geometry) WHERE g.geometry_id = split(rel.to_uri, '/')[-1]
-            CREATE (entity)-[:HAS_EXTRA_GEOMETRY]->(g)
-            """
+        return None
 
-        else:
+    def _relationship_query(self, rel_type: str, merge: bool = False, from_kind: Optional[str] = None,
+                            to_kind: Optional[str] = None) -> Optional[str]:
+        """Cypher query writing one $batch of relationships of a type, or None if the type is unknown."""
+        match = self._relationship_match(rel_type, from_kind, to_kind)
+        if match is None:
+            return None
+
+        return f"""
+        UNWIND $batch AS rel{match}
+        {'MERGE' if merge else 'CREATE'} (from)-[:{rel_type}]->(to)
+        """
+
+    def _import_relationships_by_type(self, relationships: List[Dict[str, Any]], rel_type: str,
+                                      merge: bool = False, from_kind: Optional[str] = None,
+                                      to_kind: Optional[str] = None):
+        """Import relationships of a specific type (and pair of endpoint kinds)."""
+        query = self._relationship_query(rel_type, merge, from_kind, to_kind)
+        if query is None:
             print(f"⚠️  Unknown relationship type: {rel_type}")
             return
 
-        self._batch_import(relationships, query, f"{rel_type} relationships")
+        self._batch_import(relationships, query, f"{rel_type} relationships",
+                           lock_key=relationship_lock_key(rel_type))
 
-    def _batch_import(self, data: List[Dict], query: str, description: str):
+    def _batch_import(self, data: List[Dict], query: str, description: str,
+                      prepare: Optional[Callable[[List[Dict]], List[Dict]]] = None,
+                      key: Optional[str] = None, lock_key: Optional[str] = None):
         """
         Generic batch import function.
 
+        Batches are written in managed write transactions, retried on
+        transient errors, and sized by the adaptive controller kept per
+        description (starting from batch_size). With write_workers above 1
+        they are written concurrently by a ParallelWriter: node records in
+        contiguous ranges of `key`, relationships grouped by `lock_key` so
+        no two workers share that endpoint.
+
         Args:
             data: List of dictionaries to import
             query: Cypher query with $batch parameter
             description: Description for progress bar
+            prepare: Transform applied to each batch before it is sent (optional)
+            key: ID field node batches are range-partitioned by (parallel writes only)
+            lock_key: Relationship field to partition by instead (parallel writes only)
         """
-        total_batches = (len(data) + self.batch_size - 1) // self.batch_size
+        sizer = self._batch_sizer(description)
+        if self.write_workers > 1:
+            if self.parallel_writer is None:
+                self.parallel_writer = ParallelWriter(self.driver, self.write_workers, self.batch_size)
+            if lock_key is not None:
+                self.parallel_writer.write_relationships(data, query, description, lock_key, prepare, sizer)
+            else:
+                self.parallel_writer.write_nodes(data, query, description, key, prepare, sizer)
+            return
 
-        with self.driver.session() as session:
-            for i in tqdm(range(0, len(data), self.batch_size),
-                         total=total_batches,
-                         desc=f"Importing {description}"):
-                batch = data[i:i + self.batch_size]
-                session.run(query, batch=batch)
+        with self.driver.session() as session, \
+                tqdm(total=len(data), unit='rows', desc=f"Importing {description}") as progress:
+            write_batches(session, query, data, sizer, prepare=prepare, on_batch=progress.update)
+
+    def _batch_sizer(self, description: str) -> AdaptiveBatchSizer:
+        """Batch size controller for one write stream, created at batch_size on first use."""
+        sizer = self.batch_sizers.get(description)
+        if sizer is None:
+            adaptive = bool(self.target_batch_seconds)
+            sizer = AdaptiveBatchSizer(self.batch_size, self.target_batch_seconds or TARGET_SECONDS,
+                                       adaptive=adaptive)
+            self.batch_sizers[description] = sizer
+        return sizer
 
     def create_inverse_relationships(self):
         """Create inverse relationships for easier traversal."""
         print("🔄 Creating inverse relationships...")
 
         with self.driver.session() as session:
-            # HAS_CHILD_UNIT (inverse of CONTAINED_BY)
-            session.run("""
-                MATCH (child:Unit)-[:CONTAINED_BY]->(parent:Unit)
-                WHERE NOT (parent)-[:HAS_CHILD_UNIT]->(child)
-                CREATE (parent)-[:HAS_CHILD_UNIT]->(child)
-            """)
+            for query in INVERSE_RELATIONSHIP_QUERIES:
+                session.run(query)
 
-            # CHILD_OF_UNIT (inverse of CONTAINED_BY_UNIT)
-            session.run("""
-                MATCH (p:Place)-[:CONTAINED_BY_UNIT]->(u:Unit)
-                WHERE NOT (u)-[:CHILD_OF_UNIT]->(p)
-                CREATE (u)-[:CHILD_OF_UNIT]->(p)
-            """)
+        print("✅ Inverse relationships created")
 
-            # BASE_PLACE_CHILD (inverse of BASE_PLACE_PARENT)
-            session.run("""
-                MATCH (child:Place)-[:BASE_PLACE_PARENT]->(parent:Place)
-                WHERE NOT (parent)-[:BASE_PLACE_CHILD]->(child)
-                CREATE (parent)-[:BASE_PLACE_CHILD]->(child)
-            """)
+    def create_place_locations(self):
+        """Copy each place's main geometry location (and bbox corners) onto the Place node."""
+        print("📌 Setting place locations...")
 
-        print("✅ Inverse relationships created")
+        with self.driver.session() as session:
+            session.run(PLACE_LOCATION_QUERY)
+
+        print("✅ Place locations set")
+
+    def create_cell_index(self):
+        """
+        Build the (:H3Cell)-[:COVERS]->(:Geometry) lookup table from each geometry's h3_cover.
+
+        Covers that a geometry no longer lists are removed first, so the
+        table follows re-imported geometries. Places and units also get the
+        centroid cells of their main geometry.
+        """
+        print("🔷 Building H3 cell lookup table...")
+
+        with self.driver.session() as session:
+            for query in CELL_INDEX_QUERIES:
+                session.run(query)
+
+        print("✅ H3 cell lookup table built")
 
     def get_database_stats(self) -> Dict[str, int]:
         """Get statistics about the current database state."""
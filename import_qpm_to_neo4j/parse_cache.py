@@ -0,0 +1,350 @@
+"""
+Content-Addressed Cache for QPMParser Extraction Results
+Stores extracted records on disk in a compact binary columnar format
+"""
+
+import hashlib
+import json
+import os
+import struct
+import zlib
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from record_store import RecordStore
+from ttl_parser import QPMParser, PARSER_VERSION, RECORD_KINDS
+from ttl_stream import TurtleSyntaxError
+
+
+CACHE_MAGIC = b'QPMC'
+CACHE_FORMAT_VERSION = 1
+
+# Extracted data keys, in the order they are written
+TABLES = ('hierarchies', 'units', 'places', 'geometries', 'relationships')
+
+# Record kind of each table (RecordStore schema)
+TABLE_KINDS = dict(zip(TABLES, RECORD_KINDS))
+
+# Per-value state byte: the key is missing from the record, set to None, or holds a value
+_ABSENT, _NONE, _VALUE = 0, 1, 2
+
+
+class _Missing:
+    """Marker for a key that is not present in a record."""
+
+    def __repr__(self):
+        return '<missing>'
+
+
+_MISSING = _Missing()
+
+
+def _encode_column(values: List[Any]) -> Dict[str, Any]:
+    """
+    Encode one column into a compressed blob.
+
+    Returns:
+        Column header entry with the encoded type and the compressed bytes
+    """
+    states = bytearray(len(values))
+    present = []
+    for i, value in enumerate(values):
+        if value is _MISSING:
+            states[i] = _ABSENT
+        elif value is None:
+            states[i] = _NONE
+        else:
+            states[i] = _VALUE
+            present.append(value)
+
+    if all(type(v) is int for v in present) and all(-2**63 <= v < 2**63 for v in present):
+        col_type = 'i'
+        payload = array('q', present).tobytes()
+    elif all(type(v) is float for v in present):
+        col_type = 'f'
+        payload = array('d', present).tobytes()
+    elif all(type(v) is str for v in present):
+        col_type = 's'
+        encoded = [v.encode('utf-8') for v in present]
+        lengths = array('I', (len(v) for v in encoded))
+        payload = lengths.tobytes() + b''.join(encoded)
+    else:
+        col_type = 'j'
+        payload = json.dumps(present).encode('utf-8')
+
+    return {
+        'type': col_type,
+        'count': len(present),
+        'blob': zlib.compress(bytes(states) + payload, 6),
+    }
+
+
+def _decode_column(col_type: str, count: int, rows: int, blob: bytes) -> List[Any]:
+    """Decode a compressed column blob back into a list (with _MISSING markers)."""
+    raw = zlib.decompress(blob)
+    states, payload = raw[:rows], raw[rows:]
+
+    if col_type == 'i':
+        present = array('q')
+        present.frombytes(payload)
+    elif col_type == 'f':
+        present = array('d')
+        present.frombytes(payload)
+    elif col_type == 's':
+        lengths = array('I')
+        lengths.frombytes(payload[:count * 4])
+        text = payload[count * 4:]
+        present = []
+        pos = 0
+        for length in lengths:
+            present.append(text[pos:pos + length].decode('utf-8'))
+            pos += length
+    else:
+        present = json.loads(payload.decode('utf-8'))
+
+    values = []
+    it = iter(present)
+    for state in states:
+        if state == _VALUE:
+            values.append(next(it))
+        elif state == _NONE:
+            values.append(None)
+        else:
+            values.append(_MISSING)
+    return values
+
+
+class ParseCache:
+    """
+    On-disk cache of extraction results keyed by input content.
+
+    Keys are derived from the parser version, the parse mode and the
+    SHA-256 of every input file parsed so far, so a scoped extraction is
+    only reused when the same files were merged in the same order by the
+    same reader. Entries are evicted least recently
+    used first once the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 2 * 1024 ** 3):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for cache entries (created if missing)
+            max_bytes: Upper bound on the total size of cache entries
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._file_hashes = {}
+
+    def file_hash(self, file_path: str) -> str:
+        """SHA-256 of a file's contents, memoized per (path, size, mtime)."""
+        stat = os.stat(file_path)
+        memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._file_hashes:
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            self._file_hashes[memo_key] = digest.hexdigest()
+        return self._file_hashes[memo_key]
+
+    def key_for(self, file_paths: List[str], streaming: bool = False) -> str:
+        """
+        Cache key for the extraction of the last file after all previous ones.
+
+        Args:
+            file_paths: Files in the order they were parsed into one parser
+            streaming: The files were parsed with the streaming reader
+        """
+        mode = 'stream' if streaming else 'graph'
+        digest = hashlib.sha256(f"qpm-parser-{PARSER_VERSION}-{mode}".encode('utf-8'))
+        for file_path in file_paths:
+            digest.update(self.file_hash(file_path).encode('ascii'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.qpmc"
+
+    def load(self, key: str, compact: bool = False) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        Load a cache entry.
+
+        Args:
+            key: Cache key from key_for()
+            compact: Fill column-backed RecordStores instead of lists of dicts
+
+        Returns:
+            Extracted data dictionary, or None on a miss or unreadable entry
+        """
+        path = self._entry_path(key)
+        if not path.exists():
+            return None
+
+        try:
+            with open(path, 'rb') as f:
+                magic, version, header_length = struct.unpack('<4sHI', f.read(10))
+                if magic != CACHE_MAGIC or version != CACHE_FORMAT_VERSION:
+                    return None
+                header = json.loads(f.read(header_length).decode('utf-8'))
+                body = f.read()
+        except (OSError, ValueError, struct.error) as e:
+            print(f"⚠️  Ignoring unreadable cache entry {path.name}: {e}")
+            return None
+
+        data = {}
+        for table in TABLES:
+            info = header[table]
+            rows = info['rows']
+            columns = {}
+            for column in info['columns']:
+                blob = body[column['offset']:column['offset'] + column['length']]
+                columns[column['name']] = _decode_column(column['type'], column['count'], rows, blob)
+
+            # Rows are assembled one at a time, so a compact load never holds every dict at once
+            records = RecordStore(TABLE_KINDS[table]) if compact else []
+            names = list(columns)
+            for row in zip(*columns.values()) if names else [()] * rows:
+                records.append({name: value for name, value in zip(names, row) if value is not _MISSING})
+            data[table] = records
+
+        # Mark as recently used for eviction
+        os.utime(path)
+        return data
+
+    def store(self, key: str, data: Dict[str, List[Dict[str, Any]]]):
+        """Write a cache entry, then evict old entries if over the size limit."""
+        header = {}
+        blobs = []
+        offset = 0
+
+        for table in TABLES:
+            records = data.get(table, [])
+            names = []
+            for record in records:
+                for name in record:
+                    if name not in names:
+                        names.append(name)
+
+            columns = []
+            for name in names:
+                column = _encode_column([record.get(name, _MISSING) for record in records])
+                columns.append({
+                    'name': name,
+                    'type': column['type'],
+                    'count': column['count'],
+                    'offset': offset,
+                    'length': len(column['blob']),
+                })
+                blobs.append(column['blob'])
+                offset += len(column['blob'])
+
+            header[table] = {'rows': len(records), 'columns': columns}
+
+        header_bytes = json.dumps(header).encode('utf-8')
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(struct.pack('<4sHI', CACHE_MAGIC, CACHE_FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for path in self.cache_dir.glob('*.qpmc'):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink()
+            total -= size
+            print(f"🧹 Evicted cache entry {path.name}")
+
+
+def extract_files(parser: QPMParser, file_paths: List[Optional[str]],
+                  cache: Optional[ParseCache] = None, streaming: bool = False) -> List[Optional[Dict[str, List]]]:
+    """
+    Parse files into one parser and extract what each file added.
+
+    When every file's scoped extraction is in the cache, nothing is parsed.
+    Otherwise all files are parsed (later scopes depend on earlier ones) and
+    the results are stored for the next run.
+
+    With streaming, files are read block by block instead of being loaded
+    into the rdflib Graph. The extracted records (and one key per entity and
+    edge, for skipping repeats) are still held, so memory grows with the
+    files, only more slowly. If a file uses Turtle syntax the streaming
+    reader does not handle, every file is parsed again into the Graph by a
+    fresh parser with the same settings. Each mode has its own cache
+    entries.
+
+    Args:
+        parser: QPMParser to merge the files into
+        file_paths: Files to parse in order; None or missing paths are skipped
+        cache: Optional ParseCache
+        streaming: Parse with the streaming reader instead of the rdflib Graph
+
+    Returns:
+        Extracted data per file (scoped with extract_all(scope)), None for skipped paths
+    """
+    present = [path for path in file_paths if path and os.path.exists(path)]
+    keys = {}
+
+    if cache is not None:
+        for i, path in enumerate(present):
+            keys[path] = cache.key_for(present[:i + 1], streaming)
+
+        cached = {}
+        for path in present:
+            data = cache.load(keys[path], compact=parser.compact)
+            if data is None:
+                break
+            cached[path] = data
+        else:
+            print(f"⚡ Loaded {len(present)} file(s) from parse cache")
+            return [cached.get(path) for path in file_paths]
+
+    results = {}
+    try:
+        for path in present:
+            scope = parser.parse_file(path, streaming=streaming)
+            results[path] = parser.extract_all(scope)
+    except TurtleSyntaxError as e:
+        if not streaming:
+            raise
+        print(f"⚠️  Streaming reader cannot parse {path} ({e}); parsing into an rdflib graph instead")
+        return extract_files(QPMParser(compact=parser.compact), file_paths, cache)
+
+    if cache is not None:
+        for path in present:
+            cache.store(keys[path], results[path])
+
+    return [results.get(path) for path in file_paths]
+
+
+def cache_from_env(enabled: bool = True) -> Optional[ParseCache]:
+    """
+    Create the parse cache configured in the environment.
+
+    QPM_CACHE_DIR sets the directory (default: .qpm_cache next to this
+    script) and QPM_CACHE_MAX_MB the size limit (default: 2048).
+
+    Args:
+        enabled: Return None when False (e.g. --no-cache)
+    """
+    if not enabled:
+        return None
+
+    cache_dir = os.getenv('QPM_CACHE_DIR', str(Path(__file__).parent / '.qpm_cache'))
+    max_bytes = int(os.getenv('QPM_CACHE_MAX_MB', '2048')) * 1024 * 1024
+    return ParseCache(cache_dir, max_bytes)
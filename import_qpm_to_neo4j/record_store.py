@@ -0,0 +1,394 @@
+"""
+Compact Record Store for Extracted QPM Entities
+Keeps extracted records in typed column arrays instead of lists of dicts
+"""
+
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+
+# Column kinds:
+#   int   - array('q'), None stored as _NULL_INT
+#   float - array('d'), None stored as NaN
+#   code  - array('I') index into an interned value table, None stored as 0
+#   str   - UTF-8 bytes in one bytearray plus an array('q') of end offsets
+#   uri   - interned namespace code plus the local name stored like str
+#
+# Required columns always appear in the record (None when unset); optional
+# columns are left out of the record when unset, matching the parser output.
+RECORD_SCHEMAS = {
+    'hierarchy': [
+        ('uri', 'uri', True),
+        ('hierarchy_id', 'int', True),
+        ('hierarchy_name', 'str', True),
+        ('hierarchy_levels', 'int', True),
+        ('units_number', 'int', True),
+    ],
+    'unit': [
+        ('uri', 'uri', True),
+        ('spatial_unit_id', 'int', True),
+        ('unit_name', 'str', False),
+        ('unit_type', 'code', False),
+        ('unit_level', 'int', False),
+        ('unit_h3', 'str', False),
+    ],
+    'place': [
+        ('uri', 'uri', True),
+        ('place_id', 'int', True),
+        ('place_name', 'str', False),
+        ('place_type', 'code', False),
+        ('place_function', 'code', False),
+        ('place_key', 'str', False),
+        ('place_level', 'int', False),
+        ('place_h3', 'str', False),
+        ('place_s2', 'str', False),
+        ('model_source', 'code', False),
+        ('geometry_source', 'code', False),
+    ],
+    'geometry': [
+        ('uri', 'uri', True),
+        ('geometry_id', 'str', True),
+        ('geometry_role', 'code', True),
+        ('wkt', 'str', False),
+        ('geometry_type', 'code', False),
+        ('longitude', 'float', False),
+        ('latitude', 'float', False),
+        ('area', 'float', False),
+        ('minx', 'float', False),
+        ('miny', 'float', False),
+        ('maxx', 'float', False),
+        ('maxy', 'float', False),
+        ('vertex_count', 'int', False),
+        ('wkt_lod0', 'str', False),
+        ('wkt_lod1', 'str', False),
+        ('wkt_lod2', 'str', False),
+        ('wkt_lod3', 'str', False),
+        ('shape_hash', 'str', False),
+    ],
+    'relationship': [
+        ('from_uri', 'uri', True),
+        ('to_uri', 'uri', True),
+        ('type', 'code', True),
+        ('from_id', 'int', True),
+        ('to_id', 'int', True),
+        ('from_kind', 'code', False),
+        ('to_kind', 'code', False),
+    ],
+}
+
+_NULL_INT = -2 ** 63
+_NAN = float('nan')
+
+
+class _Column:
+    """One typed column of a RecordStore."""
+
+    __slots__ = ('name', 'kind', 'required', 'data', 'blob', 'values', 'codes', 'prefixes')
+
+    def __init__(self, name: str, kind: str, required: bool):
+        self.name = name
+        self.kind = kind
+        self.required = required
+        self.blob = None
+        self.values = None    # Interned value table (code: values, uri: namespaces)
+        self.codes = None     # Interned value -> code
+        self.prefixes = None  # uri: namespace code per row
+
+        if kind == 'int':
+            self.data = array('q')
+        elif kind == 'float':
+            self.data = array('d')
+        elif kind == 'code':
+            self.data = array('I')
+            self.values = [None]
+            self.codes = {}
+        else:
+            self.data = array('q')
+            self.blob = bytearray()
+            if kind == 'uri':
+                self.values = []
+                self.codes = {}
+                self.prefixes = array('I')
+
+    def _intern(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def fits(self, value: Any) -> bool:
+        """Whether the column can store value and give back an equal value of the same type."""
+        if value is None:
+            return True
+        if self.kind == 'int':
+            return type(value) is int and _NULL_INT < value < 2 ** 63
+        if self.kind == 'float':
+            return type(value) is float and value == value
+        return type(value) is str
+
+    def append(self, value: Any):
+        kind = self.kind
+        if kind == 'int':
+            self.data.append(_NULL_INT if value is None else value)
+        elif kind == 'float':
+            self.data.append(_NAN if value is None else value)
+        elif kind == 'code':
+            self.data.append(0 if value is None else self._intern(value))
+        else:
+            if kind == 'uri':
+                if value is None:
+                    self.prefixes.append(0)
+                else:
+                    cut = max(value.rfind('/'), value.rfind('#')) + 1
+                    self.prefixes.append(self._intern(value[:cut]))
+                    value = value[cut:]
+            if value is None:
+                # A negative end offset (~end) marks None without a separate null mask
+                self.data.append(~len(self.blob))
+            else:
+                self.blob += value.encode('utf-8')
+                self.data.append(len(self.blob))
+
+    def get(self, row: int) -> Any:
+        kind = self.kind
+        if kind == 'int':
+            value = self.data[row]
+            return None if value == _NULL_INT else value
+        if kind == 'float':
+            value = self.data[row]
+            return None if value != value else value
+        if kind == 'code':
+            return self.values[self.data[row]]
+
+        end = self.data[row]
+        if end < 0:
+            return None
+        start = self.data[row - 1] if row else 0
+        if start < 0:
+            start = ~start
+        text = self.blob[start:end].decode('utf-8')
+        if kind == 'uri':
+            return self.values[self.prefixes[row]] + text
+        return text
+
+    def nbytes(self) -> int:
+        size = self.data.itemsize * len(self.data)
+        if self.blob is not None:
+            size += len(self.blob)
+        if self.prefixes is not None:
+            size += self.prefixes.itemsize * len(self.prefixes)
+        if self.values is not None:
+            size += sys.getsizeof(self.values) + sum(sys.getsizeof(v) for v in self.values if v is not None)
+        return size
+
+
+class RecordStore:
+    """
+    Columnar, append-only store of extracted records of one kind.
+
+    Behaves like a read-only list of record dicts: len(), iteration,
+    indexing and slicing all work, and a slice is a list of plain dicts,
+    so Neo4jImporter._batch_import can take ``data[i:i + batch_size]`` as
+    its $batch parameter unchanged. Values that do not fit their column
+    (e.g. a place_level that was kept as a string) and keys outside the
+    schema are kept per row in a small overflow map.
+    """
+
+    def __init__(self, kind: str):
+        """
+        Initialize an empty store.
+
+        Args:
+            kind: Record kind, one of the RECORD_SCHEMAS keys
+        """
+        self.kind = kind
+        self.columns = [_Column(name, col_kind, required) for name, col_kind, required in RECORD_SCHEMAS[kind]]
+        self._names = {column.name for column in self.columns}
+        self._overflow: Dict[int, Dict[str, Any]] = {}
+        self._length = 0
+
+    def append(self, record: Dict[str, Any]):
+        """Add one record dict."""
+        extra = None
+        for column in self.columns:
+            value = record.get(column.name)
+            if column.fits(value):
+                column.append(value)
+            else:
+                column.append(None)
+                extra = extra or {}
+                extra[column.name] = value
+
+        if len(record) > len(self._names) or not self._names.issuperset(record):
+            for name, value in record.items():
+                if name not in self._names:
+                    extra = extra or {}
+                    extra[name] = value
+
+        if extra:
+            self._overflow[self._length] = extra
+        self._length += 1
+
+    def extend(self, records: Iterable[Dict[str, Any]]):
+        """Add record dicts (or the records of another store)."""
+        for record in records:
+            self.append(record)
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Decode one row into a record dict."""
+        record = {}
+        for column in self.columns:
+            value = column.get(row)
+            if value is not None or column.required:
+                record[column.name] = value
+        extra = self._overflow.get(row)
+        if extra:
+            record.update(extra)
+        return record
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in range(self._length):
+            yield self.record(row)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.record(row) for row in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("record index out of range")
+        return self.record(index)
+
+    def view(self, start: int = 0, stop: int = None) -> 'RecordView':
+        """Read-only view of a row range, without copying."""
+        return RecordView(self, range(*slice(start, stop).indices(self._length)))
+
+    def group_by(self, *names: str) -> Dict[Any, 'RecordView']:
+        """
+        Group rows by the value of one column (or a tuple of several).
+
+        Returns:
+            Dictionary of value (tuple of values for several names) -> view of the rows holding it
+        """
+        columns = [next(c for c in self.columns if c.name == name) for name in names]
+        groups: Dict[Any, array] = {}
+        for row in range(self._length):
+            extra = self._overflow.get(row, {})
+            values = tuple(extra.get(name, column.get(row)) for name, column in zip(names, columns))
+            value = values[0] if len(names) == 1 else values
+            rows = groups.get(value)
+            if rows is None:
+                rows = groups[value] = array('I')
+            rows.append(row)
+        return {value: RecordView(self, rows) for value, rows in groups.items()}
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the store's columns, interned tables and overflow."""
+        size = sum(column.nbytes() for column in self.columns)
+        size += sum(dict_record_bytes(extra) for extra in self._overflow.values())
+        return size
+
+    def bytes_per_record(self) -> float:
+        """Average memory per record."""
+        return self.nbytes() / self._length if self._length else 0.0
+
+
+class RecordView:
+    """Read-only list-like view over selected rows of a RecordStore."""
+
+    def __init__(self, store: RecordStore, rows: Sequence[int]):
+        self.store = store
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in self.rows:
+            yield self.store.record(row)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.store.record(row) for row in self.rows[index]]
+        return self.store.record(self.rows[index])
+
+
+def concat_records(kind: str, parts: List[Sequence[Dict[str, Any]]]) -> Sequence[Dict[str, Any]]:
+    """
+    Concatenate record sequences, keeping them compact if any part is.
+
+    Args:
+        kind: Record kind of the parts
+        parts: Lists, RecordStores or RecordViews
+
+    Returns:
+        A RecordStore if any part is store-backed, otherwise a list
+    """
+    if any(isinstance(part, (RecordStore, RecordView)) for part in parts):
+        combined = RecordStore(kind)
+    else:
+        combined = []
+    for part in parts:
+        combined.extend(part)
+    return combined
+
+
+def dict_record_bytes(record: Dict[str, Any]) -> int:
+    """Approximate memory of one record dict: the dict plus its values (keys are shared)."""
+    return sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record.values())
+
+
+def records_nbytes(records: Sequence[Dict[str, Any]]) -> int:
+    """Approximate memory of a record sequence, whether a list of dicts or a RecordStore."""
+    if isinstance(records, RecordStore):
+        return records.nbytes()
+    return sys.getsizeof(records) + sum(dict_record_bytes(record) for record in records)
+
+
+def print_memory_report(data: Dict[str, Sequence[Dict[str, Any]]]):
+    """
+    Print record counts and bytes per record for each entity type.
+
+    Args:
+        data: Extracted data (hierarchies, units, places, geometries, relationships)
+    """
+    print("\n🧠 Record memory:")
+    for table, records in data.items():
+        count = len(records)
+        size = records_nbytes(records)
+        per_record = size / count if count else 0.0
+        backing = 'columns' if isinstance(records, RecordStore) else 'dicts'
+        print(f"  {table:<14} {count:>10,} records  {size / 1024 ** 2:>9.2f} MB  "
+              f"{per_record:>7.1f} B/record ({backing})")
+
+
+if __name__ == "__main__":
+    # Round-trip and size comparison on synthetic relationships
+    base = "http://qpm.ontology/2025#"
+    rels = [
+        {
+            'from_uri': f"{base}place_{i}",
+            'to_uri': f"{base}unit_{i // 10}",
+            'type': 'CONTAINED_BY_UNIT',
+            'from_id': i,
+            'to_id': i // 10,
+            'from_kind': 'place',
+            'to_kind': 'unit',
+        }
+        for i in range(100000)
+    ]
+
+    store = RecordStore('relationship')
+    store.extend(rels)
+
+    assert list(store) == rels
+    assert store[10:20] == rels[10:20]
+    assert store[-1] == rels[-1]
+    print(f"✅ {len(store):,} relationships round-trip")
+    print(f"  dicts:   {records_nbytes(rels) / len(rels):.1f} B/record")
+    print(f"  columns: {store.bytes_per_record():.1f} B/record")
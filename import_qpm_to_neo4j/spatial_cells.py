@@ -0,0 +1,240 @@
+"""
+H3 / S2 Spatial Cells for Geometries
+Derives multi-resolution H3 (and optionally S2) cells from geometry centroids
+and H3 polygon coverings, and turns viewports and neighbourhoods into cell
+sets that can be looked up in the (:H3Cell)-[:COVERS]->(:Geometry) table
+"""
+
+from concurrent.futures import Executor
+from itertools import repeat
+from typing import Any, Dict, List, Optional, Sequence
+
+from wkt_parser import batch_polygons, decode_wkt_batch
+
+try:
+    import h3
+except ImportError:  # Optional: pip install h3
+    h3 = None
+
+try:
+    import s2sphere
+except ImportError:  # Optional: pip install s2sphere
+    s2sphere = None
+
+
+# Centroid cell properties written on Geometry nodes (and copied to places/units):
+# H3 resolution 5 (~250 km²), 7 (~5 km²) and 9 (~0.1 km²)
+H3_RESOLUTIONS = (5, 7, 9)
+# S2 levels of similar sizes
+S2_LEVELS = (8, 11, 14)
+
+# Polygons are covered with cells of this resolution, compacted to coarser
+# parents where every child is covered
+H3_COVER_RESOLUTION = 7
+
+# Records per task when add_cells() is given a process pool
+CHUNK_SIZE = 250
+
+H3_PROPERTIES = tuple(f"h3_r{res}" for res in H3_RESOLUTIONS)
+S2_PROPERTIES = tuple(f"s2_l{level}" for level in S2_LEVELS)
+
+
+def require_cell_libraries(s2: bool = False):
+    """Raise ImportError if h3 (or s2sphere, when s2 is True) is not installed."""
+    if h3 is None:
+        raise ImportError("H3 cells need the h3 package: pip install h3")
+    if s2 and s2sphere is None:
+        raise ImportError("S2 cells need the s2sphere package: pip install s2sphere")
+
+
+def _h3_shape(polygons: List[List[List[tuple]]]):
+    """H3 shape from polygons of (lon, lat) rings; H3 wants (lat, lng)."""
+    shapes = [
+        h3.LatLngPoly(*[[(lat, lon) for lon, lat in ring] for ring in rings])
+        for rings in polygons
+    ]
+    return shapes[0] if len(shapes) == 1 else h3.LatLngMultiPoly(*shapes)
+
+
+def cover_cells(polygons: List[List[List[tuple]]], resolution: int = H3_COVER_RESOLUTION) -> List[str]:
+    """
+    Compacted H3 cells that together overlap a geometry.
+
+    Args:
+        polygons: Polygons of (lon, lat) rings, as from wkt_parser.batch_polygons
+        resolution: Finest cell resolution
+
+    Returns:
+        Sorted cell IDs; cells of coarser resolutions replace complete sets of children
+    """
+    if len(polygons) == 1 and len(polygons[0]) == 1 and len(polygons[0][0]) == 1:
+        lon, lat = polygons[0][0][0]
+        return [h3.latlng_to_cell(lat, lon, resolution)]
+
+    cells = set(h3.h3shape_to_cells_experimental(_h3_shape(polygons), resolution, contain='overlap'))
+    if not cells:
+        # Degenerate rings: fall back to the cells of the vertices
+        cells = {h3.latlng_to_cell(lat, lon, resolution)
+                 for rings in polygons for ring in rings for lon, lat in ring}
+    return sorted(h3.compact_cells(cells))
+
+
+def centroid_cells(longitude: float, latitude: float, s2: bool = False) -> Dict[str, str]:
+    """H3 (and S2) cells of a point at every configured resolution, keyed by property name."""
+    cells = {
+        prop: h3.latlng_to_cell(latitude, longitude, res)
+        for prop, res in zip(H3_PROPERTIES, H3_RESOLUTIONS)
+    }
+    if s2:
+        leaf = s2sphere.CellId.from_lat_lng(s2sphere.LatLng.from_degrees(latitude, longitude))
+        for prop, level in zip(S2_PROPERTIES, S2_LEVELS):
+            cells[prop] = leaf.parent(level).to_token()
+    return cells
+
+
+def add_cells(geometries: Sequence[Dict[str, Any]], s2: bool = False,
+              executor: Optional[Executor] = None) -> List[Dict[str, Any]]:
+    """
+    Copies of geometry records with a 'cells' property map.
+
+    The map holds the centroid cell per resolution (h3_r5, h3_r7, ...,
+    and s2_l8, ... when s2 is True) and 'h3_cover', the compacted H3
+    covering of the geometry. Records without coordinates get no map.
+
+    Args:
+        geometries: Geometry records (a batch about to be written)
+        s2: Also derive S2 cells
+        executor: Process pool to split the records over (optional);
+            polygon coverings cost about half a millisecond each
+
+    Returns:
+        List of record dicts
+    """
+    require_cell_libraries(s2)
+    if executor is not None and len(geometries) > CHUNK_SIZE:
+        chunks = [geometries[i:i + CHUNK_SIZE] for i in range(0, len(geometries), CHUNK_SIZE)]
+        return [record for chunk in executor.map(add_cells, chunks, repeat(s2)) for record in chunk]
+
+    records = [dict(record) for record in geometries]
+    batch = decode_wkt_batch([record.get('wkt') for record in records])
+    offsets = batch['geometry_offsets']
+
+    for i, record in enumerate(records):
+        if record.get('longitude') is None or offsets[i] == offsets[i + 1]:
+            continue
+        cells = centroid_cells(record['longitude'], record['latitude'], s2)
+        cells['h3_cover'] = cover_cells(batch_polygons(batch, i))
+        record['cells'] = cells
+    return records
+
+
+def lookup_cells(cells: Sequence[str]) -> List[str]:
+    """
+    Cells to look up in the cover table for a set of query cells.
+
+    Coverings are compacted, so a geometry may be filed under an ancestor
+    of a query cell; every ancestor down to resolution 0 is included.
+    """
+    lookup = set(cells)
+    for cell in cells:
+        for res in range(h3.get_resolution(cell)):
+            lookup.add(h3.cell_to_parent(cell, res))
+    return sorted(lookup)
+
+
+def viewport_cells(minx: float, miny: float, maxx: float, maxy: float,
+                   resolution: int = H3_COVER_RESOLUTION) -> List[str]:
+    """H3 cells overlapping a lon/lat box."""
+    require_cell_libraries()
+    box = [(miny, minx), (miny, maxx), (maxy, maxx), (maxy, minx)]
+    return sorted(h3.h3shape_to_cells_experimental(h3.LatLngPoly(box), resolution, contain='overlap'))
+
+
+def neighbourhood_cells(longitude: float, latitude: float, k: int = 1,
+                        resolution: int = H3_COVER_RESOLUTION) -> List[str]:
+    """The H3 cell of a point and its neighbours up to k rings away."""
+    require_cell_libraries()
+    return sorted(h3.grid_disk(h3.latlng_to_cell(latitude, longitude, resolution), k))
+
+
+# Candidates from the cover table; refine with the bbox or geometry if exactness matters
+CELL_LOOKUP_QUERY = """
+MATCH (c:H3Cell)-[:COVERS]->(g:Geometry)
+WHERE c.cell_id IN $cells
+RETURN DISTINCT g.geometry_id AS geometry_id, g.geometry_type AS geometry_type
+LIMIT $limit
+"""
+
+
+def geometries_in_cells(session, cells: Sequence[str], limit: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Geometries whose covering shares a cell with the given query cells.
+
+    Args:
+        session: Neo4j session
+        cells: Query cells, e.g. from viewport_cells() or neighbourhood_cells()
+        limit: Maximum rows returned
+
+    Returns:
+        List of geometry dictionaries
+    """
+    result = session.run(CELL_LOOKUP_QUERY, cells=lookup_cells(cells), limit=limit)
+    return [record.data() for record in result]
+
+
+def build_cell_table(geometries: Sequence[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """
+    In-memory cell -> geometry IDs table from records returned by add_cells().
+
+    Returns:
+        Dictionary of cell ID -> geometry IDs filed under it
+    """
+    table: Dict[str, List[str]] = {}
+    for record in geometries:
+        cells: Optional[Dict[str, Any]] = record.get('cells')
+        if cells:
+            for cell in cells['h3_cover']:
+                table.setdefault(cell, []).append(record['geometry_id'])
+    return table
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from ttl_parser import parse_ttl_file
+
+    if len(sys.argv) < 2:
+        print("Usage: python spatial_cells.py <path_to_ttl_file>")
+        sys.exit(1)
+
+    data = parse_ttl_file(sys.argv[1], streaming=True)
+    start_time = time.time()
+    records = add_cells(data['geometries'], s2=s2sphere is not None)
+    table = build_cell_table(records)
+    elapsed = time.time() - start_time
+
+    covered = [r for r in records if r.get('cells')]
+    cover_sizes = [len(r['cells']['h3_cover']) for r in covered]
+    print(f"\n🔷 Cells for {len(covered):,} geometries in {elapsed:.2f}s")
+    print(f"  Cover table: {len(table):,} cells, {sum(cover_sizes):,} entries, "
+          f"max {max(cover_sizes, default=0)} cells per geometry")
+
+    # Viewport lookups as set intersections against a linear bbox scan
+    if covered:
+        sample = covered[len(covered) // 2]
+        lon, lat = sample['longitude'], sample['latitude']
+        box = (lon - 0.05, lat - 0.05, lon + 0.05, lat + 0.05)
+
+        start_time = time.perf_counter()
+        candidates = {g for cell in lookup_cells(viewport_cells(*box)) for g in table.get(cell, ())}
+        lookup_ms = (time.perf_counter() - start_time) * 1000
+
+        start_time = time.perf_counter()
+        exact = {r['geometry_id'] for r in covered
+                 if r['maxx'] >= box[0] and r['minx'] <= box[2] and r['maxy'] >= box[1] and r['miny'] <= box[3]}
+        scan_ms = (time.perf_counter() - start_time) * 1000
+
+        assert exact <= candidates, "cell lookup missed a geometry"
+        print(f"  Viewport around {sample['geometry_id']}: {len(candidates)} candidates "
+              f"({len(exact)} overlap the bbox); lookup {lookup_ms:.2f} ms vs scan {scan_ms:.2f} ms")
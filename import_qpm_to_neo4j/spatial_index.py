@@ -0,0 +1,376 @@
+"""
+Packed STR R-tree over Extracted Geometries
+Bulk-loads geometry bounding boxes into a static R-tree held in flat NumPy
+arrays, answers bbox, point and k-nearest queries, and saves to a file that
+reopens through a memory map without rebuilding
+"""
+
+import heapq
+import json
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from wkt_parser import batch_metrics, decode_wkt_batch
+
+
+# Entries per tree node
+NODE_SIZE = 16
+
+_MAGIC = b'QPMSTR1\n'
+_ALIGN = 64
+
+
+class STRTree:
+    """
+    Static R-tree bulk-loaded with Sort-Tile-Recursive packing.
+
+    Items are sorted into STR order once and grouped NODE_SIZE at a time;
+    each level of internal nodes groups the level below the same way, so
+    the whole tree is a single (nodes, 4) array of boxes with the leaves
+    first and the root last. Level l occupies rows
+    level_offsets[l]:level_offsets[l + 1], and the children of node i of
+    level l are rows i * node_size .. (i + 1) * node_size - 1 of level l - 1.
+    Queries walk the tree one level at a time over whole arrays of nodes.
+    """
+
+    def __init__(self, boxes: np.ndarray, order: np.ndarray, level_offsets: np.ndarray,
+                 node_size: int, ids: Optional[Sequence[str]] = None):
+        """
+        Wrap prebuilt arrays; use STRTree.build() or STRTree.load() instead.
+
+        Args:
+            boxes: (nodes, 4) minx, miny, maxx, maxy per node, leaves first
+            order: Item index of each leaf
+            level_offsets: Row where each level starts, plus the total
+            node_size: Entries per node
+            ids: Item IDs (e.g. geometry_id), indexed by item
+        """
+        self.boxes = boxes
+        self.order = order
+        self.level_offsets = level_offsets
+        self.node_size = node_size
+        self.ids = ids
+
+    @classmethod
+    def build(cls, bounds: np.ndarray, ids: Optional[Sequence[str]] = None,
+              node_size: int = NODE_SIZE) -> 'STRTree':
+        """
+        Bulk-load a tree.
+
+        Args:
+            bounds: (N, 4) array of minx, miny, maxx, maxy per item
+            ids: Item IDs, in the same order as bounds (optional)
+            node_size: Entries per node
+
+        Returns:
+            STRTree
+        """
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        count = len(bounds)
+        order = _str_order(bounds, node_size)
+
+        levels = [bounds[order]]
+        while len(levels[-1]) > 1:
+            child = levels[-1]
+            starts = np.arange(0, len(child), node_size)
+            levels.append(np.column_stack([
+                np.minimum.reduceat(child[:, 0], starts),
+                np.minimum.reduceat(child[:, 1], starts),
+                np.maximum.reduceat(child[:, 2], starts),
+                np.maximum.reduceat(child[:, 3], starts),
+            ]))
+
+        level_offsets = np.zeros(len(levels) + 1, dtype=np.int64)
+        np.cumsum([len(level) for level in levels], out=level_offsets[1:])
+        boxes = np.concatenate(levels) if count else np.zeros((0, 4))
+        return cls(boxes, order.astype(np.int64), level_offsets, node_size, ids)
+
+    @classmethod
+    def from_geometries(cls, geometries: Sequence[Dict[str, Any]], node_size: int = NODE_SIZE) -> 'STRTree':
+        """
+        Build a tree over geometry records, keyed by geometry_id.
+
+        Uses the minx/miny/maxx/maxy the parser stores and decodes the WKT
+        of records without them; records without coordinates are skipped.
+        """
+        missing = [record for record in geometries if record.get('minx') is None and record.get('wkt')]
+        decoded = {}
+        if missing:
+            metrics = batch_metrics(decode_wkt_batch([record['wkt'] for record in missing]))
+            for i, record in enumerate(missing):
+                if metrics['vertex_count'][i]:
+                    decoded[record['geometry_id']] = [metrics[key][i] for key in ('minx', 'miny', 'maxx', 'maxy')]
+
+        ids, bounds = [], []
+        for record in geometries:
+            if record.get('minx') is not None:
+                box = [record['minx'], record['miny'], record['maxx'], record['maxy']]
+            else:
+                box = decoded.get(record.get('geometry_id'))
+            if box is not None:
+                ids.append(record['geometry_id'])
+                bounds.append(box)
+        return cls.build(np.array(bounds, dtype=np.float64), ids, node_size)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    @property
+    def item_bounds(self) -> np.ndarray:
+        """(N, 4) bounds of every item, in item order."""
+        bounds = np.empty((len(self.order), 4))
+        bounds[self.order] = self.boxes[:len(self.order)]
+        return bounds
+
+    def _search(self, minx: float, miny: float, maxx: float, maxy: float) -> np.ndarray:
+        """Leaf rows whose box intersects the query box."""
+        if not len(self.order):
+            return np.zeros(0, dtype=np.int64)
+
+        top = len(self.level_offsets) - 2
+        nodes = np.arange(self.level_offsets[top + 1] - self.level_offsets[top])
+        for level in range(top, -1, -1):
+            rows = self.boxes[self.level_offsets[level] + nodes]
+            hit = (rows[:, 0] <= maxx) & (rows[:, 2] >= minx) & (rows[:, 1] <= maxy) & (rows[:, 3] >= miny)
+            nodes = nodes[hit]
+            if level == 0 or not len(nodes):
+                break
+            # Expand surviving nodes to their children in the level below
+            child_count = self.level_offsets[level] - self.level_offsets[level - 1]
+            children = (nodes[:, None] * self.node_size + np.arange(self.node_size)).ravel()
+            nodes = children[children < child_count]
+        return nodes if level == 0 else np.zeros(0, dtype=np.int64)
+
+    def query_bbox(self, minx: float, miny: float, maxx: float, maxy: float) -> np.ndarray:
+        """
+        Items whose bounding box intersects a box.
+
+        Returns:
+            Sorted array of item indices
+        """
+        return np.sort(self.order[self._search(minx, miny, maxx, maxy)])
+
+    def query_point(self, x: float, y: float) -> np.ndarray:
+        """
+        Point-in-polygon candidates: items whose bounding box contains a point.
+
+        Returns:
+            Sorted array of item indices
+        """
+        return self.query_bbox(x, y, x, y)
+
+    def nearest(self, x: float, y: float, k: int = 1) -> List[Tuple[int, float]]:
+        """
+        The k items whose bounding boxes are nearest to a point.
+
+        Distances are in degrees with longitude scaled by cos(latitude) at
+        the query point, i.e. locally equirectangular, which keeps the
+        ranking right over areas the size of Wales.
+
+        Returns:
+            (item index, distance) pairs, nearest first; distance 0 for
+            items whose box contains the point
+        """
+        if not len(self.order) or k <= 0:
+            return []
+
+        scale = math.cos(math.radians(y))
+
+        def distances(boxes: np.ndarray) -> np.ndarray:
+            dx = np.maximum(np.maximum(boxes[:, 0] - x, x - boxes[:, 2]), 0) * scale
+            dy = np.maximum(np.maximum(boxes[:, 1] - y, y - boxes[:, 3]), 0)
+            return np.hypot(dx, dy)
+
+        # Best-first search: entries are (distance, level, row within level);
+        # a level-0 entry is an item, whose distance is exact when popped
+        top = len(self.level_offsets) - 2
+        root = self.boxes[self.level_offsets[top]:self.level_offsets[top] + 1]
+        heap = [(float(distances(root)[0]), top, 0)]
+        results = []
+
+        while heap and len(results) < k:
+            distance, level, row = heapq.heappop(heap)
+            if level == 0:
+                results.append((int(self.order[row]), distance))
+                continue
+
+            first = row * self.node_size
+            child_count = self.level_offsets[level] - self.level_offsets[level - 1]
+            rows = np.arange(first, min(first + self.node_size, child_count))
+            child_distances = distances(self.boxes[self.level_offsets[level - 1] + rows])
+            for child, child_distance in zip(rows.tolist(), child_distances.tolist()):
+                heapq.heappush(heap, (child_distance, level - 1, child))
+
+        return results
+
+    def item_id(self, item: int) -> Any:
+        """ID of an item, or the index itself if the tree has no IDs."""
+        return self.ids[item] if self.ids is not None else item
+
+    def save(self, path: str):
+        """
+        Write the tree to a file that load() can memory-map.
+
+        Layout: magic, a JSON header with each array's dtype, shape and
+        offset, then the arrays themselves aligned to 64 bytes. IDs are
+        stored as one UTF-8 blob plus an end-offset array.
+        """
+        arrays = {
+            'boxes': np.ascontiguousarray(self.boxes, dtype=np.float64),
+            'order': np.ascontiguousarray(self.order, dtype=np.int64),
+            'level_offsets': np.ascontiguousarray(self.level_offsets, dtype=np.int64),
+        }
+        if self.ids is not None:
+            encoded = [str(item_id).encode('utf-8') for item_id in self.ids]
+            arrays['id_ends'] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+            arrays['id_blob'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+        entries, offset = {}, 0
+        for name, array in arrays.items():
+            entries[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset += -(-array.nbytes // _ALIGN) * _ALIGN
+        header = json.dumps({'node_size': self.node_size, 'arrays': entries}).encode('utf-8')
+        data_start = -(-(len(_MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+        with open(path, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(len(header).to_bytes(8, 'little'))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + entries[name]['offset'])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'STRTree':
+        """
+        Open a tree written by save().
+
+        Args:
+            path: Tree file
+            mmap: Map the arrays instead of reading them (opens in constant time;
+                pages are read on first touch)
+
+        Returns:
+            STRTree
+        """
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"Not a QPM STR-tree file: {path}")
+            header_length = int.from_bytes(f.read(8), 'little')
+            header = json.loads(f.read(header_length))
+        data_start = -(-(len(_MAGIC) + 8 + header_length) // _ALIGN) * _ALIGN
+
+        arrays = {}
+        for name, entry in header['arrays'].items():
+            dtype = np.dtype(entry['dtype'])
+            shape = tuple(entry['shape'])
+            if mmap:
+                if math.prod(shape):
+                    arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=data_start + entry['offset'],
+                                             shape=shape)
+                else:
+                    arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                with open(path, 'rb') as f:
+                    f.seek(data_start + entry['offset'])
+                    arrays[name] = np.fromfile(f, dtype=dtype, count=math.prod(shape)).reshape(shape)
+
+        ids = None
+        if 'id_ends' in arrays:
+            ids = _PackedIds(arrays['id_blob'], arrays['id_ends'])
+        return cls(arrays['boxes'], arrays['order'], arrays['level_offsets'], header['node_size'], ids)
+
+
+class _PackedIds:
+    """Read-only sequence of strings stored as a UTF-8 blob and end offsets."""
+
+    def __init__(self, blob: np.ndarray, ends: np.ndarray):
+        self.blob = blob
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    def __getitem__(self, index: int) -> str:
+        start = int(self.ends[index - 1]) if index else 0
+        return bytes(self.blob[start:int(self.ends[index])]).decode('utf-8')
+
+
+def _str_order(bounds: np.ndarray, node_size: int) -> np.ndarray:
+    """
+    Sort-Tile-Recursive leaf order: sort by centre x into vertical slices of
+    whole nodes, then by centre y within each slice.
+    """
+    count = len(bounds)
+    if count == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    centres_x = (bounds[:, 0] + bounds[:, 2]) / 2
+    centres_y = (bounds[:, 1] + bounds[:, 3]) / 2
+    leaf_count = -(-count // node_size)
+    slice_count = math.ceil(math.sqrt(leaf_count))
+    slice_size = node_size * math.ceil(leaf_count / slice_count)
+
+    by_x = np.argsort(centres_x, kind='stable')
+    slice_of = np.empty(count, dtype=np.int64)
+    slice_of[by_x] = np.arange(count) // slice_size
+    return np.lexsort((centres_y, slice_of))
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+    import time
+
+    from ttl_parser import parse_ttl_file
+
+    if len(sys.argv) > 1:
+        geometries = parse_ttl_file(sys.argv[1], streaming=True)['geometries']
+        tree = STRTree.from_geometries(geometries)
+    else:
+        # Synthetic boxes over Wales
+        rng = np.random.default_rng(1)
+        lows = np.column_stack([rng.uniform(-5.3, -2.7, 200000), rng.uniform(51.3, 53.4, 200000)])
+        sizes = rng.uniform(0.0001, 0.02, (200000, 2))
+        start_time = time.perf_counter()
+        tree = STRTree.build(np.hstack([lows, lows + sizes]), [f"g{i}" for i in range(200000)])
+        print(f"🌲 Built {len(tree):,} items in {(time.perf_counter() - start_time) * 1000:.0f} ms")
+
+    bounds = tree.item_bounds
+    rng = np.random.default_rng(2)
+    queries = [(x, y, x + 0.05, y + 0.05) for x, y in zip(rng.uniform(-5.3, -2.7, 200), rng.uniform(51.3, 53.4, 200))]
+
+    start_time = time.perf_counter()
+    for q in queries:
+        tree.query_bbox(*q)
+    tree_ms = (time.perf_counter() - start_time) * 1000 / len(queries)
+
+    start_time = time.perf_counter()
+    for q in queries:
+        brute = np.flatnonzero((bounds[:, 0] <= q[2]) & (bounds[:, 2] >= q[0]) &
+                               (bounds[:, 1] <= q[3]) & (bounds[:, 3] >= q[1]))
+        assert np.array_equal(brute, tree.query_bbox(*q))
+    scan_ms = (time.perf_counter() - start_time) * 1000 / len(queries)
+    print(f"✅ bbox queries match a full scan; {tree_ms:.3f} ms vs {scan_ms:.3f} ms per query")
+
+    x, y = queries[0][:2]
+    scale = math.cos(math.radians(y))
+    dx = np.maximum(np.maximum(bounds[:, 0] - x, x - bounds[:, 2]), 0) * scale
+    dy = np.maximum(np.maximum(bounds[:, 1] - y, y - bounds[:, 3]), 0)
+    expected = np.sort(np.hypot(dx, dy))[:10]
+    found = [d for _, d in tree.nearest(x, y, 10)]
+    assert np.allclose(found, expected)
+    print("✅ k-nearest matches a full scan")
+
+    path = os.path.join(tempfile.mkdtemp(), 'geometries.str')
+    tree.save(path)
+    start_time = time.perf_counter()
+    reopened = STRTree.load(path)
+    open_ms = (time.perf_counter() - start_time) * 1000
+    assert np.array_equal(reopened.query_bbox(*queries[1]), tree.query_bbox(*queries[1]))
+    assert reopened.item_id(5) == tree.item_id(5)
+    print(f"✅ Saved {os.path.getsize(path) / 1024 ** 2:.1f} MB, reopened via mmap in {open_ms:.2f} ms")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Viewport and Radius Queries over Native Point Properties
+Index-backed spatial lookups on Geometry.location / location_sw / location_ne
+and Place.location, with a latency benchmark against float-property scans
+"""
+
+import os
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+
+
+# Rough extent of Wales, used for random benchmark viewports
+WALES_BBOX = (-5.4, 51.3, -2.6, 53.5)
+
+# Point index predicates: point.withinBBox(prop, lower-left, upper-right)
+# and point.distance(prop, centre) <= metres are planned as index seeks
+VIEWPORT_QUERY = """
+MATCH (g:Geometry)
+WHERE point.withinBBox(g.location,
+                       point({longitude: $minx, latitude: $miny}),
+                       point({longitude: $maxx, latitude: $maxy}))
+RETURN g.geometry_id AS geometry_id, g.geometry_type AS geometry_type,
+       g.longitude AS longitude, g.latitude AS latitude
+LIMIT $limit
+"""
+
+# A box overlaps the viewport when its south-west corner is below/left of the
+# viewport's north-east corner and its north-east corner above/right of the
+# south-west corner; one point index answers the first half
+OVERLAP_QUERY = """
+MATCH (g:Geometry)
+WHERE point.withinBBox(g.location_sw,
+                       point({longitude: -180.0, latitude: -90.0}),
+                       point({longitude: $maxx, latitude: $maxy}))
+  AND point.withinBBox(g.location_ne,
+                       point({longitude: $minx, latitude: $miny}),
+                       point({longitude: 180.0, latitude: 90.0}))
+RETURN g.geometry_id AS geometry_id, g.geometry_type AS geometry_type
+LIMIT $limit
+"""
+
+RADIUS_QUERY = """
+MATCH (p:Place)
+WHERE point.distance(p.location, point({longitude: $longitude, latitude: $latitude})) <= $meters
+RETURN p.place_id AS place_id, p.place_name AS place_name,
+       point.distance(p.location, point({longitude: $longitude, latitude: $latitude})) AS meters
+ORDER BY meters
+LIMIT $limit
+"""
+
+# The same questions asked of the plain float properties (full label scans);
+# they match the same nodes, so the benchmark compares equal result sets
+LEGACY_VIEWPORT_QUERY = """
+MATCH (g:Geometry)
+WHERE g.longitude >= $minx AND g.longitude <= $maxx
+  AND g.latitude >= $miny AND g.latitude <= $maxy
+RETURN g.geometry_id AS geometry_id, g.geometry_type AS geometry_type,
+       g.longitude AS longitude, g.latitude AS latitude
+LIMIT $limit
+"""
+
+LEGACY_RADIUS_QUERY = """
+MATCH (p:Place)-[:HAS_MAIN_GEOMETRY]->(g:Geometry)
+WITH p, point.distance(point({longitude: g.longitude, latitude: g.latitude}),
+                       point({longitude: $longitude, latitude: $latitude})) AS meters
+WHERE meters <= $meters
+RETURN p.place_id AS place_id, p.place_name AS place_name, meters
+ORDER BY meters
+LIMIT $limit
+"""
+
+
+def geometries_in_viewport(session, minx: float, miny: float, maxx: float, maxy: float,
+                           limit: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Geometries whose location (centroid) lies in a lon/lat box.
+
+    Args:
+        session: Neo4j session
+        minx, miny, maxx, maxy: Viewport bounds in degrees
+        limit: Maximum rows returned
+
+    Returns:
+        List of geometry dictionaries
+    """
+    result = session.run(VIEWPORT_QUERY, minx=minx, miny=miny, maxx=maxx, maxy=maxy, limit=limit)
+    return [record.data() for record in result]
+
+
+def geometries_overlapping_viewport(session, minx: float, miny: float, maxx: float, maxy: float,
+                                    limit: int = 1000) -> List[Dict[str, Any]]:
+    """
+    Geometries whose bounding box overlaps a lon/lat box (polygons straddling the edge included).
+
+    Returns:
+        List of geometry dictionaries
+    """
+    result = session.run(OVERLAP_QUERY, minx=minx, miny=miny, maxx=maxx, maxy=maxy, limit=limit)
+    return [record.data() for record in result]
+
+
+def places_within_radius(session, longitude: float, latitude: float, meters: float,
+                         limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Places within a distance of a point, nearest first.
+
+    Args:
+        session: Neo4j session
+        longitude, latitude: Centre in degrees
+        meters: Search radius in metres (geodesic, WGS-84)
+        limit: Maximum rows returned
+
+    Returns:
+        List of place dictionaries with their distance in 'meters'
+    """
+    result = session.run(RADIUS_QUERY, longitude=longitude, latitude=latitude, meters=meters, limit=limit)
+    return [record.data() for record in result]
+
+
+def _random_viewports(count: int, size: float, seed: int = 1) -> List[Tuple[float, float, float, float]]:
+    rng = random.Random(seed)
+    minx, miny, maxx, maxy = WALES_BBOX
+    viewports = []
+    for _ in range(count):
+        x = rng.uniform(minx, maxx - size)
+        y = rng.uniform(miny, maxy - size)
+        viewports.append((x, y, x + size, y + size))
+    return viewports
+
+
+def _time_queries(run: Callable[[], Any], repeats: int) -> Dict[str, float]:
+    latencies = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        run()
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    latencies.sort()
+    return {
+        'p50': statistics.median(latencies),
+        'p95': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+    }
+
+
+def benchmark(session, repeats: int = 50, viewport_size: float = 0.1, radius: float = 5000):
+    """
+    Print p50/p95 latency of the point-index queries and of their float-scan equivalents.
+
+    Args:
+        session: Neo4j session
+        repeats: Queries per variant (each with a different random viewport/centre)
+        viewport_size: Viewport width and height in degrees
+        radius: Radius query distance in metres
+    """
+    viewports = _random_viewports(repeats, viewport_size)
+
+    def cycle(query, params):
+        items = iter(params)
+        return lambda: session.run(query, **next(items), limit=1000).consume()
+
+    boxes = [dict(minx=a, miny=b, maxx=c, maxy=d) for a, b, c, d in viewports]
+    centres = [dict(longitude=(a + c) / 2, latitude=(b + d) / 2, meters=radius) for a, b, c, d in viewports]
+
+    variants = [
+        ("Viewport, float scan", LEGACY_VIEWPORT_QUERY, boxes),
+        ("Viewport, point index", VIEWPORT_QUERY, boxes),
+        ("Bbox overlap, point index", OVERLAP_QUERY, boxes),
+        ("Radius, float scan", LEGACY_RADIUS_QUERY, centres),
+        ("Radius, point index", RADIUS_QUERY, centres),
+    ]
+
+    print(f"\n⏱️  Query latency over {repeats} random {viewport_size}° viewports / {radius:.0f} m radii:")
+    for label, query, params in variants:
+        session.run(query, **params[0], limit=1000).consume()  # Warm up the plan cache
+        stats = _time_queries(cycle(query, params), repeats)
+        print(f"  {label:<26} p50 {stats['p50']:8.2f} ms   p95 {stats['p95']:8.2f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description='Spatial viewport/radius queries and latency benchmark')
+    arg_parser.add_argument('--viewport', type=float, nargs=4, metavar=('MINX', 'MINY', 'MAXX', 'MAXY'),
+                            help='List geometries in a viewport')
+    arg_parser.add_argument('--radius', type=float, nargs=3, metavar=('LON', 'LAT', 'METERS'),
+                            help='List places within a radius')
+    arg_parser.add_argument('--benchmark', action='store_true', help='Compare point-index and float-scan latency')
+    arg_parser.add_argument('--repeats', type=int, default=50, help='Queries per benchmark variant')
+    args = arg_parser.parse_args()
+
+    load_dotenv()
+    driver = GraphDatabase.driver(
+        os.getenv('NEO4J_URI', 'bolt://localhost:7687'),
+        auth=(os.getenv('NEO4J_USER', 'neo4j'), os.getenv('NEO4J_PASSWORD', 'password'))
+    )
+
+    try:
+        with driver.session() as session:
+            if args.viewport:
+                rows = geometries_in_viewport(session, *args.viewport)
+                print(f"🗺️  {len(rows)} geometries in viewport")
+                for row in rows[:10]:
+                    print(f"  {row}")
+            if args.radius:
+                rows = places_within_radius(session, *args.radius)
+                print(f"📍 {len(rows)} places within {args.radius[2]:.0f} m")
+                for row in rows[:10]:
+                    print(f"  {row}")
+            if args.benchmark:
+                benchmark(session, args.repeats)
+            if not (args.viewport or args.radius or args.benchmark):
+                arg_parser.print_help()
+    finally:
+        driver.close()
@@ -0,0 +1,70 @@
+"""
+Tests for geometry_dedup.GeometryDeduplicator
+Run with: python -m pytest test_geometry_dedup.py
+"""
+
+from geometry_dedup import GeometryDeduplicator, shape_hashes
+
+
+BASE = "http://example.org/qpm/"
+SQUARE = "POLYGON ((0 0, 1 0, 1 1, 0 1, 0 0))"
+SQUARE_ROTATED = "POLYGON ((1 1, 0 1, 0 0, 1 0, 1 1))"
+
+
+def geometry(name, wkt):
+    return {'uri': BASE + name, 'geometry_id': name, 'wkt': wkt}
+
+
+def relationship(rel_type, source, target):
+    return {'type': rel_type, 'from_uri': BASE + source, 'to_uri': BASE + target}
+
+
+def test_equal_shapes_hash_alike():
+    assert shape_hashes([SQUARE])[0] == shape_hashes([SQUARE_ROTATED])[0]
+
+
+def test_edge_to_kept_copy_and_redirected_edge_are_written_once():
+    dedup = GeometryDeduplicator()
+    kept = dedup.dedup_geometries([geometry('place_1_geom_a', SQUARE),
+                                   geometry('place_1_geom_b', SQUARE_ROTATED)])
+    assert [g['geometry_id'] for g in kept] == ['place_1_geom_a']
+
+    rewritten = dedup.rewrite_relationships([
+        relationship('HAS_EXTRA_GEOMETRY', 'place_1', 'place_1_geom_a'),
+        relationship('HAS_EXTRA_GEOMETRY', 'place_1', 'place_1_geom_b'),
+        relationship('HAS_MAIN_GEOMETRY', 'place_1', 'place_1_geom_b'),
+    ])
+    assert rewritten == [
+        relationship('HAS_EXTRA_GEOMETRY', 'place_1', 'place_1_geom_a'),
+        relationship('HAS_MAIN_GEOMETRY', 'place_1', 'place_1_geom_a'),
+    ]
+
+
+class _FakeDriver:
+    """Driver whose sessions return fixed (shape_hash, geometry_id) rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query):
+        return iter(self.rows)
+
+
+def test_shapes_stored_by_an_earlier_import_are_kept():
+    dedup = GeometryDeduplicator()
+    stored = [{'shape_hash': shape_hashes([SQUARE])[0], 'geometry_id': 'unit_7_geom'}]
+    assert dedup.load_existing(_FakeDriver(stored)) == 1
+
+    kept = dedup.dedup_geometries([geometry('unit_7_geom', SQUARE), geometry('place_2_geom', SQUARE_ROTATED)])
+    assert [g['geometry_id'] for g in kept] == ['unit_7_geom']
+    rewritten = dedup.rewrite_relationships([relationship('HAS_MAIN_GEOMETRY', 'place_2', 'place_2_geom')])
+    assert rewritten[0]['to_uri'].rpartition('/')[2] == 'unit_7_geom'
@@ -0,0 +1,47 @@
+"""
+Tests for import_pipeline.run_pipeline
+Run with: python -m pytest test_import_pipeline.py
+"""
+
+from import_pipeline import run_pipeline
+from ttl_parser import UPDATED_KINDS
+
+
+PREFIXES = "@prefix : <http://qpm.ontology/2025#> .\n"
+
+
+class _RecordingImporter:
+    """Importer that applies writes like the MERGE queries: full records SET every property, updates only theirs."""
+
+    batch_size = 1000
+
+    def __init__(self):
+        self.writes = []
+        self.nodes = {}
+
+    def write_batch(self, kind, batch, hierarchy_type="Admin", merge=False):
+        self.writes.append((kind, len(batch)))
+        if kind == 'relationship':
+            return
+        partial = kind in UPDATED_KINDS
+        for record in batch:
+            if partial:
+                self.nodes.setdefault(record['uri'], {}).update(record)
+            else:
+                self.nodes[record['uri']] = dict(record)
+
+
+def test_update_batches_follow_the_records_they_update(tmp_path):
+    ttl = tmp_path / 'units.ttl'
+    lines = [PREFIXES]
+    lines += [f':unit_{i} a :Unit ; :unit_name "Unit {i}" .\n' for i in range(1500)]
+    lines += [f':unit_{i} :unit_h3 "h3_{i}" .\n' for i in range(1000)]
+    ttl.write_text(''.join(lines))
+
+    importer = _RecordingImporter()
+    run_pipeline(importer, [('Admin', str(ttl))], memory_limit_mb=16)
+
+    assert importer.writes == [('unit', 1000), ('unit', 500), ('unit_update', 1000)]
+    units = importer.nodes.values()
+    assert sum(1 for unit in units if unit.get('unit_h3')) == 1000
+    assert all(unit['unit_name'] for unit in units)
@@ -4,279 +4,669 @@ Parses Turtle RDF files and extracts entities and relationships
 """
 
 from rdflib import Graph, Namespace, RDF, RDFS, Literal
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 from tqdm import tqdm
-import re
-from wkt_parser import parse_wkt_point, parse_wkt_polygon, get_geometry_type, calculate_centroid
+from wkt_parser import GEOMETRY_TYPES, decode_wkt_batch, batch_metrics, get_geometry_type
+from ttl_stream import TurtleSyntaxError, iter_subject_blocks
+import uri_codec
+from record_store import RecordStore, concat_records, print_memory_report
 
 
+# Bump when extraction output changes, so cached results are invalidated
+PARSER_VERSION = 5
+
+# Geometries whose WKT is decoded together when streaming
+GEOMETRY_DECODE_BATCH = 1024
+
 # Define namespaces
 QPM = Namespace("http://qpm.ontology/2025#")
 GEO = Namespace("http://www.opengis.net/ont/geosparql#")
 XSD = Namespace("http://www.w3.org/2001/XMLSchema#")
 
+# QPM object properties and the Neo4j relationship types they map to
+RELATIONSHIP_TYPES = [
+    ('contained_by', 'CONTAINED_BY'),
+    ('belongs_to_hierarchy', 'BELONGS_TO_HIERARCHY'),
+    ('contained_by_unit', 'CONTAINED_BY_UNIT'),
+    ('base_place_parent', 'BASE_PLACE_PARENT'),
+    ('north_of', 'NORTH_OF'),
+    ('south_of', 'SOUTH_OF'),
+    ('east_of', 'EAST_OF'),
+    ('west_of', 'WEST_OF'),
+    ('hasMainGeometry', 'HAS_MAIN_GEOMETRY'),
+    ('hasExtraGeometry', 'HAS_EXTRA_GEOMETRY'),
+]
+RELATIONSHIP_PREDICATES = {QPM[qpm_rel]: neo4j_rel for qpm_rel, neo4j_rel in RELATIONSHIP_TYPES}
+
+# Record kinds produced by a single extraction pass
+RECORD_KINDS = ('hierarchy', 'unit', 'place', 'geometry', 'relationship')
+
+# Kinds iter_records yields for blocks that only add properties to an entity
+# streamed earlier; their records hold just the properties the block states
+UPDATE_KINDS = {kind: f'{kind}_update' for kind in RECORD_KINDS if kind != 'relationship'}
+UPDATED_KINDS = {update: kind for kind, update in UPDATE_KINDS.items()}
+
+# QPMParser attribute holding the records of each kind
+_KIND_ATTRS = dict(zip(RECORD_KINDS, ('hierarchies', 'units', 'places', 'geometries', 'relationships')))
+
+# Datatype properties copied onto Unit and Place records, with their value types
+UNIT_PROPERTIES = {
+    'unit_name': str,
+    'unit_type': str,
+    'unit_level': int,
+    'unit_h3': str,
+}
+PLACE_PROPERTIES = {
+    'place_name': str,
+    'place_type': str,
+    'place_function': str,
+    'place_key': str,
+    'place_level': int,
+    'place_h3': str,
+    'place_s2': str,
+    'model_source': str,
+    'geometry_source': str
+}
+
+# Resolved URIs for the extraction hot path (Namespace lookups build a new URIRef each time)
+_UNIT_PROPERTY_URIS = [(name, QPM[name], prop_type) for name, prop_type in UNIT_PROPERTIES.items()]
+_PLACE_PROPERTY_URIS = [(name, QPM[name], prop_type) for name, prop_type in PLACE_PROPERTIES.items()]
+_UNIT, _PLACE, _GEOMETRY, _HIERARCHY = QPM.Unit, QPM.Place, QPM.Geometry, QPM.Hierarchy
+_GEOMETRY_ROLE, _AS_WKT = QPM.geometry_role, GEO.asWKT
+_HIERARCHY_ID, _HIERARCHY_NAME = QPM.hierarchy_id, QPM.hierarchy_name
+_HIERARCHY_LEVELS, _UNITS_NUMBER = QPM.hierarchy_levels, QPM.units_number
+_KIND_TYPES = {'hierarchy': _HIERARCHY, 'unit': _UNIT, 'place': _PLACE, 'geometry': _GEOMETRY}
+
 
 class QPMParser:
     """Parser for QPM ontology TTL files"""
 
-    def __init__(self):
-        self.graph = Graph()
-        self.hierarchies = []
-        self.units = []
-        self.places = []
-        self.geometries = []
-        self.relationships = []
+    def __init__(self, compact: bool = False):
+        """
+        Initialize the parser.
 
-    def parse_file(self, file_path: str, show_progress: bool = True):
+        Args:
+            compact: Keep extracted records in column-backed RecordStores
+                instead of lists of dicts (much smaller for large files)
+        """
+        self.graph = Graph()
+        self.compact = compact
+        self.hierarchies = self._new_records('hierarchy')
+        self.units = self._new_records('unit')
+        self.places = self._new_records('place')
+        self.geometries = self._new_records('geometry')
+        self.relationships = self._new_records('relationship')
+        self.streaming = False
+        self.scopes = {}  # file path -> what that parse_file call added
+        self._entity_kinds = {}  # Entity URI -> kind, for every entity iter_records has yielded
+        self._streamed_rows = {}  # (kind, URI) -> row of the entity's record, when streaming into the parser
+        self._streamed_edges = set()  # Edges already streamed into the parser
+        self._replaced = {kind: {} for kind in RECORD_KINDS}  # Merged records for rows of compact stores
+        self._extracted_size = 0  # Graph size at the last single-pass extraction
+
+    def parse_file(self, file_path: str, show_progress: bool = True, streaming: bool = False) -> str:
         """
         Parse a TTL file and load into RDF graph.
 
+        The triples the file adds to the graph are recorded as a scope, so
+        that extract_*(scope=file_path) returns only what this file introduced
+        when several files are merged into the same parser.
+
         Args:
             file_path: Path to the TTL file
             show_progress: Show progress bar
+            streaming: Extract records block by block with the streaming
+                reader instead of loading the file into the RDF graph (the
+                records and a key per entity and edge are still kept).
+                Blocks that only add properties to an entity collected
+                earlier are merged into its record
+
+        Returns:
+            The scope name (the file path) to pass to the extract_* methods
         """
         print(f"📖 Parsing {file_path}...")
 
-        if show_progress:
-            # For large files, parse with progress indication
-            self.graph.parse(file_path, format='turtle')
-        else:
-            self.graph.parse(file_path, format='turtle')
+        if streaming:
+            self.streaming = True
+            offsets = {kind: len(getattr(self, attr)) for kind, attr in _KIND_ATTRS.items()}
+            decorated = {}  # Row -> merged record of geometries collected from an earlier file
+            for kind, record in self.iter_records(file_path):
+                if kind == 'relationship':
+                    key = (record['from_uri'], record['type'], record['to_uri'])
+                    if key not in self._streamed_edges:
+                        self._streamed_edges.add(key)
+                        self.relationships.append(record)
+                    continue
+
+                kind = UPDATED_KINDS.get(kind, kind)
+                records = getattr(self, _KIND_ATTRS[kind])
+                row = self._streamed_rows.get((kind, record['uri']))
+                if row is None:
+                    self._streamed_rows[(kind, record['uri'])] = len(records)
+                    records.append(record)
+                    continue
+
+                # A later block about a collected entity: merge it into the record
+                current = self._replaced[kind].get(row) or records[row]
+                merged = self._merge_records(current, record)
+                if merged == current:
+                    continue
+                if isinstance(records, RecordStore):
+                    self._replaced[kind][row] = merged
+                else:
+                    records[row] = merged
+                if kind == 'geometry' and row < offsets['geometry']:
+                    # Geometries are MERGEd on import, so like extract_all(scope) this file includes them
+                    decorated[row] = merged
+
+            self._apply_replacements()
+            records = {kind: self._tail(getattr(self, attr), offsets[kind]) for kind, attr in _KIND_ATTRS.items()}
+            if decorated:
+                records['geometry'] = concat_records('geometry', [records['geometry'], list(decorated.values())])
+            self.scopes[file_path] = {'records': records}
+            print(f"✅ Streamed {len(self.units)} units, {len(self.places)} places, "
+                  f"{len(self.geometries)} geometries, {len(self.relationships)} relationships")
+            return file_path
+
+        batch = Graph()
+        batch.parse(file_path, format='turtle')
+
+        scope = {'subjects': set(), 'typed': set(), 'edges': [], 'records': None}
+        first_file = len(self.graph) == 0
+        if first_file:
+            self.graph = batch
+
+        for triple in tqdm(batch, total=len(batch), desc="Recording new triples", disable=not show_progress):
+            if not first_file:
+                if triple in self.graph:
+                    continue
+                self.graph.add(triple)
+
+            subject, predicate, _ = triple
+            scope['subjects'].add(subject)
+            if predicate == RDF.type:
+                scope['typed'].add(subject)
+            elif predicate in RELATIONSHIP_PREDICATES:
+                scope['edges'].append(triple)
+
+        self.scopes[file_path] = scope
+        print(f"✅ Parsed {len(batch)} triples ({len(self.graph)} in graph)")
+        return file_path
+
+    def extract_all(self, scope: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Extract all entities and relationships in a single pass over the graph.
 
-        print(f"✅ Parsed {len(self.graph)} triples")
+        The graph is scanned once: relationship triples become records
+        directly, all other triples are grouped by subject and each subject
+        is then dispatched on rdf:type. The result is cached until more
+        triples are added to the graph.
 
-    def extract_hierarchies(self) -> List[Dict[str, Any]]:
-        """Extract all Hierarchy nodes from the graph."""
-        print("🗂️  Extracting Hierarchies...")
+        Args:
+            scope: Restrict the result to what one parse_file call added
 
-        hierarchies = []
-        query = """
-            SELECT ?h ?id ?name ?levels ?units_num
-            WHERE {
-                ?h a qpm:Hierarchy .
-                OPTIONAL { ?h qpm:hierarchy_id ?id }
-                OPTIONAL { ?h qpm:hierarchy_name ?name }
-                OPTIONAL { ?h qpm:hierarchy_levels ?levels }
-                OPTIONAL { ?h qpm:units_number ?units_num }
-            }
+        Returns:
+            Dictionary with hierarchies, units, places, geometries, and relationships
         """
+        if scope is not None:
+            return self._extract_scope(scope)
+
+        if not self.streaming and self._extracted_size != len(self.graph):
+            print("🔎 Extracting entities and relationships (single pass)...")
+
+            # One scan over all triples: relationships are emitted directly and
+            # everything else is grouped by subject for the rdf:type dispatch.
+            relationships = self._new_records('relationship')
+            subjects = {}
+            for subject, predicate, obj in tqdm(self.graph, total=len(self.graph), desc="Scanning triples"):
+                rel_type = RELATIONSHIP_PREDICATES.get(predicate)
+                if rel_type:
+                    relationships.append(self._build_relationship(subject, obj, rel_type))
+                    continue
+
+                entry = subjects.get(subject)
+                if entry is None:
+                    entry = subjects[subject] = ([], {})
+                if predicate == RDF.type:
+                    entry[0].append(obj)
+                else:
+                    entry[1].setdefault(predicate, obj)
+
+            extracted = {kind: self._new_records(kind) for kind in RECORD_KINDS}
+            extracted['relationship'] = relationships
+            geometries = []
+            for subject, (types, values) in subjects.items():
+                for kind, record in self._typed_records(subject, types, values):
+                    if kind == 'geometry':
+                        geometries.append(record)
+                    else:
+                        extracted[kind].append(record)
+            extracted['geometry'].extend(self._add_geometry_coordinates(geometries))
 
-        results = self.graph.query(query, initNs={'qpm': QPM})
+            self.hierarchies = extracted['hierarchy']
+            self.units = extracted['unit']
+            self.places = extracted['place']
+            self.geometries = extracted['geometry']
+            self.relationships = extracted['relationship']
+            self._extracted_size = len(self.graph)
 
-        for row in results:
-            hierarchy = {
-                'uri': str(row.h),
-                'hierarchy_id': int(row.id) if row.id else None,
-                'hierarchy_name': str(row.name) if row.name else None,
-                'hierarchy_levels': int(row.levels) if row.levels else None,
-                'units_number': int(row.units_num) if row.units_num else None
-            }
-            hierarchies.append(hierarchy)
+        return {
+            'hierarchies': self.hierarchies,
+            'units': self.units,
+            'places': self.places,
+            'geometries': self.geometries,
+            'relationships': self.relationships
+        }
 
-        self.hierarchies = hierarchies
+    def extract_hierarchies(self, scope: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Extract all Hierarchy nodes from the graph, optionally only those added by one file."""
+        print("🗂️  Extracting Hierarchies...")
+        hierarchies = self.extract_all(scope)['hierarchies']
         print(f"✅ Found {len(hierarchies)} hierarchies")
         return hierarchies
 
-    def extract_units(self) -> List[Dict[str, Any]]:
-        """Extract all Unit nodes from the graph."""
+    def extract_units(self, scope: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Extract all Unit nodes from the graph, optionally only those added by one file."""
         print("🏢 Extracting Units...")
-
-        units = []
-
-        # Query for all units
-        for unit_uri in tqdm(self.graph.subjects(RDF.type, QPM.Unit), desc="Processing units"):
-            unit = {
-                'uri': str(unit_uri),
-                'spatial_unit_id': self._extract_unit_id(unit_uri),
-            }
-
-            # Extract properties
-            for prop_name in ['unit_name', 'unit_type', 'unit_level', 'unit_h3']:
-                prop_uri = QPM[prop_name]
-                value = self.graph.value(unit_uri, prop_uri)
-                if value:
-                    if prop_name == 'unit_level':
-                        unit[prop_name] = int(value)
-                    else:
-                        unit[prop_name] = str(value)
-
-            units.append(unit)
-
-        self.units = units
+        units = self.extract_all(scope)['units']
         print(f"✅ Found {len(units)} units")
         return units
 
-    def extract_places(self) -> List[Dict[str, Any]]:
-        """Extract all Place nodes from the graph."""
+    def extract_places(self, scope: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Extract all Place nodes from the graph, optionally only those added by one file."""
         print("📍 Extracting Places...")
-
-        places = []
-
-        for place_uri in tqdm(self.graph.subjects(RDF.type, QPM.Place), desc="Processing places"):
-            place = {
-                'uri': str(place_uri),
-                'place_id': self._extract_place_id(place_uri),
-            }
-
-            # Extract properties
-            property_mapping = {
-                'place_name': str,
-                'place_type': str,
-                'place_function': str,
-                'place_key': str,
-                'place_level': int,
-                'place_h3': str,
-                'place_s2': str,
-                'model_source': str,
-                'geometry_source': str
-            }
-
-            for prop_name, prop_type in property_mapping.items():
-                prop_uri = QPM[prop_name]
-                value = self.graph.value(place_uri, prop_uri)
-                if value:
-                    try:
-                        place[prop_name] = prop_type(value)
-                    except (ValueError, TypeError):
-                        place[prop_name] = str(value)
-
-            places.append(place)
-
-        self.places = places
+        places = self.extract_all(scope)['places']
         print(f"✅ Found {len(places)} places")
         return places
 
-    def extract_geometries(self) -> List[Dict[str, Any]]:
-        """Extract all Geometry nodes from the graph."""
+    def extract_geometries(self, scope: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Extract all Geometry nodes from the graph, optionally only those added by one file."""
         print("🗺️  Extracting Geometries...")
-
-        geometries = []
-
-        for geom_uri in tqdm(self.graph.subjects(RDF.type, QPM.Geometry), desc="Processing geometries"):
-            geom = {
-                'uri': str(geom_uri),
-                'geometry_id': str(geom_uri).split('/')[-1],  # Extract ID from URI
-            }
-
-            # Extract geometry role
-            role = self.graph.value(geom_uri, QPM.geometry_role)
-            geom['geometry_role'] = str(role) if role else 'main'
-
-            # Extract WKT
-            wkt = self.graph.value(geom_uri, GEO.asWKT)
-            if wkt:
-                geom['wkt'] = str(wkt)
-                geom['geometry_type'] = get_geometry_type(str(wkt))
-
-                # Parse coordinates based on type
-                if geom['geometry_type'] == 'POINT':
-                    coords = parse_wkt_point(str(wkt))
-                    if coords:
-                        geom['longitude'] = coords[0]
-                        geom['latitude'] = coords[1]
-
-                elif geom['geometry_type'] == 'POLYGON':
-                    coords = parse_wkt_polygon(str(wkt))
-                    if coords:
-                        # Calculate centroid for polygon
-                        centroid = calculate_centroid(coords)
-                        if centroid:
-                            geom['longitude'] = centroid[0]
-                            geom['latitude'] = centroid[1]
-
-            geometries.append(geom)
-
-        self.geometries = geometries
+        geometries = self.extract_all(scope)['geometries']
         print(f"✅ Found {len(geometries)} geometries")
         return geometries
 
-    def extract_relationships(self) -> List[Dict[str, Any]]:
-        """Extract all relationships from the graph."""
+    def extract_relationships(self, scope: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Extract all relationships from the graph, optionally only those added by one file."""
         print("🔗 Extracting Relationships...")
-
-        relationships = []
-
-        # Define relationship types to extract
-        relationship_types = [
-            ('contained_by', 'CONTAINED_BY'),
-            ('belongs_to_hierarchy', 'BELONGS_TO_HIERARCHY'),
-            ('contained_by_unit', 'CONTAINED_BY_UNIT'),
-            ('base_place_parent', 'BASE_PLACE_PARENT'),
-            ('north_of', 'NORTH_OF'),
-            ('south_of', 'SOUTH_OF'),
-            ('east_of', 'EAST_OF'),
-            ('west_of', 'WEST_OF'),
-            ('hasMainGeometry', 'HAS_MAIN_GEOMETRY'),
-            ('hasExtraGeometry', 'HAS_EXTRA_GEOMETRY'),
-        ]
-
-        for qpm_rel, neo4j_rel in tqdm(relationship_types, desc="Relationship types"):
-            qpm_uri = QPM[qpm_rel]
-
-            for subject, obj in self.graph.subject_objects(qpm_uri):
-                rel = {
-                    'from_uri': str(subject),
-                    'to_uri': str(obj),
-                    'type': neo4j_rel,
-                    'from_id': self._extract_id(str(subject)),
-                    'to_id': self._extract_id(str(obj))
-                }
-                relationships.append(rel)
-
-        self.relationships = relationships
+        relationships = self.extract_all(scope)['relationships']
         print(f"✅ Found {len(relationships)} relationships")
         return relationships
 
+    def _extract_scope(self, scope: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Extract the entities and edges introduced by one parse_file call.
+
+        Entities are included when that file added their rdf:type triple.
+        Geometries are also included when the file only added properties to
+        an existing geometry, since geometries are MERGEd on import. Edges
+        are included when the file added the relationship triple itself.
+        """
+        if scope not in self.scopes:
+            raise KeyError(f"No parse scope recorded for {scope}")
+
+        info = self.scopes[scope]
+        if info['records'] is None:
+            extracted = {kind: self._new_records(kind) for kind in RECORD_KINDS}
+            extracted['relationship'].extend(
+                self._build_relationship(subject, obj, RELATIONSHIP_PREDICATES[predicate])
+                for subject, predicate, obj in info['edges']
+            )
+
+            geometries = []
+            for subject in info['subjects']:
+                types = []
+                values = {}
+                for predicate, obj in self.graph.predicate_objects(subject):
+                    if predicate == RDF.type:
+                        types.append(obj)
+                    elif predicate not in RELATIONSHIP_PREDICATES:
+                        values.setdefault(predicate, obj)
+
+                for kind, record in self._typed_records(subject, types, values):
+                    if kind == 'geometry':
+                        geometries.append(record)
+                    elif subject in info['typed']:
+                        extracted[kind].append(record)
+
+            extracted['geometry'].extend(self._add_geometry_coordinates(geometries))
+            info['records'] = extracted
+
+        records = info['records']
+        return {
+            'hierarchies': records['hierarchy'],
+            'units': records['unit'],
+            'places': records['place'],
+            'geometries': records['geometry'],
+            'relationships': records['relationship']
+        }
+
+    def _new_records(self, kind: str):
+        """Empty record container for one kind: a RecordStore in compact mode, else a list."""
+        return RecordStore(kind) if self.compact else []
+
+    @staticmethod
+    def _tail(records, offset: int):
+        """Records appended after offset, as a view for stores and a copy for lists."""
+        if isinstance(records, RecordStore):
+            return records.view(offset)
+        return records[offset:]
+
+    @staticmethod
+    def _merge_records(current: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of current with the properties it lacks (missing or None) taken from update."""
+        merged = dict(current)
+        for name, value in update.items():
+            if merged.get(name) is None:
+                merged[name] = value
+        return merged
+
+    def _apply_replacements(self):
+        """Rebuild compact stores that have merged records, since stores are append-only."""
+        for kind, rows in self._replaced.items():
+            if not rows:
+                continue
+            store = RecordStore(kind)
+            store.extend(rows.get(row, record) for row, record in enumerate(getattr(self, _KIND_ATTRS[kind])))
+            setattr(self, _KIND_ATTRS[kind], store)
+            rows.clear()
+
+    def iter_records(self, file_path: str, fallback: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream records from a TTL file without building an RDF graph.
+
+        Each subject block is turned into its records as soon as it is read.
+        The parser remembers the kind of every entity it has yielded (one
+        dict entry per entity, none per edge), so a later block about the
+        same entity, in this file or an earlier one, is yielded as an update:
+        kind UPDATE_KINDS[kind] and a record holding only the properties
+        that block states. Property-only blocks about entities not typed yet
+        are skipped.
+
+        Args:
+            file_path: Path to the TTL file
+            fallback: If the streaming reader cannot parse the file, read it
+                into an rdflib Graph and yield its records from there
+                (records yielded before the error are yielded again)
+
+        Yields:
+            Tuples of (kind, record) where kind is one of 'hierarchy', 'unit',
+            'place', 'geometry', 'relationship' or an UPDATE_KINDS value and
+            record has the same shape as the matching extract_* output
+        """
+        try:
+            yield from self._block_records(iter_subject_blocks(file_path))
+        except TurtleSyntaxError as e:
+            if not fallback:
+                raise
+            print(f"⚠️  Streaming reader cannot parse {file_path} ({e}); reading it from an rdflib graph instead")
+            graph = Graph()
+            graph.parse(file_path, format='turtle')
+            yield from self._block_records(
+                (subject, graph.predicate_objects(subject)) for subject in graph.subjects(unique=True)
+            )
+
+    def _block_records(self, blocks) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Records of (subject, pairs) blocks, with geometry WKT decoded in batches."""
+        geometries = []
+        held = {}  # URI -> geometry record held back in this batch
+        try:
+            for subject, pairs in blocks:
+                for kind, record in self._subject_records(subject, pairs):
+                    if kind not in ('geometry', UPDATE_KINDS['geometry']):
+                        if kind in UPDATE_KINDS:
+                            self._entity_kinds[record['uri']] = kind
+                        yield kind, record
+                        continue
+
+                    if kind != 'geometry' and record['uri'] in held:
+                        # Later block about a geometry still held back: merge before decoding
+                        held_record = held[record['uri']]
+                        held_record.update(self._merge_records(held_record, record))
+                        continue
+
+                    # Geometries are held back briefly so their WKT is decoded in batches
+                    if kind == 'geometry':
+                        self._entity_kinds[record['uri']] = kind
+                        held[record['uri']] = record
+                    geometries.append((kind, record))
+                    if len(geometries) >= GEOMETRY_DECODE_BATCH:
+                        yield from self._decoded_geometries(geometries)
+                        geometries = []
+                        held = {}
+        except TurtleSyntaxError:
+            # Held-back geometries were never yielded; a fallback pass must yield them as new
+            for uri in held:
+                del self._entity_kinds[uri]
+            raise
+
+        yield from self._decoded_geometries(geometries)
+
+    def _decoded_geometries(self, geometries: List[Tuple[str, Dict[str, Any]]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Add coordinates to held-back geometry records and yield them."""
+        self._add_geometry_coordinates([record for _, record in geometries])
+        for kind, record in geometries:
+            yield kind, record
+
+    def _subject_records(self, subject, pairs) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Build every record contributed by one subject block.
+
+        Args:
+            subject: Subject term
+            pairs: Iterable of all (predicate, object) pairs of the subject
+
+        Yields:
+            Tuples of (kind, record); entities yielded before come back as updates
+        """
+        types = []
+        values = {}
+
+        for predicate, obj in pairs:
+            rel_type = RELATIONSHIP_PREDICATES.get(predicate)
+            if rel_type:
+                yield 'relationship', self._build_relationship(subject, obj, rel_type)
+            elif predicate == RDF.type:
+                types.append(obj)
+            else:
+                values.setdefault(predicate, obj)
+
+        if not types and values:
+            # Properties for an entity typed in an earlier block
+            kind = self._entity_kinds.get(str(subject))
+            if kind:
+                types.append(_KIND_TYPES[kind])
+
+        for kind, record in self._typed_records(subject, types, values):
+            if self._entity_kinds.get(record['uri']) == kind:
+                yield UPDATE_KINDS[kind], self._update_record(kind, record, values)
+            else:
+                yield kind, record
+
+    def _update_record(self, kind: str, record: Dict[str, Any], values: Dict) -> Dict[str, Any]:
+        """Drop the defaults a builder filled in for properties the block does not state."""
+        if kind == 'geometry' and _GEOMETRY_ROLE not in values:
+            del record['geometry_role']
+        elif kind == 'hierarchy':
+            record = {name: value for name, value in record.items() if value is not None}
+            # Hierarchies are MERGEd on hierarchy_id, so an update needs one
+            record.setdefault('hierarchy_id', self._extract_hierarchy_id(record['uri']))
+        return record
+
+    def _typed_records(self, subject, types: List, values: Dict) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Dispatch a subject on its rdf:type values and build its entity records."""
+        for rdf_type in types:
+            if rdf_type == _UNIT:
+                yield 'unit', self._build_unit(subject, values)
+            elif rdf_type == _PLACE:
+                yield 'place', self._build_place(subject, values)
+            elif rdf_type == _GEOMETRY:
+                yield 'geometry', self._build_geometry(subject, values.get(_GEOMETRY_ROLE), values.get(_AS_WKT))
+            elif rdf_type == _HIERARCHY:
+                yield 'hierarchy', self._build_hierarchy(
+                    subject,
+                    values.get(_HIERARCHY_ID),
+                    values.get(_HIERARCHY_NAME),
+                    values.get(_HIERARCHY_LEVELS),
+                    values.get(_UNITS_NUMBER)
+                )
+
+    def _build_hierarchy(self, uri, hierarchy_id, name, levels, units_num) -> Dict[str, Any]:
+        """Build a hierarchy record from its property values."""
+        return {
+            'uri': str(uri),
+            'hierarchy_id': int(hierarchy_id) if hierarchy_id else None,
+            'hierarchy_name': str(name) if name else None,
+            'hierarchy_levels': int(levels) if levels else None,
+            'units_number': int(units_num) if units_num else None
+        }
+
+    def _build_unit(self, uri, values: Dict) -> Dict[str, Any]:
+        """Build a unit record from a predicate -> value mapping."""
+        unit = {
+            'uri': str(uri),
+            'spatial_unit_id': self._extract_unit_id(uri),
+        }
+
+        for prop_name, prop_uri, prop_type in _UNIT_PROPERTY_URIS:
+            value = values.get(prop_uri)
+            if value:
+                unit[prop_name] = prop_type(value)
+
+        return unit
+
+    def _build_place(self, uri, values: Dict) -> Dict[str, Any]:
+        """Build a place record from a predicate -> value mapping."""
+        place = {
+            'uri': str(uri),
+            'place_id': self._extract_place_id(uri),
+        }
+
+        for prop_name, prop_uri, prop_type in _PLACE_PROPERTY_URIS:
+            value = values.get(prop_uri)
+            if value:
+                try:
+                    place[prop_name] = prop_type(value)
+                except (ValueError, TypeError):
+                    place[prop_name] = str(value)
+
+        return place
+
+    def _build_geometry(self, uri, role, wkt) -> Dict[str, Any]:
+        """
+        Build a geometry record from its role and WKT literal.
+
+        Coordinates are added afterwards by _add_geometry_coordinates, which
+        decodes the WKT of many geometries at once.
+        """
+        geom = {
+            'uri': str(uri),
+            'geometry_id': uri_codec.geometry_id(str(uri)),  # Extract ID from URI
+            'geometry_role': str(role) if role else 'main',
+        }
+
+        if wkt:
+            geom['wkt'] = str(wkt)
+            geom['geometry_type'] = get_geometry_type(str(wkt))
+
+        return geom
+
+    def _add_geometry_coordinates(self, geometries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Add coordinates and shape metrics to geometry records with one batch WKT decode.
+
+        Every geometry with coordinates gets longitude/latitude (the point
+        itself, or the area-weighted centroid of a polygon/multipolygon),
+        its area in square degrees, its bounding box (minx, miny, maxx,
+        maxy) and its vertex count.
+
+        Args:
+            geometries: Geometry records from _build_geometry (updated in place)
+
+        Returns:
+            The same list
+        """
+        if not geometries:
+            return geometries
+
+        batch = decode_wkt_batch([geom.get('wkt') for geom in geometries])
+        metrics = batch_metrics(batch)
+        columns = zip(
+            batch['geometry_type'].tolist(),
+            metrics['centroid'].tolist(),
+            metrics['area'].tolist(),
+            metrics['minx'].tolist(),
+            metrics['miny'].tolist(),
+            metrics['maxx'].tolist(),
+            metrics['maxy'].tolist(),
+            metrics['vertex_count'].tolist(),
+        )
+
+        for geom, (type_code, centroid, area, minx, miny, maxx, maxy, vertex_count) in zip(geometries, columns):
+            if not vertex_count:
+                continue
+            # Decoded type also covers WKT with a leading CRS IRI
+            geom['geometry_type'] = GEOMETRY_TYPES[type_code]
+            geom['longitude'] = centroid[0]
+            geom['latitude'] = centroid[1]
+            geom['area'] = area
+            geom['minx'] = minx
+            geom['miny'] = miny
+            geom['maxx'] = maxx
+            geom['maxy'] = maxy
+            geom['vertex_count'] = vertex_count
+
+        return geometries
+
+    def _build_relationship(self, subject, obj, rel_type: str) -> Dict[str, Any]:
+        """Build a relationship record for one (subject, object) pair, tagged with its endpoint kinds."""
+        from_uri, to_uri = str(subject), str(obj)
+        from_kind, to_kind = uri_codec.endpoint_kinds(rel_type, from_uri, to_uri)
+        return {
+            'from_uri': from_uri,
+            'to_uri': to_uri,
+            'type': rel_type,
+            'from_id': self._extract_id(from_uri),
+            'to_id': self._extract_id(to_uri),
+            'from_kind': from_kind,
+            'to_kind': to_kind,
+        }
+
     def _extract_unit_id(self, uri) -> Optional[int]:
         """Extract unit ID from URI like qpm:unit_123"""
-        match = re.search(r'unit_(\d+)', str(uri))
-        return int(match.group(1)) if match else None
+        return uri_codec.unit_id(str(uri))
 
     def _extract_place_id(self, uri) -> Optional[int]:
         """Extract place ID from URI like qpm:place_456"""
-        match = re.search(r'place_(\d+)', str(uri))
-        return int(match.group(1)) if match else None
+        return uri_codec.place_id(str(uri))
 
     def _extract_hierarchy_id(self, uri) -> Optional[int]:
         """Extract hierarchy ID from URI like qpm:hierarchy_1"""
-        match = re.search(r'hierarchy_(\d+)', str(uri))
-        return int(match.group(1)) if match else None
+        return uri_codec.hierarchy_id(str(uri))
 
     def _extract_id(self, uri: str) -> Optional[Any]:
         """Extract ID from any URI"""
-        # Try different patterns
-        for pattern in [r'unit_(\d+)', r'place_(\d+)', r'hierarchy_(\d+)', r'place_(\d+)_.*_geom']:
-            match = re.search(pattern, uri)
-            if match:
-                try:
-                    return int(match.group(1))
-                except ValueError:
-                    return match.group(1)
-        return None
+        return uri_codec.entity_id(str(uri))
 
     def get_all_data(self) -> Dict[str, List]:
         """Get all extracted data in one call."""
-        return {
-            'hierarchies': self.hierarchies if self.hierarchies else self.extract_hierarchies(),
-            'units': self.units if self.units else self.extract_units(),
-            'places': self.places if self.places else self.extract_places(),
-            'geometries': self.geometries if self.geometries else self.extract_geometries(),
-            'relationships': self.relationships if self.relationships else self.extract_relationships()
-        }
+        return self.extract_all()
 
 
-def parse_ttl_file(file_path: str) -> Dict[str, List]:
+def parse_ttl_file(file_path: str, streaming: bool = False, compact: bool = False) -> Dict[str, List]:
     """
     Convenience function to parse a TTL file and extract all data.
 
     Args:
         file_path: Path to TTL file
+        streaming: Use the streaming reader instead of an in-memory RDF graph
+        compact: Keep records in column-backed RecordStores
 
     Returns:
         Dictionary with hierarchies, units, places, geometries, and relationships
     """
-    parser = QPMParser()
-    parser.parse_file(file_path)
+    parser = QPMParser(compact=compact)
+    parser.parse_file(file_path, streaming=streaming)
     return parser.get_all_data()
 
 
@@ -284,11 +674,13 @@ if __name__ == "__main__":
     # Test with a sample file
     import sys
 
-    if len(sys.argv) > 1:
-        file_path = sys.argv[1]
+    args = [arg for arg in sys.argv[1:] if arg not in ('--stream', '--compact')]
+
+    if args:
+        file_path = args[0]
         print(f"Testing parser with {file_path}")
 
-        data = parse_ttl_file(file_path)
+        data = parse_ttl_file(file_path, streaming='--stream' in sys.argv, compact='--compact' in sys.argv)
 
         print("\n📊 Summary:")
         print(f"  Hierarchies: {len(data['hierarchies'])}")
@@ -296,6 +688,7 @@ if __name__ == "__main__":
         print(f"  Places: {len(data['places'])}")
         print(f"  Geometries: {len(data['geometries'])}")
         print(f"  Relationships: {len(data['relationships'])}")
+        print_memory_report(data)
 
         # Show samples
         if data['hierarchies']:
@@ -307,4 +700,4 @@ if __name__ == "__main__":
         if data['geometries']:
             print("\n🗺️  Sample Geometry:", data['geometries'][0])
     else:
-        print("Usage: python ttl_parser.py <path_to_ttl_file>")
\ No newline at end of file
+        print("Usage: python ttl_parser.py [--stream] [--compact] <path_to_ttl_file>")
\ No newline at end of file
@@ -0,0 +1,267 @@
+"""
+Streaming Turtle Reader for QPM Data Files
+Reads QPM Turtle files one subject block at a time without building an rdflib Graph
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.namespace import RDF, XSD
+
+
+# One Turtle token, optionally preceded by whitespace
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<comment>\#[^\n]*)
+      | (?P<iri><[^<>"{}|^`\\\s]*>)
+      | (?P<long_string>"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\')
+      | (?P<long_open>"""|\'\'\')
+      | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+      | (?P<datatype>\^\^)
+      | (?P<at>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+      | (?P<number>[+-]?(?:\d*\.\d+(?:[eE][+-]?\d+)?|\d+\.?\d*[eE][+-]?\d+|\d+))
+      | (?P<bnode>_:[\w-](?:[\w.-]*[\w-])?)
+      | (?P<pname>(?:[A-Za-z][\w-]*(?:\.[\w-]+)*)?:(?:[\w:%-](?:[\w.:%-]*[\w:%-])?)?)
+      | (?P<punct>[;,.\[\]()])
+      | (?P<word>[A-Za-z]+)
+    )''', re.VERBOSE)
+
+_ESCAPE_RE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))')
+_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+
+class TurtleSyntaxError(ValueError):
+    """Raised when a file uses Turtle syntax the streaming reader cannot handle."""
+
+
+def _unescape(match) -> str:
+    if match.group(1) or match.group(2):
+        return chr(int(match.group(1) or match.group(2), 16))
+    return _ESCAPES.get(match.group(3), match.group(3))
+
+
+def _tokenize(file_obj) -> Iterator[Tuple[str, str, int]]:
+    """
+    Yield (kind, text, line_number) tokens from an open Turtle file.
+
+    Only triple-quoted strings may span lines, so the buffer never holds
+    more than one line plus any open long string.
+    """
+    buffer = ''
+    line_number = 0
+
+    for line in file_obj:
+        line_number += 1
+        buffer += line
+        pos = 0
+
+        while True:
+            match = _TOKEN_RE.match(buffer, pos)
+            if not match:
+                break
+            kind = match.lastgroup
+            if kind == 'long_open':
+                # Long string continues on the next line
+                pos = match.start(kind)
+                break
+            pos = match.end()
+            if kind != 'comment':
+                yield kind, match.group(kind), line_number
+
+        rest = buffer[pos:]
+        if not rest.strip():
+            buffer = ''
+        elif rest[:3] in ('"""', "'''"):
+            buffer = rest
+        else:
+            raise TurtleSyntaxError(f"Line {line_number}: cannot parse '{rest.strip()[:40]}'")
+
+    if buffer.strip():
+        raise TurtleSyntaxError(f"Line {line_number}: unterminated string at end of file")
+
+
+class _TokenStream:
+    """Token iterator with one token of lookahead."""
+
+    def __init__(self, tokens: Iterator[Tuple[str, str, int]]):
+        self._tokens = tokens
+        self._peeked = None
+
+    def peek(self) -> Optional[Tuple[str, str, int]]:
+        if self._peeked is None:
+            self._peeked = next(self._tokens, None)
+        return self._peeked
+
+    def next(self) -> Tuple[str, str, int]:
+        token = self.peek()
+        if token is None:
+            raise TurtleSyntaxError("Unexpected end of file")
+        self._peeked = None
+        return token
+
+
+def iter_subject_blocks(file_path: str) -> Iterator[Tuple[URIRef, List[Tuple[URIRef, object]]]]:
+    """
+    Stream a QPM Turtle file one subject block at a time.
+
+    Each ``subject pred obj ; pred obj , obj .`` statement is yielded as
+    ``(subject, [(predicate, object), ...])`` with rdflib terms, so memory
+    use is bounded by the largest block rather than by the file size.
+    Nested blank nodes (``[ ... ]``) and collections (``( ... )``) are not
+    part of the QPM data layout and raise TurtleSyntaxError.
+
+    Args:
+        file_path: Path to the TTL file
+
+    Yields:
+        Tuples of (subject, list of (predicate, object) pairs)
+    """
+    prefixes: Dict[str, str] = {}
+    base = ''
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        tokens = _TokenStream(_tokenize(f))
+
+        while tokens.peek() is not None:
+            kind, text, line = tokens.peek()
+
+            if kind == 'at' and text in ('@prefix', '@base'):
+                tokens.next()
+                base = _read_directive(tokens, text[1:], prefixes, base)
+                _expect(tokens, '.')
+                continue
+
+            if kind == 'word' and text.upper() in ('PREFIX', 'BASE'):
+                tokens.next()
+                base = _read_directive(tokens, text.lower(), prefixes, base)
+                continue
+
+            subject = _read_term(tokens, prefixes, base)
+            if isinstance(subject, Literal):
+                raise TurtleSyntaxError(f"Line {line}: literal used as subject")
+
+            yield subject, _read_predicate_objects(tokens, prefixes, base)
+
+
+def _read_directive(tokens: _TokenStream, directive: str, prefixes: Dict[str, str], base: str) -> str:
+    """Read the body of a prefix/base directive and return the (possibly new) base."""
+    if directive == 'prefix':
+        kind, name, line = tokens.next()
+        if kind != 'pname' or not name.endswith(':'):
+            raise TurtleSyntaxError(f"Line {line}: expected prefix name, got '{name}'")
+        kind, iri, line = tokens.next()
+        if kind != 'iri':
+            raise TurtleSyntaxError(f"Line {line}: expected IRI for prefix '{name}'")
+        iri = iri[1:-1]
+        prefixes[name[:-1]] = iri if ':' in iri else base + iri
+        return base
+
+    kind, iri, line = tokens.next()
+    if kind != 'iri':
+        raise TurtleSyntaxError(f"Line {line}: expected IRI for base")
+    return iri[1:-1]
+
+
+def _read_predicate_objects(tokens: _TokenStream, prefixes: Dict[str, str], base: str) -> List[Tuple[URIRef, object]]:
+    """Read a predicate-object list up to and including the closing '.'."""
+    pairs = []
+
+    while True:
+        kind, text, line = tokens.peek() or ('punct', '.', 0)
+        if kind == 'punct' and text == '.':
+            tokens.next()
+            return pairs
+
+        predicate = _read_term(tokens, prefixes, base, predicate=True)
+
+        while True:
+            pairs.append((predicate, _read_term(tokens, prefixes, base)))
+            kind, text, line = tokens.next()
+            if kind != 'punct' or text not in ',;.':
+                raise TurtleSyntaxError(f"Line {line}: expected ',', ';' or '.', got '{text}'")
+            if text == ',':
+                continue
+            if text == '.':
+                return pairs
+            break
+
+        # ';' may be repeated or directly followed by '.'
+        while tokens.peek() and tokens.peek()[:2] == ('punct', ';'):
+            tokens.next()
+
+
+def _read_term(tokens: _TokenStream, prefixes: Dict[str, str], base: str, predicate: bool = False):
+    """Read a single IRI, prefixed name, blank node or literal."""
+    kind, text, line = tokens.next()
+
+    if kind == 'iri':
+        iri = text[1:-1]
+        return URIRef(iri if ':' in iri else base + iri)
+
+    if kind == 'pname':
+        prefix, _, local = text.partition(':')
+        if prefix not in prefixes:
+            raise TurtleSyntaxError(f"Line {line}: undeclared prefix '{prefix}:'")
+        return URIRef(prefixes[prefix] + local.replace('\\', ''))
+
+    if kind == 'word' and text == 'a' and predicate:
+        return RDF.type
+
+    if predicate:
+        raise TurtleSyntaxError(f"Line {line}: expected predicate, got '{text}'")
+
+    if kind == 'bnode':
+        return BNode(text[2:])
+
+    if kind in ('string', 'long_string'):
+        quote = 3 if kind == 'long_string' else 1
+        lexical = _ESCAPE_RE.sub(_unescape, text[quote:-quote])
+        following = tokens.peek()
+        if following and following[0] == 'at':
+            tokens.next()
+            return Literal(lexical, lang=following[1][1:])
+        if following and following[0] == 'datatype':
+            tokens.next()
+            return Literal(lexical, datatype=_read_term(tokens, prefixes, base, predicate=True))
+        return Literal(lexical)
+
+    if kind == 'number':
+        if 'e' in text or 'E' in text:
+            return Literal(text, datatype=XSD.double)
+        if '.' in text:
+            return Literal(text, datatype=XSD.decimal)
+        return Literal(text, datatype=XSD.integer)
+
+    if kind == 'word' and text in ('true', 'false'):
+        return Literal(text, datatype=XSD.boolean)
+
+    if kind == 'punct' and text in '[(':
+        raise TurtleSyntaxError(
+            f"Line {line}: blank node property lists and collections are not supported "
+            f"by the streaming reader; parse this file with QPMParser.parse_file instead"
+        )
+
+    raise TurtleSyntaxError(f"Line {line}: unexpected token '{text}'")
+
+
+def _expect(tokens: _TokenStream, punct: str):
+    kind, text, line = tokens.next()
+    if kind != 'punct' or text != punct:
+        raise TurtleSyntaxError(f"Line {line}: expected '{punct}', got '{text}'")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        blocks = 0
+        triples = 0
+        for subject, pairs in iter_subject_blocks(sys.argv[1]):
+            if blocks == 0:
+                print(f"First block: {subject} ({len(pairs)} triples)")
+            blocks += 1
+            triples += len(pairs)
+        print(f"✅ Streamed {blocks} subject blocks, {triples} triples")
+    else:
+        print("Usage: python ttl_stream.py <path_to_ttl_file>")
@@ -0,0 +1,162 @@
+"""
+URI Codec for the QPM Namespace
+Decodes entity URIs such as qpm:unit_11 into typed (kind, id) pairs
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+
+# Entity kinds in the order IDs are resolved when a URI mentions several
+ID_KINDS = ('unit', 'place', 'hierarchy')
+
+# Relationship types whose target is a Geometry node (the URI names its owner)
+GEOMETRY_RELATIONSHIP_TYPES = ('HAS_MAIN_GEOMETRY', 'HAS_EXTRA_GEOMETRY')
+
+# Memoized URIs; parent URIs such as qpm:unit_11 repeat on most relationships
+URI_CACHE_SIZE = 1 << 16
+
+# Common case: the local name starts with exactly one kind and its number,
+# e.g. unit_11, place_60 or place_60_main_geom
+_LOCAL_RE = re.compile(r'(unit|place|hierarchy)_(\d+)(.*)', re.DOTALL)
+_ANY_KIND_RE = re.compile(r'(?:unit|place|hierarchy)_\d')
+_KIND_RES = {kind: re.compile(kind + r'_(\d+)') for kind in ID_KINDS}
+
+
+@lru_cache(maxsize=URI_CACHE_SIZE)
+def _decode(uri: str) -> Tuple[Optional[str], Optional[int], Optional[int], Optional[int], Optional[int]]:
+    """(kind, id, unit id, place id, hierarchy id) of a URI, None where absent."""
+    cut = max(uri.rfind('#'), uri.rfind('/')) + 1
+    match = _LOCAL_RE.match(uri, cut)
+
+    # One kind marker in the whole URI: the local name decides everything
+    if match and not _ANY_KIND_RE.search(uri, 0, cut) and not _ANY_KIND_RE.search(match.group(3)):
+        kind = match.group(1)
+        number = int(match.group(2))
+        return (kind, number,
+                number if kind == 'unit' else None,
+                number if kind == 'place' else None,
+                number if kind == 'hierarchy' else None)
+
+    # Anything else: search for each kind separately, like the original lookups
+    ids = []
+    for kind in ID_KINDS:
+        found = _KIND_RES[kind].search(uri)
+        ids.append(int(found.group(1)) if found else None)
+    for kind, number in zip(ID_KINDS, ids):
+        if number is not None:
+            return (kind, number, *ids)
+    return (None, None, *ids)
+
+
+def decode_uri(uri: str) -> Tuple[Optional[str], Optional[int]]:
+    """
+    Decode a QPM URI into its entity kind and numeric ID.
+
+    Units take precedence over places and places over hierarchies, so a
+    geometry URI such as .../place_60_main_geom decodes to its owner
+    ('place', 60).
+
+    Args:
+        uri: URI string (pass str(term) for rdflib terms)
+
+    Returns:
+        Tuple of (kind, id), or (None, None) if the URI has no QPM ID
+    """
+    return _decode(uri)[:2]
+
+
+def entity_id(uri: str) -> Optional[int]:
+    """ID of the entity a URI refers to, as used for relationship endpoints."""
+    return _decode(uri)[1]
+
+
+def unit_id(uri: str) -> Optional[int]:
+    """Unit ID from a URI like qpm:unit_123."""
+    return _decode(uri)[2]
+
+
+def place_id(uri: str) -> Optional[int]:
+    """Place ID from a URI like qpm:place_456."""
+    return _decode(uri)[3]
+
+
+def hierarchy_id(uri: str) -> Optional[int]:
+    """Hierarchy ID from a URI like qpm:hierarchy_1."""
+    return _decode(uri)[4]
+
+
+def geometry_id(uri: str) -> str:
+    """Geometry ID: the last path segment of a geometry URI (not memoized, geometry URIs are unique)."""
+    return uri.rpartition('/')[2]
+
+
+def endpoint_kinds(rel_type: str, from_uri: str, to_uri: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Node kinds ('unit', 'place', 'hierarchy' or 'geometry') of a relationship's endpoints.
+
+    Geometry URIs such as .../place_60_main_geom decode to their owner, so
+    the target of a geometry relationship is taken from its type instead.
+
+    Returns:
+        Tuple of (from kind, to kind), None where a URI has no QPM ID
+    """
+    from_kind = _decode(from_uri)[0]
+    to_kind = 'geometry' if rel_type in GEOMETRY_RELATIONSHIP_TYPES else _decode(to_uri)[0]
+    return from_kind, to_kind
+
+
+def cache_info():
+    """Hit/miss statistics of the URI memo cache."""
+    return _decode.cache_info()
+
+
+if __name__ == "__main__":
+    import random
+    import timeit
+
+    base = "http://qpm.ontology/2025#"
+
+    # The regex scans this module replaces in QPMParser
+    def legacy_extract_id(uri):
+        for pattern in [r'unit_(\d+)', r'place_(\d+)', r'hierarchy_(\d+)', r'place_(\d+)_.*_geom']:
+            match = re.search(pattern, uri)
+            if match:
+                try:
+                    return int(match.group(1))
+                except ValueError:
+                    return match.group(1)
+        return None
+
+    def legacy_unit_id(uri):
+        match = re.search(r'unit_(\d+)', str(uri))
+        return int(match.group(1)) if match else None
+
+    # Relationship endpoints: many children pointing at few parents
+    random.seed(1)
+    uris = []
+    for i in range(200000):
+        uris.append(f"{base}place_{i % 50000}")
+        uris.append(f"{base}unit_{random.randint(1, 40)}")
+    samples = uris[:1000] + [
+        f"{base}hierarchy_2",
+        "http://qpm.ontology/2025/geom/place_60_main_geom",
+        "http://qpm.ontology/2025/geom/unit_7_extra_geom_place_3",
+        f"{base}Unit",
+        f"{base}place_x",
+    ]
+
+    for uri in samples:
+        assert entity_id(uri) == legacy_extract_id(uri), uri
+        assert unit_id(uri) == legacy_unit_id(uri), uri
+    print("✅ Codec matches the regex lookups")
+
+    legacy_time = timeit.timeit(lambda: [legacy_extract_id(u) for u in uris], number=1)
+    _decode.cache_clear()
+    codec_time = timeit.timeit(lambda: [entity_id(u) for u in uris], number=1)
+
+    print(f"\n⏱️  {len(uris):,} relationship endpoint URIs:")
+    print(f"  regex _extract_id: {legacy_time:.3f}s")
+    print(f"  uri_codec:         {codec_time:.3f}s ({legacy_time / codec_time:.1f}x)")
+    print(f"  cache: {cache_info()}")
@@ -1,10 +1,342 @@
 """
 WKT (Well-Known Text) Parser for Geometry Extraction
-Extracts coordinates from WKT POINT and POLYGON strings
+Extracts coordinates from WKT POINT, POLYGON and MULTIPOLYGON strings,
+one at a time or in NumPy batches
 """
 
 import re
-from typing import Tuple, List, Optional
+import warnings
+from typing import Dict, Tuple, List, Optional, Sequence
+
+import numpy as np
+
+
+# Geometry type codes used by the batch decoder
+GEOMETRY_TYPES = ('UNKNOWN', 'POINT', 'POLYGON', 'MULTIPOLYGON')
+GEOMETRY_TYPE_CODES = {name: code for code, name in enumerate(GEOMETRY_TYPES)}
+
+# Parenthesis depth at which coordinate lists (rings) sit, per type code
+_RING_DEPTH = {1: 1, 2: 2, 3: 3}
+
+# Optional GeoSPARQL CRS IRI, the type keyword and an optional Z/M/ZM marker
+_HEAD_RE = re.compile(r'\s*(?:<[^>]*>\s*)?([A-Za-z]+)(?:\s+(ZM|Z|M)\b)?\s*', re.IGNORECASE)
+_PAREN_RE = re.compile(r'[()]|[^()]+')
+_CRS_RE = re.compile(r'\s*<[^>]*>\s*')
+
+
+def strip_crs(wkt_string: Optional[str]) -> Optional[str]:
+    """WKT without its leading GeoSPARQL CRS IRI, which shapely cannot parse (None stays None)."""
+    if not wkt_string:
+        return wkt_string
+    crs = _CRS_RE.match(wkt_string)
+    return wkt_string[crs.end():] if crs else wkt_string
+
+
+def _split_rings(wkt_string: Optional[str]) -> Tuple[int, List[List[str]]]:
+    """
+    Split a WKT string into polygons of raw ring coordinate text.
+
+    A POINT becomes one polygon with a one-coordinate ring. Coordinates
+    beyond x and y (Z/M) are dropped.
+
+    Returns:
+        Tuple of (type code, list of polygons, each a list of ring texts);
+        unsupported or malformed strings give (code, [])
+    """
+    if not wkt_string:
+        return 0, []
+
+    head = _HEAD_RE.match(wkt_string)
+    if not head:
+        return 0, []
+    type_code = GEOMETRY_TYPE_CODES.get(head.group(1).upper(), 0)
+    if type_code == 0:
+        return 0, []
+
+    ring_depth = _RING_DEPTH[type_code]
+    polygons = []
+    depth = 0
+    for token in _PAREN_RE.findall(wkt_string, head.end()):
+        if token == '(':
+            depth += 1
+            if depth == max(ring_depth - 1, 1) and (ring_depth > 1 or not polygons):
+                polygons.append([])
+        elif token == ')':
+            depth -= 1
+            if depth < 0:
+                return type_code, []
+        elif depth == ring_depth and polygons:
+            polygons[-1].append(token)
+        elif token.strip() not in ('', ','):
+            return type_code, []
+
+    if depth != 0:
+        return type_code, []
+
+    if head.group(2):
+        # Keep x and y of each Z/M/ZM coordinate
+        polygons = [
+            [','.join(' '.join(coord.split()[:2]) for coord in ring.split(',')) for ring in rings]
+            for rings in polygons
+        ]
+    return type_code, [rings for rings in polygons if rings]
+
+
+def decode_wkt_batch(wkt_strings: Sequence[Optional[str]]) -> Dict[str, np.ndarray]:
+    """
+    Decode many WKT strings into flat coordinate arrays in one pass.
+
+    The layout follows GeoArrow: all vertices go into one (N, 2) float64
+    array, and nested offset arrays describe the structure. Coordinates
+    of geometry g's polygons p in range(geometry_offsets[g],
+    geometry_offsets[g + 1]) consist of rings r in range(polygon_offsets[p],
+    polygon_offsets[p + 1]), whose vertices are
+    coords[ring_offsets[r]:ring_offsets[r + 1]]. The first ring of a
+    polygon is its exterior. A POINT is one polygon with a one-vertex ring.
+    Strings that cannot be decoded (None, unsupported types, malformed
+    numbers) get no polygons.
+
+    Args:
+        wkt_strings: WKT strings (None entries allowed)
+
+    Returns:
+        Dictionary with 'geometry_type' (int8 codes into GEOMETRY_TYPES),
+        'coords', 'ring_offsets', 'polygon_offsets' and 'geometry_offsets'
+
+    Example:
+        >>> batch = decode_wkt_batch(["POINT (1 2)", "POLYGON ((0 0, 1 0, 1 1, 0 0))"])
+        >>> batch['geometry_offsets'].tolist(), batch['ring_offsets'].tolist()
+        ([0, 1, 2], [0, 1, 5])
+    """
+    type_codes = np.zeros(len(wkt_strings), dtype=np.int8)
+    geometry_offsets = [0]
+    polygon_offsets = [0]
+    ring_lengths = []
+    texts = []
+
+    for i, wkt_string in enumerate(wkt_strings):
+        type_codes[i], polygons = _split_rings(wkt_string)
+        for rings in polygons:
+            for ring in rings:
+                ring_lengths.append(ring.count(',') + 1)
+                texts.append(ring)
+            polygon_offsets.append(len(ring_lengths))
+        geometry_offsets.append(len(polygon_offsets) - 1)
+
+    coords = _parse_numbers(' '.join(texts).replace(',', ' '))
+    if coords is None or len(coords) != 2 * sum(ring_lengths):
+        if len(wkt_strings) > 1:
+            # Some geometry is malformed: decode one by one so only it is dropped
+            return _concat_batches([decode_wkt_batch([wkt_string]) for wkt_string in wkt_strings])
+        return empty_batch(type_codes)
+
+    ring_offsets = np.zeros(len(ring_lengths) + 1, dtype=np.int64)
+    np.cumsum(ring_lengths, out=ring_offsets[1:])
+    return {
+        'geometry_type': type_codes,
+        'coords': coords.reshape(-1, 2),
+        'ring_offsets': ring_offsets,
+        'polygon_offsets': np.asarray(polygon_offsets, dtype=np.int64),
+        'geometry_offsets': np.asarray(geometry_offsets, dtype=np.int64),
+    }
+
+
+def _parse_numbers(text: str) -> Optional[np.ndarray]:
+    """Parse whitespace-separated numbers in C; None if any token is not a number."""
+    if not text.strip():
+        return np.zeros(0, dtype=np.float64)
+    with warnings.catch_warnings():
+        # NumPy warns (instead of raising) when it stops at an invalid token
+        warnings.simplefilter('error')
+        try:
+            return np.fromstring(text, dtype=np.float64, sep=' ')
+        except (ValueError, DeprecationWarning):
+            return None
+
+
+def empty_batch(type_codes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Batch in decode_wkt_batch() layout in which no geometry has coordinates.
+
+    Args:
+        type_codes: GEOMETRY_TYPE_CODES value per geometry
+    """
+    return {
+        'geometry_type': type_codes,
+        'coords': np.zeros((0, 2), dtype=np.float64),
+        'ring_offsets': np.zeros(1, dtype=np.int64),
+        'polygon_offsets': np.zeros(1, dtype=np.int64),
+        'geometry_offsets': np.zeros(len(type_codes) + 1, dtype=np.int64),
+    }
+
+
+def _concat_batches(batches: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Concatenate decoded batches, shifting their offsets."""
+    result = empty_batch(np.concatenate([batch['geometry_type'] for batch in batches]))
+    coords = [result['coords']]
+    offsets = {key: [result[key][:1]] for key in ('ring_offsets', 'polygon_offsets', 'geometry_offsets')}
+    totals = {'ring_offsets': 0, 'polygon_offsets': 0, 'geometry_offsets': 0}
+    counts = {'ring_offsets': 'coords', 'polygon_offsets': 'ring_offsets', 'geometry_offsets': 'polygon_offsets'}
+
+    for batch in batches:
+        coords.append(batch['coords'])
+        for key in offsets:
+            offsets[key].append(batch[key][1:] + totals[key])
+        # Each level's offsets point into the level below, so shift by that level's size
+        for key, child in counts.items():
+            totals[key] += len(batch[child]) - (child != 'coords')
+
+    result['coords'] = np.concatenate(coords)
+    for key, parts in offsets.items():
+        result[key] = np.concatenate(parts)
+    return result
+
+
+def batch_polygons(batch: Dict[str, np.ndarray], index: int) -> List[List[List[Tuple[float, float]]]]:
+    """
+    Coordinates of one geometry of a decoded batch as Python tuples.
+
+    Returns:
+        List of polygons, each a list of rings of (lon, lat) tuples
+    """
+    coords = batch['coords']
+    ring_offsets = batch['ring_offsets']
+    polygon_offsets = batch['polygon_offsets']
+    geometry_offsets = batch['geometry_offsets']
+
+    polygons = []
+    for p in range(geometry_offsets[index], geometry_offsets[index + 1]):
+        rings = []
+        for r in range(polygon_offsets[p], polygon_offsets[p + 1]):
+            rings.append([tuple(xy) for xy in coords[ring_offsets[r]:ring_offsets[r + 1]].tolist()])
+        polygons.append(rings)
+    return polygons
+
+
+def batch_vertex_centroids(batch: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Vertex average of each geometry's first exterior ring, as calculate_centroid computes it.
+
+    Returns:
+        (G, 2) array of (lon, lat); NaN where the ring has fewer than 3 vertices
+    """
+    geometry_offsets = batch['geometry_offsets']
+    count = len(geometry_offsets) - 1
+    result = np.full((count, 2), np.nan)
+
+    has_polygon = geometry_offsets[1:] > geometry_offsets[:-1]
+    rings = batch['polygon_offsets'][geometry_offsets[:-1][has_polygon]]
+    starts = batch['ring_offsets'][rings]
+    lengths = batch['ring_offsets'][rings + 1] - starts
+
+    valid = lengths >= 3
+    starts, lengths = starts[valid], lengths[valid]
+    sums = np.zeros((len(starts), 2))
+    # Sum vertex by vertex (not pairwise) so results match calculate_centroid exactly
+    for step in range(lengths.max() if len(lengths) else 0):
+        active = lengths > step
+        sums[active] += batch['coords'][starts[active] + step]
+
+    targets = np.flatnonzero(has_polygon)[valid]
+    result[targets] = sums / lengths[:, None]
+    return result
+
+
+def batch_metrics(batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Area-weighted centroid, area, bounding box and vertex count of every geometry.
+
+    Polygon centroids and areas use the shoelace formula over all rings in
+    one vectorised pass: exterior rings count positively and holes
+    negatively, whatever their winding order, and MULTIPOLYGON parts are
+    combined by area. Rings need not be explicitly closed. Computation is
+    planar in the coordinate units (degrees for QPM data), relative to
+    each geometry's first vertex to limit rounding error. Degenerate
+    polygons (zero area) fall back to the vertex average of their exterior
+    ring, and points are their own centroid and bounding box.
+
+    Args:
+        batch: Result of decode_wkt_batch
+
+    Returns:
+        Dictionary of per-geometry arrays: 'centroid' (G, 2), 'area',
+        'minx', 'miny', 'maxx', 'maxy' and 'vertex_count'; NaN (0 for
+        vertex_count) where a geometry has no coordinates
+    """
+    coords = batch['coords']
+    ring_offsets = batch['ring_offsets']
+    polygon_offsets = batch['polygon_offsets']
+    geometry_offsets = batch['geometry_offsets']
+    geometry_count = len(geometry_offsets) - 1
+    ring_count = len(ring_offsets) - 1
+
+    # Coordinate range of each geometry
+    first_ring = polygon_offsets[geometry_offsets]
+    coord_bounds = ring_offsets[first_ring]
+    starts, stops = coord_bounds[:-1], coord_bounds[1:]
+    vertex_count = stops - starts
+    has_coords = vertex_count > 0
+
+    metrics = {
+        'centroid': np.full((geometry_count, 2), np.nan),
+        'area': np.full(geometry_count, np.nan),
+        'minx': np.full(geometry_count, np.nan),
+        'miny': np.full(geometry_count, np.nan),
+        'maxx': np.full(geometry_count, np.nan),
+        'maxy': np.full(geometry_count, np.nan),
+        'vertex_count': vertex_count,
+    }
+    if not has_coords.any():
+        return metrics
+
+    # Bounding boxes: one reduction per axis over the non-empty geometries
+    nonempty_starts = starts[has_coords]
+    for axis, (low, high) in enumerate((('minx', 'maxx'), ('miny', 'maxy'))):
+        metrics[low][has_coords] = np.minimum.reduceat(coords[:, axis], nonempty_starts)
+        metrics[high][has_coords] = np.maximum.reduceat(coords[:, axis], nonempty_starts)
+
+    # Ring -> polygon -> geometry membership, and each vertex's ring
+    ring_polygon = np.repeat(np.arange(len(polygon_offsets) - 1), np.diff(polygon_offsets))
+    polygon_geometry = np.repeat(np.arange(geometry_count), np.diff(geometry_offsets))
+    ring_geometry = polygon_geometry[ring_polygon]
+    ring_lengths = np.diff(ring_offsets)
+    vertex_ring = np.repeat(np.arange(ring_count), ring_lengths)
+
+    # Shift each geometry to its first vertex, then pair each vertex with the next one in its ring
+    local = coords - coords[starts[ring_geometry[vertex_ring]]]
+    following = np.arange(len(coords)) + 1
+    following[ring_offsets[1:] - 1] = ring_offsets[:-1]
+    x0, y0 = local[:, 0], local[:, 1]
+    x1, y1 = local[following, 0], local[following, 1]
+    cross = x0 * y1 - x1 * y0
+
+    ring_area = np.bincount(vertex_ring, weights=cross, minlength=ring_count) / 2.0
+    ring_mx = np.bincount(vertex_ring, weights=(x0 + x1) * cross, minlength=ring_count) / 6.0
+    ring_my = np.bincount(vertex_ring, weights=(y0 + y1) * cross, minlength=ring_count) / 6.0
+
+    # Orient every ring positive, then subtract holes (all rings but a polygon's first)
+    is_exterior = np.zeros(ring_count, dtype=bool)
+    is_exterior[polygon_offsets[:-1][np.diff(polygon_offsets) > 0]] = True
+    sign = np.where(ring_area < 0, -1.0, 1.0) * np.where(is_exterior, 1.0, -1.0)
+
+    area = np.bincount(ring_geometry, weights=sign * ring_area, minlength=geometry_count)
+    mx = np.bincount(ring_geometry, weights=sign * ring_mx, minlength=geometry_count)
+    my = np.bincount(ring_geometry, weights=sign * ring_my, minlength=geometry_count)
+
+    origin = coords[np.minimum(starts, len(coords) - 1)]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        centroid = np.column_stack((mx / area, my / area)) + origin
+
+    degenerate = has_coords & ~(area > 0) & (vertex_count > 1)
+    if degenerate.any():
+        centroid[degenerate] = batch_vertex_centroids(batch)[degenerate]
+    # Points (and other single-vertex geometries) are their own centroid
+    single = vertex_count == 1
+    centroid[single] = coords[starts[single]]
+
+    metrics['centroid'] = np.where(has_coords[:, None], centroid, np.nan)
+    metrics['area'] = np.where(has_coords, np.abs(area), np.nan)
+    return metrics
 
 
 def parse_wkt_point(wkt_string: str) -> Optional[Tuple[float, float]]:
@@ -21,19 +353,11 @@ def parse_wkt_point(wkt_string: str) -> Optional[Tuple[float, float]]:
         >>> parse_wkt_point("POINT (-3.1703282 51.4648449)")
         (-3.1703282, 51.4648449)
     """
-    try:
-        # Match POINT (lon lat) pattern
-        pattern = r'POINT\s*\(\s*(-?\d+\.?\d*)\s+(-?\d+\.?\d*)\s*\)'
-        match = re.search(pattern, wkt_string, re.IGNORECASE)
-
-        if match:
-            lon = float(match.group(1))
-            lat = float(match.group(2))
-            return (lon, lat)
-        return None
-    except (ValueError, AttributeError) as e:
-        print(f"Error parsing WKT POINT: {wkt_string} - {e}")
+    batch = decode_wkt_batch([wkt_string])
+    if GEOMETRY_TYPES[batch['geometry_type'][0]] != 'POINT' or len(batch['coords']) != 1:
         return None
+    lon, lat = batch['coords'][0].tolist()
+    return (lon, lat)
 
 
 def parse_wkt_polygon(wkt_string: str) -> Optional[List[Tuple[float, float]]]:
@@ -44,35 +368,17 @@ def parse_wkt_polygon(wkt_string: str) -> Optional[List[Tuple[float, float]]]:
         wkt_string: WKT string like "POLYGON ((lon1 lat1, lon2 lat2, ...))"
 
     Returns:
-        List of (longitude, latitude) tuples or None if parsing fails
+        List of (longitude, latitude) tuples of the exterior ring, or None if parsing fails
 
     Example:
         >>> parse_wkt_polygon("POLYGON ((-3.17 51.46, -3.17 51.46, -3.17 51.46))")
         [(-3.17, 51.46), (-3.17, 51.46), (-3.17, 51.46)]
     """
-    try:
-        # Match POLYGON ((lon lat, lon lat, ...)) pattern
-        pattern = r'POLYGON\s*\(\s*\((.*?)\)\s*\)'
-        match = re.search(pattern, wkt_string, re.IGNORECASE)
-
-        if match:
-            coords_string = match.group(1)
-            # Split by comma to get individual coordinate pairs
-            coord_pairs = coords_string.split(',')
-            coordinates = []
-
-            for pair in coord_pairs:
-                parts = pair.strip().split()
-                if len(parts) == 2:
-                    lon = float(parts[0])
-                    lat = float(parts[1])
-                    coordinates.append((lon, lat))
-
-            return coordinates if coordinates else None
-        return None
-    except (ValueError, AttributeError) as e:
-        print(f"Error parsing WKT POLYGON: {wkt_string[:100]}... - {e}")
+    batch = decode_wkt_batch([wkt_string])
+    if GEOMETRY_TYPES[batch['geometry_type'][0]] not in ('POLYGON', 'MULTIPOLYGON'):
         return None
+    polygons = batch_polygons(batch, 0)
+    return polygons[0][0] if polygons else None
 
 
 def parse_wkt_multipolygon(wkt_string: str) -> Optional[List[List[Tuple[float, float]]]]:
@@ -83,32 +389,13 @@ def parse_wkt_multipolygon(wkt_string: str) -> Optional[List[List[Tuple[float, f
         wkt_string: WKT string like "MULTIPOLYGON (((lon lat, ...)), ((lon lat, ...)))"
 
     Returns:
-        List of polygons, where each polygon is a list of (lon, lat) tuples
-    """
-    try:
-        # Match all polygon parts within MULTIPOLYGON
-        pattern = r'\(\((.*?)\)\)'
-        matches = re.findall(pattern, wkt_string, re.IGNORECASE)
-
-        polygons = []
-        for match in matches:
-            coord_pairs = match.split(',')
-            coordinates = []
-
-            for pair in coord_pairs:
-                parts = pair.strip().split()
-                if len(parts) == 2:
-                    lon = float(parts[0])
-                    lat = float(parts[1])
-                    coordinates.append((lon, lat))
-
-            if coordinates:
-                polygons.append(coordinates)
-
-        return polygons if polygons else None
-    except (ValueError, AttributeError) as e:
-        print(f"Error parsing WKT MULTIPOLYGON: {wkt_string[:100]}... - {e}")
+        List of polygons, where each polygon is a list of (lon, lat) tuples (its exterior ring)
+    """
+    batch = decode_wkt_batch([wkt_string])
+    if GEOMETRY_TYPES[batch['geometry_type'][0]] not in ('POLYGON', 'MULTIPOLYGON'):
         return None
+    polygons = [rings[0] for rings in batch_polygons(batch, 0)]
+    return polygons if polygons else None
 
 
 def get_geometry_type(wkt_string: str) -> str:
@@ -137,28 +424,27 @@ def calculate_centroid(coordinates: List[Tuple[float, float]]) -> Optional[Tuple
     """
     Calculate the centroid of a polygon given its coordinates.
 
+    Uses the area-weighted (shoelace) centroid, so densely sampled edges do
+    not pull it off centre; zero-area rings fall back to the vertex average.
+
     Args:
         coordinates: List of (longitude, latitude) tuples
 
     Returns:
         Tuple of (centroid_lon, centroid_lat) or None if calculation fails
     """
-    try:
-        if not coordinates or len(coordinates) < 3:
-            return None
-
-        # Simple average (works for most cases, though not geometrically precise for complex polygons)
-        sum_lon = sum(coord[0] for coord in coordinates)
-        sum_lat = sum(coord[1] for coord in coordinates)
-
-        centroid_lon = sum_lon / len(coordinates)
-        centroid_lat = sum_lat / len(coordinates)
-
-        return (centroid_lon, centroid_lat)
-    except (ValueError, ZeroDivisionError) as e:
-        print(f"Error calculating centroid: {e}")
+    if not coordinates or len(coordinates) < 3:
         return None
 
+    batch = {
+        'coords': np.asarray(coordinates, dtype=np.float64).reshape(-1, 2),
+        'ring_offsets': np.array([0, len(coordinates)], dtype=np.int64),
+        'polygon_offsets': np.array([0, 1], dtype=np.int64),
+        'geometry_offsets': np.array([0, 1], dtype=np.int64),
+    }
+    lon, lat = batch_metrics(batch)['centroid'][0].tolist()
+    return (lon, lat)
+
 
 if __name__ == "__main__":
     # Test cases
@@ -185,4 +471,48 @@ if __name__ == "__main__":
     centroid = calculate_centroid(coords)
     print(f"Centroid: {centroid}")
 
+    # Test batch decoding (polygon with a hole, multipolygon, unsupported type)
+    batch = decode_wkt_batch([
+        point_wkt,
+        "POLYGON ((0 0, 4 0, 4 4, 0 4, 0 0), (1 1, 2 1, 2 2, 1 1))",
+        "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5)))",
+        "LINESTRING (0 0, 1 1)",
+    ])
+    assert batch['geometry_offsets'].tolist() == [0, 1, 2, 4, 4]
+    assert batch['polygon_offsets'].tolist() == [0, 1, 3, 4, 5]
+    assert batch_polygons(batch, 1)[0][1] == [(1.0, 1.0), (2.0, 1.0), (2.0, 2.0), (1.0, 1.0)]
+    print(f"Batch: {len(batch['coords'])} coordinates in {len(batch['ring_offsets']) - 1} rings")
+
+    # Test metrics: hole removes area, multipolygon parts are combined by area
+    metrics = batch_metrics(batch)
+    assert metrics['area'].tolist()[:3] == [0.0, 15.5, 1.0]
+    assert metrics['centroid'][0].tolist() == list(parse_wkt_point(point_wkt))
+    assert np.allclose(metrics['centroid'][1], [(16 * 2 - 0.5 * 5 / 3) / 15.5, (16 * 2 - 0.5 * 4 / 3) / 15.5])
+    assert np.allclose(metrics['centroid'][2], [(2 / 3 + 17 / 3) / 2, (1 / 3 + 16 / 3) / 2])
+    assert [metrics[k][2] for k in ('minx', 'miny', 'maxx', 'maxy')] == [0.0, 0.0, 6.0, 6.0]
+    assert metrics['vertex_count'].tolist() == [1, 9, 8, 0]
+    assert np.isnan(metrics['area'][3])
+
+    # Densely sampled edge does not pull the centroid
+    dense = [(0.0, 0.0)] + [(i / 100, 0.0) for i in range(1, 100)] + [(1.0, 0.0), (1.0, 1.0), (0.0, 1.0)]
+    assert np.allclose(calculate_centroid(dense), (0.5, 0.5))
+
+    # Batch decoding vs one string at a time
+    import random
+    import time
+
+    random.seed(0)
+    polygons = [
+        "POLYGON ((" + ", ".join(f"{random.uniform(-5, -3)} {random.uniform(51, 53)}" for _ in range(200)) + "))"
+        for _ in range(2000)
+    ]
+    start = time.time()
+    single = [calculate_centroid(parse_wkt_polygon(wkt)) for wkt in polygons]
+    single_time = time.time() - start
+    start = time.time()
+    batched = batch_metrics(decode_wkt_batch(polygons))['centroid']
+    batch_time = time.time() - start
+    assert np.allclose(batched, single)
+    print(f"Centroids of {len(polygons)} polygons: {single_time:.2f}s one by one, {batch_time:.2f}s batched")
+
     print("✅ All WKT parser tests passed!")
\ No newline at end of file